@@ -0,0 +1,31 @@
+"""
+Shared FastAPI dependencies for the v1 routers.
+
+require_admin guards operational and sensitive endpoints (model / rules
+reloads, per-user fraud analytics) with ``Authorization: Bearer
+<ADMIN_API_TOKEN>``. Without a configured token they are only open in
+ENV=dev.
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def require_admin(authorization: Optional[str] = Header(default=None)) -> None:
+    """Reject the request unless it carries the admin bearer token."""
+    token = settings.ADMIN_API_TOKEN
+    if not token:
+        if settings.ENV == "dev":
+            return
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_TOKEN not set).")
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.strip().encode(), token.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or missing admin token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -37,7 +37,8 @@ async def price_forecast(payload: PriceForecastRequest, request: Request):
     logger.info(
         f"[{_MODULE.upper()}] REQUEST | request_id={request_id} "
         f"asset={payload.asset} horizon={payload.horizon_days}d "
-        f"price_override={payload.current_price}"
+        f"price_override={payload.current_price} method={payload.method} "
+        f"curve_days={payload.curve_days} full_curve={payload.full_curve}"
     )
 
     try:
@@ -47,6 +48,9 @@ async def price_forecast(payload: PriceForecastRequest, request: Request):
                 payload.asset,
                 payload.horizon_days,
                 payload.current_price,
+                payload.method,
+                payload.curve_days,
+                payload.full_curve,
             ),
             timeout=settings.SCORING_TIMEOUT,
         )
@@ -88,7 +92,14 @@ async def price_forecast_batch(payload: BatchForecastRequest, request: Request):
 
     try:
         results = await asyncio.wait_for(
-            asyncio.to_thread(batch_forecast, payload.assets, payload.horizon_days),
+            asyncio.to_thread(
+                batch_forecast,
+                payload.assets,
+                payload.horizon_days,
+                payload.method,
+                payload.curve_days,
+                payload.full_curve,
+            ),
             timeout=settings.SCORING_TIMEOUT,
         )
     except ValueError as e:
@@ -0,0 +1,138 @@
+"""
+Fraud analytics endpoints for dashboards.
+
+Served from the fraud_log_hourly / fraud_log_user_daily rollups maintained
+by the log writer (services/fraud_rollups.py); fraud_logs itself is never
+scanned. Per-user decision history is sensitive, so the whole router sits
+behind require_admin (ADMIN_API_TOKEN bearer token).
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import require_admin
+from app.core.logging import get_logger
+from app.db.database import get_async_db
+from app.models.logs import FraudLogHourly, FraudLogUserDaily
+from app.schemas.schemas import (
+    FraudHourlyBucket,
+    FraudHourlyResponse,
+    FraudUserDailyResponse,
+    FraudUserDay,
+)
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+logger = get_logger(__name__)
+
+# Longest window served by /analytics/fraud/hourly (hourly rows per group stay bounded)
+_MAX_HOURLY_RANGE = timedelta(days=93)
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+# ─── Endpoints ────────────────────────────────────────────────────────────────
+
+@router.get(
+    "/analytics/fraud/hourly",
+    response_model=FraudHourlyResponse,
+    summary="Hourly Fraud Decision / Score Mix",
+)
+async def fraud_hourly(
+    start: Optional[datetime] = Query(default=None, description="Inclusive; defaults to end - 24h"),
+    end: Optional[datetime] = Query(default=None, description="Exclusive; defaults to now"),
+    group_by: Optional[Literal["decision", "currency", "location", "risk_bucket"]] = Query(
+        default=None,
+        description="Split each hour by this dimension (risk_bucket = risk_score // 10)",
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    end = _utc(end) if end else datetime.now(timezone.utc)
+    start = _utc(start) if start else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end.")
+    if end - start > _MAX_HOURLY_RANGE:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {_MAX_HOURLY_RANGE.days} days.")
+
+    h = FraudLogHourly
+    key = cast(getattr(h, group_by), String) if group_by else None
+    columns = [
+        h.bucket_start,
+        func.sum(h.tx_count),
+        func.sum(h.amount_sum),
+        func.sum(h.risk_score_sum),
+        func.max(h.risk_score_max),
+    ]
+    group = [h.bucket_start]
+    if key is not None:
+        columns.append(key)
+        group.append(key)
+    stmt = (
+        select(*columns)
+        .where(h.bucket_start >= start.replace(minute=0, second=0, microsecond=0), h.bucket_start < end)
+        .group_by(*group)
+        .order_by(*group)
+    )
+    rows = (await db.execute(stmt)).all()
+
+    buckets = [
+        FraudHourlyBucket(
+            bucket_start=_utc(row[0]),
+            key=row[5] if key is not None else None,
+            tx_count=row[1],
+            amount_sum=round(row[2], 2),
+            avg_risk_score=round(row[3] / row[1], 2) if row[1] else 0.0,
+            max_risk_score=row[4],
+        )
+        for row in rows
+    ]
+    logger.info(
+        f"[ANALYTICS] HOURLY | start={start.isoformat()} end={end.isoformat()} "
+        f"group_by={group_by} buckets={len(buckets)}"
+    )
+    return FraudHourlyResponse(start=start, end=end, group_by=group_by, buckets=buckets)
+
+
+@router.get(
+    "/analytics/fraud/users/{user_id}/daily",
+    response_model=FraudUserDailyResponse,
+    summary="Per-User Daily Fraud History",
+)
+async def fraud_user_daily(
+    user_id: str,
+    days: int = Query(default=30, ge=1, le=366, description="UTC days back, including today"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    d = FraudLogUserDaily
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    stmt = (
+        select(d)
+        .where(d.user_id == user_id, d.day >= since)
+        .order_by(d.day.desc())
+    )
+    rows = (await db.execute(stmt)).scalars().all()
+
+    logger.info(f"[ANALYTICS] USER DAILY | user_id={user_id} days={days} found={len(rows)}")
+    return FraudUserDailyResponse(
+        user_id=user_id,
+        days=[
+            FraudUserDay(
+                day=r.day,
+                tx_count=r.tx_count,
+                approve_count=r.approve_count,
+                review_count=r.review_count,
+                block_count=r.block_count,
+                amount_sum=round(r.amount_sum, 2),
+                amount_max=r.amount_max,
+                avg_risk_score=round(r.risk_score_sum / r.tx_count, 2) if r.tx_count else 0.0,
+                max_risk_score=r.risk_score_max,
+                last_seen=_utc(r.last_seen),
+            )
+            for r in rows
+        ],
+    )
@@ -1,23 +1,58 @@
 import asyncio
+from pathlib import Path
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
 
-from app.schemas.schemas import FraudScoreRequest, FraudScoreResponse
-from app.db.database import get_db
+from app.api.deps import require_admin
+from app.schemas.schemas import (
+    FraudScoreBatchRequest,
+    FraudScoreBatchResponse,
+    FraudScoreRequest,
+    FraudScoreResponse,
+    ModelReloadRequest,
+    ModelReloadResponse,
+    RiskRulesReloadResponse,
+)
+from app.db.database import async_session
 from app.models.logs import FraudLog
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.services.ai_modules.core_ai.service import compute_fraud_score
+from app.services.ai_modules.core_ai.batcher import fraud_score_batcher
+from app.services.ai_modules.core_ai.ml_scorer import model_registry
+from app.services.ai_modules.core_ai.service import compute_fraud_score, compute_fraud_score_batch
+from app.services.ai_modules.core_ai.training import build_training_matrix
+from app.services.fraud_rollups import rollup_upserts
+from app.services.log_writer import log_writer
+from app.services.risk_rules import RiskRulesError, reload_rules
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
+def _fraud_log_row(
+    request_id: Optional[str],
+    tx: FraudScoreRequest,
+    result: FraudScoreResponse,
+) -> dict:
+    return {
+        "request_id": request_id,
+        "user_id": tx.user_id,
+        "amount": tx.amount,
+        "currency": tx.currency,
+        "device_id": tx.device_id,
+        "location": tx.location,
+        "risk_score": result.risk_score,
+        "decision": result.decision,
+        "reasons": result.reasons,
+        "timestamp": tx.timestamp,
+    }
+
+
 # ─── Endpoint ─────────────────────────────────────────────────────────────────
 
 @router.post("/fraud-score", response_model=FraudScoreResponse, summary="Evaluate Transaction Risk")
-async def fraud_score(payload: FraudScoreRequest, request: Request, db: Session = Depends(get_db)):
+async def fraud_score(payload: FraudScoreRequest, request: Request):
     request_id = getattr(request.state, "request_id", None)
     logger.info(
         f"[FRAUD-SCORE] REQUEST | request_id={request_id} user_id={payload.user_id} "
@@ -27,10 +62,11 @@ async def fraud_score(payload: FraudScoreRequest, request: Request, db: Session
 
     try:
         # Timeout protection — scoring must complete within configured limit
-        result = await asyncio.wait_for(
-            asyncio.to_thread(compute_fraud_score, payload, request_id),
-            timeout=settings.SCORING_TIMEOUT,
-        )
+        if settings.FRAUD_MICRO_BATCHING:
+            scoring = fraud_score_batcher.submit(payload, request_id)
+        else:
+            scoring = asyncio.to_thread(compute_fraud_score, payload, request_id)
+        result = await asyncio.wait_for(scoring, timeout=settings.SCORING_TIMEOUT)
     except asyncio.TimeoutError:
         logger.error(f"[FRAUD-SCORE] TIMEOUT | request_id={request_id} user_id={payload.user_id}")
         raise HTTPException(status_code=504, detail="Fraud scoring timed out. Please retry.")
@@ -44,27 +80,24 @@ async def fraud_score(payload: FraudScoreRequest, request: Request, db: Session
     )
 
     # ── Persist to DB ──────────────────────────────────────────────────────────
+    row = _fraud_log_row(request_id, payload, result)
+    if log_writer.running:
+        # Queued for the background writer — never waits on the database
+        log_writer.submit(FraudLog.__table__, row)
+        return result
+
     try:
-        log_entry = FraudLog(
-            request_id=request_id,
-            user_id=payload.user_id,
-            amount=payload.amount,
-            currency=payload.currency,
-            device_id=payload.device_id,
-            location=payload.location,
-            risk_score=result.risk_score,
-            decision=result.decision,
-            reasons=result.reasons,
-            timestamp=payload.timestamp,
-        )
-        db.add(log_entry)
-        db.commit()
+        async with async_session() as db:
+            log_entry = FraudLog(**row)
+            db.add(log_entry)
+            for stmt, params in rollup_upserts(db.bind.dialect.name, [row]):
+                await db.execute(stmt, params)
+            await db.commit()
         logger.info(
             f"[FRAUD-SCORE] DB LOG SAVED | request_id={request_id} "
             f"user_id={payload.user_id} id={log_entry.id} decision={result.decision}"
         )
     except Exception as e:
-        db.rollback()
         # Don't fail the request if DB logging fails — just warn
         logger.warning(
             f"[FRAUD-SCORE] DB LOG FAILED | request_id={request_id} "
@@ -72,3 +105,111 @@ async def fraud_score(payload: FraudScoreRequest, request: Request, db: Session
         )
 
     return result
+
+
+@router.post(
+    "/fraud-score/batch",
+    response_model=FraudScoreBatchResponse,
+    summary="Evaluate Transaction Risk — Batch",
+)
+async def fraud_score_batch(
+    payload: FraudScoreBatchRequest,
+    request: Request,
+):
+    request_id = getattr(request.state, "request_id", None)
+    transactions = payload.transactions
+    logger.info(
+        f"[FRAUD-SCORE] BATCH REQUEST | request_id={request_id} size={len(transactions)}"
+    )
+
+    try:
+        results = await asyncio.wait_for(
+            asyncio.to_thread(compute_fraud_score_batch, transactions, request_id),
+            timeout=settings.BATCH_SCORING_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        logger.error(f"[FRAUD-SCORE] BATCH TIMEOUT | request_id={request_id}")
+        raise HTTPException(status_code=504, detail="Batch fraud scoring timed out. Please retry.")
+    except Exception:
+        logger.exception(f"[FRAUD-SCORE] BATCH ERROR | request_id={request_id}")
+        raise HTTPException(status_code=500, detail="Internal error during batch fraud scoring.")
+
+    logger.info(
+        f"[FRAUD-SCORE] BATCH RESPONSE | request_id={request_id} size={len(results)} "
+        f"blocked={sum(r.decision == 'BLOCK' for r in results)}"
+    )
+
+    # ── Persist to DB (one commit for the whole batch) ───────────────────────
+    rows = [_fraud_log_row(request_id, tx, result) for tx, result in zip(transactions, results)]
+    if log_writer.running:
+        queued = sum(log_writer.submit(FraudLog.__table__, row) for row in rows)
+        logger.info(
+            f"[FRAUD-SCORE] BATCH DB LOG QUEUED | request_id={request_id} "
+            f"rows={queued} dropped={len(rows) - queued}"
+        )
+        return FraudScoreBatchResponse(results=results, count=len(results))
+
+    try:
+        async with async_session() as db:
+            db.add_all([FraudLog(**row) for row in rows])
+            for stmt, params in rollup_upserts(db.bind.dialect.name, rows):
+                await db.execute(stmt, params)
+            await db.commit()
+        logger.info(
+            f"[FRAUD-SCORE] BATCH DB LOG SAVED | request_id={request_id} rows={len(results)}"
+        )
+    except Exception as e:
+        logger.warning(
+            f"[FRAUD-SCORE] BATCH DB LOG FAILED | request_id={request_id} error={str(e)}"
+        )
+
+    return FraudScoreBatchResponse(results=results, count=len(results))
+
+
+@router.post(
+    "/fraud-model/reload",
+    response_model=ModelReloadResponse,
+    status_code=202,
+    summary="Reload or Retrain the Fraud Model in the Background",
+    dependencies=[Depends(require_admin)],
+)
+async def fraud_model_reload(request: Request, payload: Optional[ModelReloadRequest] = None):
+    request_id = getattr(request.state, "request_id", None)
+    payload = payload or ModelReloadRequest()
+
+    started = model_registry.reload_async(
+        retrain=payload.retrain,
+        training_data=build_training_matrix if payload.source == "fraud_logs" else None,
+    )
+    logger.info(
+        f"[FRAUD-MODEL] RELOAD | request_id={request_id} retrain={payload.retrain} "
+        f"source={payload.source} started={started} "
+        f"active_version={model_registry.active_version}"
+    )
+    return ModelReloadResponse(
+        status="accepted" if started else "in_progress",
+        active_version=model_registry.active_version,
+    )
+
+
+@router.post(
+    "/risk-rules/reload",
+    response_model=RiskRulesReloadResponse,
+    summary="Reload Risk Rules (Jurisdiction Lists, Currency Sets, Thresholds)",
+    dependencies=[Depends(require_admin)],
+)
+async def risk_rules_reload(request: Request):
+    request_id = getattr(request.state, "request_id", None)
+
+    try:
+        rules = await asyncio.to_thread(reload_rules)
+    except RiskRulesError as e:
+        logger.warning(f"[RISK-RULES] RELOAD REJECTED | request_id={request_id} error={e}")
+        raise HTTPException(status_code=422, detail=f"Invalid risk rules: {e}")
+
+    logger.info(
+        f"[RISK-RULES] RELOAD | request_id={request_id} version={rules.version} "
+        f"source={rules.source}"
+    )
+    # File name only: the server's filesystem layout stays out of responses
+    return RiskRulesReloadResponse(version=rules.version, source=Path(rules.source).name)
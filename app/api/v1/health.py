@@ -1,5 +1,10 @@
 from fastapi import APIRouter
 from app.core.config import settings
+from app.services.ai_modules.core_ai.ml_scorer import model_registry
+from app.services.ai_modules.market_ai.cache import forecast_cache
+from app.services.log_writer import log_writer
+from app.services.risk_rules import get_rules
+from app.services.velocity_tracker import velocity_tracker
 
 router = APIRouter()
 
@@ -11,4 +16,17 @@ def health_check():
         "service": settings.APP_NAME,
         "env": settings.ENV,
         "version": "1.0.0",
+        "ml_model": {
+            "enabled": settings.USE_ML_MODEL,
+            "version": model_registry.active_version,
+            "reloading": model_registry.reloading,
+        },
+        "risk_rules_version": get_rules().version,
+        "velocity_backend": velocity_tracker.name,
+        "log_writer": {
+            "running": log_writer.running,
+            "queued": log_writer.queued,
+            "dropped": log_writer.dropped,
+        },
+        "forecast_cache": forecast_cache.name if forecast_cache is not None else None,
     }
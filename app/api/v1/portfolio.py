@@ -1,14 +1,14 @@
 import asyncio
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException
 
 from app.schemas.schemas import PortfolioRequest, PortfolioResponse
-from app.db.database import get_db
+from app.db.database import async_session
 from app.models.logs import PortfolioLog
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.services.ai_modules.investment_ai.service import compute_recommendation
+from app.services.log_writer import log_writer
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -17,7 +17,7 @@ logger = get_logger(__name__)
 # ─── Endpoint ─────────────────────────────────────────────────────────────────
 
 @router.post("/recommend-portfolio", response_model=PortfolioResponse, summary="AI Portfolio Recommendation")
-async def recommend_portfolio(request: PortfolioRequest, db: Session = Depends(get_db)):
+async def recommend_portfolio(request: PortfolioRequest):
     logger.info(
         f"[PORTFOLIO] REQUEST | user_id={request.user_id} "
         f"risk_profile={request.risk_profile} portfolio={request.portfolio}"
@@ -43,19 +43,25 @@ async def recommend_portfolio(request: PortfolioRequest, db: Session = Depends(g
     )
 
     # ── Persist to DB ──────────────────────────────────────────────────────────
+    row = {
+        "user_id": request.user_id,
+        "input_portfolio": request.portfolio,
+        "risk_profile": request.risk_profile,
+        "recommended_allocation": result.recommended_allocation,
+        "notes": result.notes,
+    }
+    if log_writer.running:
+        # Queued for the background writer — never waits on the database
+        log_writer.submit(PortfolioLog.__table__, row)
+        return result
+
     try:
-        log_entry = PortfolioLog(
-            user_id=request.user_id,
-            input_portfolio=request.portfolio,
-            risk_profile=request.risk_profile,
-            recommended_allocation=result.recommended_allocation,
-            notes=result.notes,
-        )
-        db.add(log_entry)
-        db.commit()
+        async with async_session() as db:
+            log_entry = PortfolioLog(**row)
+            db.add(log_entry)
+            await db.commit()
         logger.info(f"[PORTFOLIO] DB LOG SAVED | user_id={request.user_id} id={log_entry.id}")
     except Exception as e:
-        db.rollback()
         logger.warning(f"[PORTFOLIO] DB LOG FAILED | {str(e)}")
 
     return result
@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, List, Literal, Optional
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -18,6 +18,24 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    # Connection pools: sync (worker threads) and async (AsyncSession on the event loop)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_ASYNC_POOL_SIZE: int = 10
+    DB_ASYNC_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECS: int = 1_800
+    # fraud_logs monthly partitions (PostgreSQL): months pre-created ahead of the current one,
+    # how often to re-check, and retention in whole months (0 = keep forever; DROP=false
+    # only detaches expired partitions so they can be archived)
+    FRAUD_LOG_PARTITION_MONTHS_AHEAD: int = 2
+    FRAUD_LOG_PARTITION_CHECK_SECS: float = 21_600.0
+    FRAUD_LOG_RETENTION_MONTHS: int = 0
+    FRAUD_LOG_RETENTION_DROP: bool = True
+
+    # Admin endpoints (/v1/fraud-model/reload, /v1/risk-rules/reload, /v1/analytics/*) require
+    # "Authorization: Bearer <ADMIN_API_TOKEN>"; unset = open in ENV=dev, disabled otherwise
+    ADMIN_API_TOKEN: Optional[str] = None
 
     # CORS — in prod, replace * with your actual frontend URLs
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
@@ -25,6 +43,58 @@ class Settings(BaseSettings):
 
     # AI Scoring timeout (seconds)
     SCORING_TIMEOUT: float = 2.0
+    # Batch fraud scoring timeout (seconds) — covers up to 10k rows per call
+    BATCH_SCORING_TIMEOUT: float = 30.0
+
+    # Micro-batching for /v1/fraud-score — coalesce concurrent requests into one scoring pass
+    FRAUD_MICRO_BATCHING: bool = False
+    FRAUD_BATCH_WINDOW_MS: float = 5.0
+    FRAUD_BATCH_MAX_SIZE: int = 256
+
+    # Background log writer: fraud/portfolio logs are queued and bulk-inserted every
+    # FLUSH_MS or BATCH_SIZE rows; beyond MAX_QUEUE waiting rows new ones are dropped
+    LOG_WRITER_ENABLED: bool = True
+    LOG_WRITER_BATCH_SIZE: int = 500
+    LOG_WRITER_FLUSH_MS: float = 200.0
+    LOG_WRITER_MAX_QUEUE: int = 50_000
+
+    # Risk rules file (currency sets, jurisdiction lists, decision thresholds);
+    # unset = app/services/risk_rules.json. Reload via POST /v1/risk-rules/reload
+    RISK_RULES_PATH: Optional[str] = None
+
+    # Velocity backend: "memory" (per process) or "redis" (shared across workers/pods)
+    VELOCITY_BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: Optional[str] = None
+    VELOCITY_REDIS_PREFIX: str = "aurix:velocity:"
+    # Velocity windows kept per transaction besides the user: device, user_location, user_currency
+    VELOCITY_DIMENSIONS: List[str] = ["device", "user_location", "user_currency"]
+    # Approximate, fixed-memory velocity (count-min sketch) for these dimensions instead of
+    # exact windows; overcount <= EPSILON x window traffic with probability 1 - DELTA
+    VELOCITY_SKETCH_DIMENSIONS: List[str] = []
+    VELOCITY_SKETCH_EPSILON: float = 0.0005
+    VELOCITY_SKETCH_DELTA: float = 0.01
+    # Distinct devices per user in 24h (virtual HyperLogLog): registers per user drawn
+    # from a shared pool per hour (memory = 25 x pool bytes; size it ~40x daily user/device pairs)
+    VELOCITY_HLL_REGISTERS: int = 16
+    VELOCITY_HLL_POOL_SIZE: int = 1_048_576
+    # Users whose distinct devices (up to 8) are counted exactly before the HLL takes over
+    # (fixed table, ~76 bytes per row, ~20 MB by default; size it above daily active users)
+    VELOCITY_DISTINCT_EXACT_USERS: int = 262_144
+    # Velocity tracker lock stripes (independently locked partitions keyed by hash(user_id))
+    VELOCITY_SHARDS: int = 64
+    # In-memory velocity snapshots: each worker writes <stem>.<slot>.npz next to this path every
+    # interval + on shutdown; on startup all fresh slot files are merged (falls back to
+    # rebuilding from the last 24h of fraud_logs, streamed in chunks). Unset path = no file
+    VELOCITY_SNAPSHOT_PATH: Optional[str] = "data/velocity_snapshot.npz"
+    VELOCITY_SNAPSHOT_INTERVAL_SECS: float = 60.0
+    VELOCITY_RESTORE_FROM_DB: bool = True
+    VELOCITY_RESTORE_CHUNK_SIZE: int = 10_000
+    # Cap on users tracked in memory, applied separately to each velocity dimension
+    # (devices, user+location, user+currency get the same cap; least recently active
+    # evicted first; 0 = no cap)
+    VELOCITY_MAX_USERS: int = 1_000_000
+    # How often the sweeper drops users idle for 24h (seconds)
+    VELOCITY_SWEEP_INTERVAL_SECS: float = 300.0
 
     # Fraud thresholds
     HIGH_RISK_AMOUNT: float = 10000.0
@@ -32,6 +102,30 @@ class Settings(BaseSettings):
 
     # ML toggle — set USE_ML_MODEL=true in .env to route scoring through ML hook
     USE_ML_MODEL: bool = False
+    # Score with the packed-array tree evaluator instead of sklearn's per-tree loop
+    ML_COMPILED_ENGINE: bool = True
+    # Persist trained fraud model artifacts and load them at startup instead of retraining
+    ML_MODEL_PERSIST: bool = True
+    ML_MODEL_DIR: str = "models"
+    # Serve the packed model from one read-only mmap segment shared by all workers
+    ML_SHARED_MODEL: bool = False
+    # Every worker re-checks the model store this often (seconds) and reloads when another
+    # worker published a new artifact, e.g. after /v1/fraud-model/reload retrain (0 = off)
+    ML_MODEL_WATCH_SECS: float = 30.0
+    # Retraining on historical fraud_logs (streamed in chunks, reservoir-sampled)
+    ML_TRAINING_CHUNK_SIZE: int = 10_000
+    ML_TRAINING_MAX_ROWS: int = 200_000
+    ML_TRAINING_MIN_ROWS: int = 1_000
+    ML_TRAINING_LOOKBACK_DAYS: int = 90
+
+    # Market AI forecasts: "monte_carlo" (500 simulated GBM paths) or "analytic"
+    # (exact lognormal quantiles in O(1)); requests can override with "method"
+    FORECAST_METHOD: Literal["monte_carlo", "analytic"] = "monte_carlo"
+    # Forecast result cache: "memory" (per process, LRU), "redis" (shared via REDIS_URL) or "none"
+    FORECAST_CACHE_BACKEND: Literal["none", "memory", "redis"] = "memory"
+    FORECAST_CACHE_TTL_SECS: float = 300.0
+    FORECAST_CACHE_MAX_ENTRIES: int = 10_000
+    FORECAST_CACHE_REDIS_PREFIX: str = "aurix:forecast:"
 
     @field_validator("ALLOWED_ORIGINS", mode="before")
     @classmethod
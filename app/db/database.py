@@ -1,4 +1,25 @@
+"""
+Database engines and session dependencies.
+
+Sync:  ``engine`` / ``SessionLocal`` / ``get_db`` — used by worker threads
+       (log writer, training, velocity restore) and sync code paths.
+Async: ``get_async_engine()`` / ``async_session()`` / ``get_async_db`` — for
+       ``async def`` endpoints, so a query awaits on the event loop instead of
+       blocking it or paying a thread hop. A small pool then serves many
+       concurrent requests: a connection is held only while a query runs.
+
+The async engine is created lazily on first use from DATABASE_URL with the
+driver swapped for its asyncio counterpart (postgresql → postgresql+asyncpg,
+sqlite → sqlite+aiosqlite), so processes that never touch it need neither
+driver. Both pools are sized from Settings (DB_*).
+"""
+
+import threading
+from typing import AsyncIterator, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.core.config import settings
@@ -6,14 +27,22 @@ from app.core.config import settings
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,       # auto-reconnect if connection drops
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECS,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "postgres": "asyncpg", "sqlite": "aiosqlite"}
+
+_async_lock = threading.Lock()
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker[AsyncSession]] = None
+
 
 def get_db():
     """Dependency — yields a DB session and closes it after use."""
@@ -25,3 +54,60 @@ def get_db():
         raise
     finally:
         db.close()
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver replaced by the asyncio one (unknown backends unchanged)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        return url
+    if backend == "postgres":
+        backend = "postgresql"
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """The shared async engine, created on first call."""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        with _async_lock:
+            if _async_engine is None:
+                _async_engine = create_async_engine(
+                    async_database_url(settings.DATABASE_URL),
+                    pool_pre_ping=True,
+                    pool_size=settings.DB_ASYNC_POOL_SIZE,
+                    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+                    pool_timeout=settings.DB_POOL_TIMEOUT,
+                    pool_recycle=settings.DB_POOL_RECYCLE_SECS,
+                )
+                _async_sessionmaker = async_sessionmaker(
+                    _async_engine, autoflush=False, expire_on_commit=False
+                )
+    return _async_engine
+
+
+def async_session() -> AsyncSession:
+    """New AsyncSession on the shared async engine; use as ``async with async_session() as db``."""
+    get_async_engine()
+    return _async_sessionmaker()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency — yields an AsyncSession and closes it after use."""
+    async with async_session() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def dispose_async_engine() -> None:
+    """Close the async pool's connections (app shutdown). No-op if never created."""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_sessionmaker = None
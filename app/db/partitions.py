@@ -0,0 +1,235 @@
+"""
+Monthly range partitions for fraud_logs (PostgreSQL only).
+───────────────────────────────────────────────────────────
+fraud_logs is declared ``PARTITION BY RANGE (timestamp)`` (see FraudLog and
+scripts/migrations/20261018_fraud_logs_monthly_partitions.sql). Each month
+lives in its own table, so inserts touch one small set of indexes however
+large history grows, queries filtering on ``timestamp`` only scan the months
+they cover, and retention is a metadata operation instead of a row-by-row
+DELETE.
+
+Design:
+  - Partitions are named ``fraud_logs_yYYYYmMM`` and cover
+    [first day of month, first day of next month) in UTC.
+  - ensure_fraud_log_partitions() creates the current month plus
+    FRAUD_LOG_PARTITION_MONTHS_AHEAD future months, and a DEFAULT partition
+    that catches client timestamps outside every range (backdated or far
+    future) so one odd row can never fail a log-writer batch.
+  - If the DEFAULT partition already holds rows for a month being created,
+    they are moved into the new partition before it is attached; PostgreSQL
+    refuses the attach otherwise.
+  - apply_fraud_log_retention() detaches partitions that ended more than
+    FRAUD_LOG_RETENTION_MONTHS months ago and drops them unless
+    FRAUD_LOG_RETENTION_DROP is false (detached tables are kept for archiving).
+    Expired rows in the DEFAULT partition are deleted.
+  - Every maintenance pass holds a transaction-level advisory lock, so
+    several workers starting at once do not race on the same DDL.
+  - FraudLogPartitionMaintainer repeats the pass every
+    FRAUD_LOG_PARTITION_CHECK_SECS so long-running processes never outlive
+    their pre-created months. On other backends everything is a no-op.
+"""
+
+import threading
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.database import engine
+
+logger = get_logger(__name__)
+
+_PARENT = "fraud_logs"
+_DEFAULT_PARTITION = f"{_PARENT}_default"
+# pg_advisory_xact_lock key shared by every process maintaining fraud_logs partitions
+_ADVISORY_LOCK_KEY = 0x41555249_58464C50  # "AURIXFLP"
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"{_PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def _parse_partition_name(name: str) -> Optional[date]:
+    prefix = f"{_PARENT}_y"
+    if not name.startswith(prefix) or len(name) != len(prefix) + 7 or name[-3] != "m":
+        return None
+    try:
+        return date(int(name[len(prefix):-3]), int(name[-2:]), 1)
+    except ValueError:
+        return None
+
+
+def _current_month(now: Optional[datetime]) -> date:
+    now = now or datetime.now(timezone.utc)
+    return date(now.year, now.month, 1)
+
+
+def _is_partitioned(conn: Connection) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t)"),
+        {"t": _PARENT},
+    ).first() is not None
+
+
+def _partitions(conn: Connection) -> list[str]:
+    return list(conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:t)"
+        ),
+        {"t": _PARENT},
+    ).scalars())
+
+
+def _enabled() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def _create_month(conn: Connection, month: date) -> None:
+    name = _partition_name(month)
+    lo, hi = month.isoformat(), _add_months(month, 1).isoformat()
+    bounds = f"FOR VALUES FROM ('{lo} 00:00:00+00') TO ('{hi} 00:00:00+00')"
+    stray = conn.execute(
+        text(
+            f"SELECT count(*) FROM {_DEFAULT_PARTITION} "
+            "WHERE timestamp >= CAST(:lo AS timestamptz) AND timestamp < CAST(:hi AS timestamptz)"
+        ),
+        {"lo": f"{lo} 00:00:00+00", "hi": f"{hi} 00:00:00+00"},
+    ).scalar_one() if _DEFAULT_PARTITION in _partitions(conn) else 0
+    if not stray:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {_PARENT} {bounds}"))
+        return
+    # Rows for this month landed in DEFAULT while the partition did not exist:
+    # build the partition standalone, move them over, then attach it.
+    conn.execute(text(
+        f"CREATE TABLE {name} (LIKE {_PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {_DEFAULT_PARTITION} "
+            "WHERE timestamp >= CAST(:lo AS timestamptz) AND timestamp < CAST(:hi AS timestamptz) "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lo": f"{lo} 00:00:00+00", "hi": f"{hi} 00:00:00+00"},
+    )
+    conn.execute(text(f"ALTER TABLE {_PARENT} ATTACH PARTITION {name} {bounds}"))
+    logger.info(f"[PARTITIONS] MOVED FROM DEFAULT | partition={name} rows={stray}")
+
+
+def ensure_fraud_log_partitions(
+    months_ahead: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> list[str]:
+    """Create the DEFAULT partition and this month + ``months_ahead``. Returns new partition names."""
+    if not _enabled():
+        return []
+    months_ahead = settings.FRAUD_LOG_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = _current_month(now)
+    created: list[str] = []
+    with engine.begin() as conn:
+        if not _is_partitioned(conn):
+            logger.warning(
+                f"[PARTITIONS] SKIPPED | table={_PARENT} is not partitioned "
+                "(run scripts/migrations/20261018_fraud_logs_monthly_partitions.sql)"
+            )
+            return []
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+        existing = set(_partitions(conn))
+        if _DEFAULT_PARTITION not in existing:
+            conn.execute(text(f"CREATE TABLE {_DEFAULT_PARTITION} PARTITION OF {_PARENT} DEFAULT"))
+            created.append(_DEFAULT_PARTITION)
+        for offset in range(months_ahead + 1):
+            month = _add_months(current, offset)
+            if _partition_name(month) not in existing:
+                _create_month(conn, month)
+                created.append(_partition_name(month))
+    if created:
+        logger.info(f"[PARTITIONS] CREATED | table={_PARENT} partitions={','.join(created)}")
+    return created
+
+
+def apply_fraud_log_retention(
+    keep_months: Optional[int] = None,
+    drop: Optional[bool] = None,
+    now: Optional[datetime] = None,
+) -> list[str]:
+    """
+    Detach (and by default drop) monthly partitions older than ``keep_months``
+    full months before the current one. ``keep_months`` <= 0 keeps everything.
+    Returns the detached partition names.
+    """
+    keep_months = settings.FRAUD_LOG_RETENTION_MONTHS if keep_months is None else keep_months
+    drop = settings.FRAUD_LOG_RETENTION_DROP if drop is None else drop
+    if keep_months <= 0 or not _enabled():
+        return []
+    cutoff = _add_months(_current_month(now), -keep_months)
+    detached: list[str] = []
+    with engine.begin() as conn:
+        if not _is_partitioned(conn):
+            return []
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+        partitions = _partitions(conn)
+        for name in sorted(partitions):
+            month = _parse_partition_name(name)
+            if month is None or _add_months(month, 1) > cutoff:
+                continue
+            conn.execute(text(f"ALTER TABLE {_PARENT} DETACH PARTITION {name}"))
+            if drop:
+                conn.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+        if _DEFAULT_PARTITION in partitions:
+            conn.execute(
+                text(f"DELETE FROM {_DEFAULT_PARTITION} WHERE timestamp < CAST(:cutoff AS timestamptz)"),
+                {"cutoff": f"{cutoff.isoformat()} 00:00:00+00"},
+            )
+    if detached:
+        logger.info(
+            f"[PARTITIONS] RETENTION | table={_PARENT} cutoff={cutoff.isoformat()} "
+            f"{'dropped' if drop else 'detached'}={','.join(detached)}"
+        )
+    return detached
+
+
+def maintain_fraud_log_partitions() -> None:
+    """One maintenance pass: pre-create upcoming months, then apply retention."""
+    try:
+        ensure_fraud_log_partitions()
+        apply_fraud_log_retention()
+    except Exception as e:
+        logger.warning(f"[PARTITIONS] MAINTENANCE FAILED | table={_PARENT} error={e}")
+
+
+class FraudLogPartitionMaintainer:
+    """Re-runs maintain_fraud_log_partitions() every ``interval_secs`` in a daemon thread."""
+
+    def __init__(self, interval_secs: float) -> None:
+        self._interval = interval_secs
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if not _enabled() or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fraud-log-partitions", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            maintain_fraud_log_partitions()
@@ -1,15 +1,33 @@
-from sqlalchemy import Column, String, Float, DateTime, JSON, Integer
+from sqlalchemy import BigInteger, Column, Date, String, Float, DateTime, Index, JSON, Integer, SmallInteger
+from sqlalchemy.engine import make_url
 from sqlalchemy.sql import func
+from app.core.config import settings
 from app.db.database import Base
 
+# fraud_logs is range-partitioned by month on PostgreSQL (see app/db/partitions.py),
+# which requires the partition key in the primary key. Other backends (SQLite in
+# local runs) keep the plain autoincrement id key.
+_PARTITIONED = make_url(settings.DATABASE_URL).get_backend_name() in ("postgresql", "postgres")
+
 
 class FraudLog(Base):
-    """Persistent log of every fraud scoring decision."""
+    """Persistent log of every fraud scoring decision (monthly partitions on PostgreSQL)."""
     __tablename__ = "fraud_logs"
+    __table_args__ = (
+        # Per-user history (newest first) answered from the index alone on PostgreSQL
+        Index(
+            "ix_fraud_logs_user_id_timestamp",
+            "user_id",
+            "timestamp",
+            postgresql_ops={"timestamp": "DESC"},
+            postgresql_include=["decision", "risk_score", "amount"],
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
     request_id = Column(String(64), nullable=True, index=True)
-    user_id = Column(String, nullable=False, index=True)
+    user_id = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     currency = Column(String(10), nullable=False)
     device_id = Column(String, nullable=True)
@@ -17,10 +35,47 @@ class FraudLog(Base):
     risk_score = Column(Float, nullable=False)
     decision = Column(String(20), nullable=False)  # APPROVE / REVIEW / BLOCK
     reasons = Column(JSON, nullable=False)  # list of reason strings
-    timestamp = Column(DateTime(timezone=True), nullable=False)
+    timestamp = Column(DateTime(timezone=True), nullable=False, primary_key=_PARTITIONED)
     logged_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class FraudLogHourly(Base):
+    """
+    Hourly fraud_logs rollup per decision / currency / location / risk bucket.
+
+    Maintained incrementally by the log writer (app/services/fraud_rollups.py),
+    so dashboards never scan fraud_logs. Empty location is stored as ''.
+    """
+    __tablename__ = "fraud_log_hourly"
+
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)  # UTC hour
+    decision = Column(String(20), primary_key=True)
+    currency = Column(String(10), primary_key=True)
+    location = Column(String(10), primary_key=True)
+    risk_bucket = Column(SmallInteger, primary_key=True)  # 0..9 = risk_score // 10 (100 → 9)
+    tx_count = Column(BigInteger, nullable=False)
+    amount_sum = Column(Float, nullable=False)
+    risk_score_sum = Column(Float, nullable=False)
+    risk_score_max = Column(Float, nullable=False)
+
+
+class FraudLogUserDaily(Base):
+    """Per-user daily fraud_logs rollup (UTC days), maintained alongside FraudLogHourly."""
+    __tablename__ = "fraud_log_user_daily"
+
+    user_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    tx_count = Column(BigInteger, nullable=False)
+    approve_count = Column(BigInteger, nullable=False)
+    review_count = Column(BigInteger, nullable=False)
+    block_count = Column(BigInteger, nullable=False)
+    amount_sum = Column(Float, nullable=False)
+    amount_max = Column(Float, nullable=False)
+    risk_score_sum = Column(Float, nullable=False)
+    risk_score_max = Column(Float, nullable=False)
+    last_seen = Column(DateTime(timezone=True), nullable=False)
+
+
 class PortfolioLog(Base):
     """Persistent log of every portfolio recommendation."""
     __tablename__ = "portfolio_logs"
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Dict, List, Literal, Optional
+from datetime import date, datetime
+from typing import Annotated, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 from pydantic import field_validator
@@ -32,6 +32,70 @@ class FraudScoreResponse(BaseModel):
     risk_score: float = Field(..., ge=0, le=100)
     decision: Literal["APPROVE", "REVIEW", "BLOCK"]
     reasons: List[str] = Field(..., min_length=1)
+    model_version: Optional[str] = None  # set when the ML scorer contributed
+
+
+class ModelReloadRequest(BaseModel):
+    retrain: bool = Field(default=False, description="Retrain instead of reloading from the model store")
+    source: Literal["fraud_logs", "synthetic"] = Field(
+        default="fraud_logs",
+        description="Training data for retrain=true; falls back to synthetic if fraud_logs is too small",
+    )
+
+
+class ModelReloadResponse(BaseModel):
+    status: Literal["accepted", "in_progress"]
+    active_version: Optional[str]
+
+
+class RiskRulesReloadResponse(BaseModel):
+    version: str
+    source: str = Field(..., description="File name of the loaded rules file")
+
+
+class FraudScoreBatchRequest(BaseModel):
+    transactions: List[FraudScoreRequest] = Field(..., min_length=1, max_length=10_000)
+
+
+class FraudScoreBatchResponse(BaseModel):
+    results: List[FraudScoreResponse]
+    count: int
+
+
+# ─── Fraud Analytics (rollups) ────────────────────────────────────────────────
+
+class FraudHourlyBucket(BaseModel):
+    bucket_start: datetime
+    key: Optional[str] = None  # group_by value; None when not grouped
+    tx_count: int
+    amount_sum: float
+    avg_risk_score: float
+    max_risk_score: float
+
+
+class FraudHourlyResponse(BaseModel):
+    start: datetime
+    end: datetime
+    group_by: Optional[Literal["decision", "currency", "location", "risk_bucket"]]
+    buckets: List[FraudHourlyBucket]
+
+
+class FraudUserDay(BaseModel):
+    day: date
+    tx_count: int
+    approve_count: int
+    review_count: int
+    block_count: int
+    amount_sum: float
+    amount_max: float
+    avg_risk_score: float
+    max_risk_score: float
+    last_seen: datetime
+
+
+class FraudUserDailyResponse(BaseModel):
+    user_id: str
+    days: List[FraudUserDay]
 
 
 # ─── Portfolio ────────────────────────────────────────────────────────────────
@@ -180,6 +244,13 @@ class UserInsightsResponse(BaseModel):
 
 # ─── Market AI (price forecasting) ───────────────────────────────────────────
 
+CurveDay = Annotated[int, Field(ge=1, le=365)]
+
+
+def _validate_curve_days(value: Optional[List[int]]) -> Optional[List[int]]:
+    return sorted(set(value)) if value is not None else value
+
+
 class PriceForecastRequest(BaseModel):
     asset: str = Field(
         ...,
@@ -199,12 +270,33 @@ class PriceForecastRequest(BaseModel):
         description="Live price override in USD. Uses calibrated baseline if omitted.",
         example=2300.0,
     )
+    method: Optional[Literal["monte_carlo", "analytic"]] = Field(
+        default=None,
+        description="monte_carlo (500 simulated paths) or analytic (exact lognormal quantiles). "
+                    "Defaults to the FORECAST_METHOD setting.",
+        example="analytic",
+    )
+    curve_days: Optional[List[CurveDay]] = Field(
+        default=None,
+        max_length=365,
+        description="Also return median/p10/p90 at these days (1–365) from the same simulation",
+        example=[1, 7, 30, 90, 365],
+    )
+    full_curve: bool = Field(
+        default=False,
+        description="Also return median/p10/p90 for every day from 1 to horizon_days",
+    )
 
     @field_validator("asset")
     @classmethod
     def normalize_asset(cls, value: str) -> str:
         return value.lower().strip()
 
+    @field_validator("curve_days")
+    @classmethod
+    def validate_curve_days(cls, value: Optional[List[int]]) -> Optional[List[int]]:
+        return _validate_curve_days(value)
+
 
 class PriceForecastResponse(BaseModel):
     status: Literal["success"] = "success"
@@ -225,12 +317,33 @@ class BatchForecastRequest(BaseModel):
         le=365,
         example=30,
     )
+    method: Optional[Literal["monte_carlo", "analytic"]] = Field(
+        default=None,
+        description="monte_carlo (500 simulated paths) or analytic (exact lognormal quantiles). "
+                    "Defaults to the FORECAST_METHOD setting.",
+        example="analytic",
+    )
+    curve_days: Optional[List[CurveDay]] = Field(
+        default=None,
+        max_length=365,
+        description="Also return median/p10/p90 at these days (1–365) from the same simulation",
+        example=[1, 7, 30, 90, 365],
+    )
+    full_curve: bool = Field(
+        default=False,
+        description="Also return median/p10/p90 for every day from 1 to horizon_days",
+    )
 
     @field_validator("assets")
     @classmethod
     def normalize_assets(cls, value: List[str]) -> List[str]:
         return [v.lower().strip() for v in value]
 
+    @field_validator("curve_days")
+    @classmethod
+    def validate_curve_days(cls, value: Optional[List[int]]) -> Optional[List[int]]:
+        return _validate_curve_days(value)
+
 
 class BatchForecastResponse(BaseModel):
     status: Literal["success"] = "success"
@@ -0,0 +1,139 @@
+"""
+core_ai/batcher.py
+───────────────────
+In-process micro-batcher for /v1/fraud-score.
+
+Concurrent requests are queued on the event loop and coalesced into one
+compute_fraud_score_batch() call — a single worker-thread hop and, in ML
+mode, a single vectorised model pass — then each caller's future is
+resolved with its own response.
+
+A batch is flushed when FRAUD_BATCH_MAX_SIZE requests are waiting or
+FRAUD_BATCH_WINDOW_MS has elapsed since the first one arrived, whichever
+comes first. Collection of the next batch continues while earlier batches
+are still being scored.
+
+Velocity stays sequential: concurrent requests from the same user (or
+device) in one batch are scored in order, each seeing the ones before it,
+so batching does not weaken burst detection (see compute_fraud_score_batch).
+
+Enabled with FRAUD_MICRO_BATCHING=true; started and drained in the app
+lifespan.
+"""
+
+import asyncio
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.schemas.schemas import FraudScoreRequest, FraudScoreResponse
+from app.services.ai_modules.core_ai.service import compute_fraud_score_batch
+
+logger = get_logger(__name__)
+
+_Pending = tuple[FraudScoreRequest, Optional[str], asyncio.Future]
+
+
+class FraudScoreBatcher:
+    """Coalesces concurrent fraud-score requests into batched scoring calls."""
+
+    def __init__(self, max_batch_size: int, window_ms: float) -> None:
+        self._max_batch_size = max_batch_size
+        self._window_s = window_ms / 1_000.0
+        self._queue: Optional[asyncio.Queue[_Pending]] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._collector is not None and not self._collector.done()
+
+    def start(self) -> None:
+        """Start the collector task on the running event loop (idempotent)."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._collector = asyncio.create_task(self._collect(), name="fraud-score-batcher")
+        logger.info(
+            f"[BATCHER] STARTED | max_batch_size={self._max_batch_size} "
+            f"window_ms={self._window_s * 1_000:.1f}"
+        )
+
+    async def stop(self) -> None:
+        """Stop collecting, flush anything queued and wait for in-flight batches."""
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        self._collector = None
+
+        leftover: list[_Pending] = []
+        while self._queue is not None and not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        if leftover:
+            self._dispatch(leftover)
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        logger.info("[BATCHER] STOPPED")
+
+    async def submit(
+        self,
+        payload: FraudScoreRequest,
+        request_id: Optional[str] = None,
+    ) -> FraudScoreResponse:
+        """Queue one request and wait for its response."""
+        self.start()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payload, request_id, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._window_s
+            try:
+                while len(batch) < self._max_batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+            finally:
+                # Also runs on cancellation (stop()), so a half-collected batch is not lost.
+                self._dispatch(batch)
+
+    def _dispatch(self, batch: list[_Pending]) -> None:
+        task = asyncio.create_task(self._run(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run(self, batch: list[_Pending]) -> None:
+        payloads = [item[0] for item in batch]
+        request_ids = [item[1] for item in batch]
+        try:
+            results = await asyncio.to_thread(
+                compute_fraud_score_batch, payloads, None, request_ids
+            )
+        except Exception as e:
+            logger.exception(f"[BATCHER] BATCH FAILED | size={len(batch)}")
+            for _, _, future in batch:
+                if not future.done():  # caller may have timed out already
+                    future.set_exception(e)
+            return
+
+        logger.debug(f"[BATCHER] BATCH DONE | size={len(batch)}")
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+fraud_score_batcher = FraudScoreBatcher(
+    max_batch_size=settings.FRAUD_BATCH_MAX_SIZE,
+    window_ms=settings.FRAUD_BATCH_WINDOW_MS,
+)
@@ -6,68 +6,94 @@ Isolation Forest ML fraud scorer.
 Phase 2 ML implementation wired into compute_fraud_score_ml().
 
 Design:
-  - Trains an Isolation Forest on 5,000 synthetic normal transactions at startup.
-  - Feature vector: log-amount, cyclical hour encoding, weekend/night flags,
-    currency risk, location risk, device presence, velocity count (10 features).
-  - Lazy-initialised: model is built on first call, then cached.
-  - Thread-safe lazy init via double-checked locking.
-  - Inference is microseconds per call (sklearn IF predict is O(estimators * depth)).
-
-In production, replace _synthetic_training_data() with real historical
-transaction data and retrain periodically (e.g. via an MLflow pipeline).
+  - Trains an Isolation Forest on 5,000 synthetic normal transactions once and
+    persists it via model_store; later startups load the matching artifact.
+  - Feature vector: log-amount, cyclical hour encoding, weekend/night flags
+    (all in UTC, matching training on fraud_logs),
+    currency risk, location risk, device presence, velocity count, distinct
+    devices per user in 24h (11 features).
+  - Lazy-initialised: model is built on first call, then cached in ModelRegistry.
+  - Hot-swappable: ModelRegistry.reload_async() reloads or retrains in a
+    background thread and swaps the active scorer atomically. A reload only
+    runs in the worker that received it; every worker also watches the
+    model store and reloads when another one publishes a new artifact.
+  - Inference is microseconds per call: the fitted forest is packed into flat
+    NumPy node arrays (PackedIsolationForest) and walked for all trees at once.
+
+Synthetic data bootstraps the first model. Retraining on historical
+fraud_logs goes through training.build_training_matrix() and
+ModelRegistry.reload_async(retrain=True, ...).
 """
 
 import logging
 import math
 import threading
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Callable, Optional, Sequence
 
 import numpy as np
+import sklearn
 from sklearn.ensemble import IsolationForest
+from sklearn.ensemble._iforest import _average_path_length
 from sklearn.preprocessing import StandardScaler
 
-logger = logging.getLogger(__name__)
-
-MODEL_VERSION = "isolation_forest_v1"
-
-# ─── Risk Lookup Tables ───────────────────────────────────────────────────────
-
-_TRUSTED_CURRENCIES = frozenset(
-    {"EUR", "USD", "GBP", "CHF", "SGD", "JPY", "AUD", "CAD", "SEK", "NOK", "DKK"}
-)
+from app.core.config import settings
+from app.services.ai_modules.core_ai import model_store
+from app.services.risk_rules import get_rules
 
-_HIGH_RISK_LOCATIONS = frozenset(
-    {"KP", "IR", "SY", "CU", "SD", "MM", "RU", "AF", "YE", "LY", "VE"}
-)
+logger = logging.getLogger(__name__)
 
-_LOW_RISK_LOCATIONS = frozenset(
-    {
-        "DE", "FR", "GB", "NL", "CH", "US", "CA", "AU", "JP",
-        "SE", "NO", "DK", "AT", "FI", "BE", "IE", "NZ", "SG",
-        "PT", "ES", "IT", "LU", "EE", "LT", "LV",
-    }
-)
+MODEL_VERSION = "isolation_forest_v2"
 
+# ─── Risk Lookups ─────────────────────────────────────────────────────────────
+# Trusted currencies and high/low-risk locations come from the shared risk
+# rules (ml_trusted / ml_high_risk / ml_low_risk in risk_rules.json).
 
 def _currency_risk(currency: str) -> float:
-    return 0.0 if currency.upper() in _TRUSTED_CURRENCIES else 0.7
+    return 0.0 if currency.upper() in get_rules().ml_trusted_currencies else 0.7
 
 
 def _location_risk(location: Optional[str]) -> float:
     if location is None:
         return 0.75
-    loc = location.upper()
-    if loc in _HIGH_RISK_LOCATIONS:
-        return 1.0
-    if loc in _LOW_RISK_LOCATIONS:
-        return 0.0
-    return 0.35
+    return get_rules().ml_location_risk.get(location)
 
 
 # ─── Feature Engineering ──────────────────────────────────────────────────────
 
-_N_FEATURES = 10
+_N_FEATURES = 11
+
+# Column names of the feature vector, in order. Part of the persisted model
+# artifact's identity — changing it invalidates stored artifacts.
+FEATURE_SCHEMA: tuple[str, ...] = (
+    "log_amount",
+    "hour_sin",
+    "hour_cos",
+    "is_weekend",
+    "is_night",
+    "currency_risk",
+    "location_risk",
+    "has_device",
+    "amount_k",
+    "velocity_1h",
+    "distinct_devices_24h",
+)
+
+_TRAINING_PARAMS: dict = {
+    "n_samples": 5_000,
+    "n_estimators": 200,
+    "contamination": 0.04,
+    "random_state": 42,
+}
+
+
+def _utc(ts: datetime) -> datetime:
+    """
+    ``ts`` in UTC (naive = already UTC). Hour/weekday features are taken in
+    UTC, as training derives them from the stored timestamptz, so a client
+    offset never changes the features.
+    """
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
 
 
 def _build_features(
@@ -78,9 +104,10 @@ def _build_features(
     weekday: int,
     has_device: bool,
     count_1h: int,
+    distinct_devices_24h: int = 0,
 ) -> np.ndarray:
     """
-    Construct a 10-dimensional feature vector from transaction properties.
+    Construct an 11-dimensional feature vector from transaction properties.
 
     Features:
       [0] log1p(amount)           — log-scaled amount (reduces skew)
@@ -93,6 +120,7 @@ def _build_features(
       [7] has_device (0/1)
       [8] amount_k (capped at 20) — amount in thousands
       [9] velocity_1h (capped)    — normalised transaction count in last hour
+      [10] distinct_devices_24h (capped) — normalised distinct devices in last 24 h
     """
     return np.array(
         [
@@ -106,11 +134,45 @@ def _build_features(
             float(has_device),
             min(amount / 1_000.0, 20.0),
             min(float(count_1h) / 10.0, 5.0),
+            min(float(distinct_devices_24h) / 5.0, 5.0),
         ],
         dtype=np.float64,
     )
 
 
+def _feature_matrix(
+    amounts: np.ndarray,
+    hours: np.ndarray,
+    weekdays: np.ndarray,
+    currency_risks: np.ndarray,
+    location_risks: np.ndarray,
+    has_device: np.ndarray,
+    count_1h: np.ndarray,
+    distinct_devices_24h: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorised counterpart of _build_features() — one row per transaction.
+
+    Column order and transforms are identical to _build_features(), so rows
+    produced here can be scored by the same fitted scaler and model.
+    """
+    return np.column_stack(
+        [
+            np.log1p(amounts),
+            np.sin(2 * np.pi * hours / 24),
+            np.cos(2 * np.pi * hours / 24),
+            (weekdays >= 5).astype(float),
+            ((hours < 6) | (hours >= 22)).astype(float),
+            currency_risks,
+            location_risks,
+            has_device,
+            np.minimum(amounts / 1_000.0, 20.0),
+            np.minimum(count_1h / 10.0, 5.0),
+            np.minimum(distinct_devices_24h / 5.0, 5.0),
+        ]
+    )
+
+
 # ─── Synthetic Training Data ──────────────────────────────────────────────────
 
 def _synthetic_training_data(n: int = 5_000, seed: int = 42) -> np.ndarray:
@@ -124,6 +186,7 @@ def _synthetic_training_data(n: int = 5_000, seed: int = 42) -> np.ndarray:
       - Locations: 82% low-risk
       - Device presence: 90%
       - Velocity: 0–3 in last hour (normal burst)
+      - Distinct devices in last 24 h: mostly 0–1, occasionally 2–3
     """
     rng = np.random.default_rng(seed)
 
@@ -155,23 +218,168 @@ def _synthetic_training_data(n: int = 5_000, seed: int = 42) -> np.ndarray:
     )
     has_device = rng.choice([1.0, 0.0], size=n, p=[0.90, 0.10])
     count_1h = rng.integers(0, 4, size=n).astype(float)
-
-    return np.column_stack(
-        [
-            np.log1p(amounts),
-            np.sin(2 * np.pi * hours / 24),
-            np.cos(2 * np.pi * hours / 24),
-            (weekdays >= 5).astype(float),
-            ((hours < 6) | (hours >= 22)).astype(float),
-            currency_risks,
-            location_risks,
-            has_device,
-            np.minimum(amounts / 1_000.0, 20.0),
-            np.minimum(count_1h / 10.0, 5.0),
-        ]
+    distinct_devices_24h = rng.choice([0.0, 1.0, 2.0, 3.0], size=n, p=[0.35, 0.45, 0.15, 0.05])
+
+    return _feature_matrix(
+        amounts=amounts,
+        hours=hours,
+        weekdays=weekdays,
+        currency_risks=currency_risks,
+        location_risks=location_risks,
+        has_device=has_device,
+        count_1h=count_1h,
+        distinct_devices_24h=distinct_devices_24h,
     )
 
 
+# ─── Compiled Tree-Ensemble Evaluator ─────────────────────────────────────────
+
+class PackedIsolationForest:
+    """
+    Flat-array evaluator for a fitted IsolationForest.
+
+    All trees are packed into shared node arrays (feature, threshold, left,
+    right, path-length adjustment) with global node indices. Leaves point to
+    themselves, so every tree can be walked in lock-step for a fixed number of
+    levels (the forest's max depth — 8 for max_samples=256) with a handful of
+    NumPy gathers, instead of sklearn's per-estimator Python loop + joblib
+    dispatch + input validation.
+
+    The arithmetic mirrors sklearn's _compute_score_samples step for step
+    (float32 inputs, per-tree ``depth + c(n_leaf) - 1`` accumulated in tree
+    order), so decision_function() is bit-identical to
+    IsolationForest.decision_function().
+    """
+
+    # Rows per evaluation chunk — bounds the (rows × trees) index matrices.
+    _CHUNK_ROWS = 4_096
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        adjustment: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        denominator: float,
+        offset: float,
+    ) -> None:
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.adjustment = adjustment
+        self.roots = roots
+        self.max_depth = max_depth
+        self.denominator = denominator
+        self.offset = offset
+
+    @classmethod
+    def from_model(cls, model: IsolationForest) -> "PackedIsolationForest":
+        """Flatten model.estimators_ into packed node arrays."""
+        n_features = model.n_features_in_
+        features_, thresholds, lefts, rights, adjustments, roots = [], [], [], [], [], []
+        max_depth = 0
+        base = 0
+        for estimator, est_features in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count, dtype=np.intp)
+            depths = tree.compute_node_depths()
+
+            # Map subsampled feature positions back to full feature-matrix columns.
+            column_map = (
+                np.asarray(est_features, dtype=np.intp)
+                if len(est_features) != n_features
+                else np.arange(n_features, dtype=np.intp)
+            )
+            features_.append(np.where(is_leaf, 0, column_map[np.maximum(tree.feature, 0)]))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + base)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + base)
+            adjustments.append(depths + _average_path_length(tree.n_node_samples) - 1.0)
+            roots.append(base)
+
+            max_depth = max(max_depth, int(depths.max()))
+            base += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features_).astype(np.intp),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            adjustment=np.concatenate(adjustments),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            denominator=float(
+                len(model.estimators_) * _average_path_length([model.max_samples_])[0]
+            ),
+            offset=float(model.offset_),
+        )
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Flat name → array mapping, suitable for a shared model segment."""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "adjustment": self.adjustment,
+            "roots": self.roots,
+            "max_depth": np.asarray(self.max_depth, dtype=np.int64),
+            "denominator": np.asarray(self.denominator, dtype=np.float64),
+            "offset": np.asarray(self.offset, dtype=np.float64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "PackedIsolationForest":
+        """Inverse of to_arrays(); node arrays are used as-is (no copy)."""
+        return cls(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            left=arrays["left"],
+            right=arrays["right"],
+            adjustment=arrays["adjustment"],
+            roots=arrays["roots"],
+            max_depth=int(arrays["max_depth"]),
+            denominator=float(arrays["denominator"]),
+            offset=float(arrays["offset"]),
+        )
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """
+        Score float32 rows; identical to IsolationForest.decision_function().
+        """
+        n_rows = X.shape[0]
+        if n_rows <= self._CHUNK_ROWS:
+            return self._decision_chunk(X)
+        out = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, self._CHUNK_ROWS):
+            stop = start + self._CHUNK_ROWS
+            out[start:stop] = self._decision_chunk(X[start:stop])
+        return out
+
+    def _decision_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        flat = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        nodes = np.repeat(self.roots[None, :], n_rows, axis=0)
+        for _ in range(self.max_depth):
+            values = flat.take(row_offsets + self.feature.take(nodes))
+            go_left = values <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+
+        # cumsum accumulates in tree order, matching sklearn's `depths +=` loop.
+        depths = np.cumsum(self.adjustment.take(nodes), axis=1)[:, -1]
+        if self.denominator == 0:
+            scores = np.ones_like(depths)
+        else:
+            scores = 2 ** (-(depths / self.denominator))
+        return -scores - self.offset
+
+
 # ─── Scorer Class ─────────────────────────────────────────────────────────────
 
 class IsolationFraudScorer:
@@ -180,25 +388,106 @@ class IsolationFraudScorer:
 
     contamination=0.04: model expects ~4% of real traffic to be anomalous.
     n_estimators=200: more trees → stabler anomaly scores at the cost of
-    slightly higher memory. Still <10 MB for 200 trees on 10 features.
+    slightly higher memory. Still <10 MB for 200 trees on 11 features.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        engine: Optional[PackedIsolationForest] = None,
+        model: Optional[IsolationForest] = None,
+        scaler: Optional[StandardScaler] = None,
+        version: str = MODEL_VERSION,
+    ) -> None:
+        if engine is None and model is None:
+            raise ValueError("IsolationFraudScorer needs a packed engine or a fitted model.")
+        self.version = version
+        self._scaler = scaler
+        self._model = model
+        self._engine = engine
+
+        # Pre-validated parameters for the fused inference path (_decision_function).
+        self._mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self._scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self._local = threading.local()
+        logger.info(f"[ML-SCORER] Ready. version={self.version}")
+
+    @classmethod
+    def from_fitted(
+        cls,
+        scaler: StandardScaler,
+        model: IsolationForest,
+        version: str = MODEL_VERSION,
+    ) -> "IsolationFraudScorer":
+        """Wrap a fitted scaler + forest, packing the forest when ML_COMPILED_ENGINE is on."""
+        engine = PackedIsolationForest.from_model(model) if settings.ML_COMPILED_ENGINE else None
+        return cls(
+            scaler.mean_, scaler.scale_, engine=engine, model=model, scaler=scaler, version=version
+        )
+
+    @classmethod
+    def train(
+        cls,
+        X: Optional[np.ndarray] = None,
+        version: str = MODEL_VERSION,
+    ) -> "IsolationFraudScorer":
+        """Fit scaler + forest on X (synthetic training data when omitted)."""
+        if X is None:
+            X = _synthetic_training_data(n=_TRAINING_PARAMS["n_samples"])
         logger.info(
             f"[ML-SCORER] Training Isolation Forest "
-            f"(n_samples=5000, n_estimators=200, version={MODEL_VERSION})..."
+            f"(n_samples={len(X)}, n_estimators={_TRAINING_PARAMS['n_estimators']}, "
+            f"version={version})..."
         )
-        X = _synthetic_training_data(n=5_000)
-        self._scaler = StandardScaler().fit(X)
-        X_scaled = self._scaler.transform(X)
-        self._model = IsolationForest(
-            n_estimators=200,
-            contamination=0.04,
-            random_state=42,
+        scaler = StandardScaler().fit(X)
+        model = IsolationForest(
+            n_estimators=_TRAINING_PARAMS["n_estimators"],
+            contamination=_TRAINING_PARAMS["contamination"],
+            random_state=_TRAINING_PARAMS["random_state"],
             n_jobs=-1,
         )
-        self._model.fit(X_scaled)
-        logger.info(f"[ML-SCORER] Ready. version={MODEL_VERSION}")
+        model.fit(scaler.transform(X))
+        return cls.from_fitted(scaler, model, version=version)
+
+    @classmethod
+    def from_artifact(cls, artifact: dict) -> "IsolationFraudScorer":
+        """Rebuild a scorer from a model_store artifact."""
+        return cls.from_fitted(
+            artifact["scaler"], artifact["model"], version=artifact.get("version", MODEL_VERSION)
+        )
+
+    def to_artifact(self) -> dict:
+        """Serialisable payload for model_store.save_artifact()."""
+        if self._model is None or self._scaler is None:
+            raise ValueError("Scorer was attached from a shared segment and has no fitted model.")
+        return {"scaler": self._scaler, "model": self._model, "version": self.version}
+
+    @classmethod
+    def from_segment(cls, arrays: dict[str, np.ndarray]) -> "IsolationFraudScorer":
+        """
+        Attach to a shared model segment (see model_store.attach_segment()).
+
+        Only the packed forest and scaler parameters are needed for inference,
+        and they stay views into the read-only mapping, so every worker
+        process shares the same physical pages.
+        """
+        return cls(
+            arrays["scaler_mean"],
+            arrays["scaler_scale"],
+            engine=PackedIsolationForest.from_arrays(arrays),
+            version=bytes(arrays["version"]).decode() if "version" in arrays else MODEL_VERSION,
+        )
+
+    def to_segment(self) -> dict[str, np.ndarray]:
+        """Arrays for model_store.save_segment(): packed forest + scaler parameters."""
+        engine = self._engine or PackedIsolationForest.from_model(self._model)
+        return {
+            **engine.to_arrays(),
+            "scaler_mean": self._mean,
+            "scaler_scale": self._scale,
+            "version": np.frombuffer(self.version.encode(), dtype=np.uint8),
+        }
 
     def score(
         self,
@@ -208,6 +497,7 @@ class IsolationFraudScorer:
         timestamp: datetime,
         device_id: Optional[str],
         count_1h: int = 0,
+        distinct_devices_24h: int = 0,
     ) -> dict:
         """
         Score a single transaction.
@@ -218,6 +508,7 @@ class IsolationFraudScorer:
             model_version  — str
             signals        — dict of per-feature interpretable values
         """
+        timestamp = _utc(timestamp)
         features = _build_features(
             amount=amount,
             currency=currency,
@@ -226,11 +517,97 @@ class IsolationFraudScorer:
             weekday=timestamp.weekday(),
             has_device=device_id is not None,
             count_1h=count_1h,
+            distinct_devices_24h=distinct_devices_24h,
         )
-        X = self._scaler.transform(features.reshape(1, -1))
-        raw = float(self._model.decision_function(X)[0])
-        is_anomaly = bool(self._model.predict(X)[0] == -1)
+        raw = float(self._decision_function(features.reshape(1, -1))[0])
+
+        # IsolationForest.predict() is exactly ``decision_function < 0``.
+        return self._result(raw, raw < 0, features, count_1h)
+
+    def score_batch(
+        self,
+        amounts: Sequence[float],
+        currencies: Sequence[str],
+        locations: Sequence[Optional[str]],
+        timestamps: Sequence[datetime],
+        device_ids: Sequence[Optional[str]],
+        counts_1h: Sequence[int],
+        distinct_devices_24h: Optional[Sequence[int]] = None,
+    ) -> list[dict]:
+        """
+        Score many transactions with a single model call.
 
+        All sequences are positional and must have the same length. The whole
+        feature matrix is built with NumPy and passed through the scaler and
+        decision_function once; is_anomaly is derived from the same raw
+        scores (IsolationForest.predict is ``decision_function < 0``), so the
+        forest is walked once per batch instead of twice per row.
+
+        Returns one dict per transaction, in input order, with the same shape
+        as score(). ``distinct_devices_24h`` defaults to zero for every row.
+        """
+        n = len(amounts)
+        if n == 0:
+            return []
+
+        amount_arr = np.asarray(amounts, dtype=np.float64)
+        count_arr = np.asarray(counts_1h, dtype=np.float64)
+        timestamps = [_utc(ts) for ts in timestamps]
+        features = _feature_matrix(
+            amounts=amount_arr,
+            hours=np.fromiter((ts.hour for ts in timestamps), dtype=np.float64, count=n),
+            weekdays=np.fromiter((ts.weekday() for ts in timestamps), dtype=np.float64, count=n),
+            currency_risks=np.fromiter(
+                (_currency_risk(c) for c in currencies), dtype=np.float64, count=n
+            ),
+            location_risks=np.fromiter(
+                (_location_risk(loc) for loc in locations), dtype=np.float64, count=n
+            ),
+            has_device=np.fromiter(
+                (d is not None for d in device_ids), dtype=np.float64, count=n
+            ),
+            count_1h=count_arr,
+            distinct_devices_24h=(
+                np.zeros(n) if distinct_devices_24h is None
+                else np.asarray(distinct_devices_24h, dtype=np.float64)
+            ),
+        )
+        raw = self._decision_function(features)
+        is_anomaly = raw < 0
+
+        return [
+            self._result(float(raw[i]), bool(is_anomaly[i]), features[i], int(counts_1h[i]))
+            for i in range(n)
+        ]
+
+    def _decision_function(self, features: np.ndarray) -> np.ndarray:
+        """
+        Fused scaler + IsolationForest.decision_function() in a single pass.
+
+        Equivalent to ``self._model.decision_function(self._scaler.transform(X))``
+        but skips the scaler's validation and float64 temporaries: the scaled
+        rows are written straight into a C-contiguous float32 buffer (the dtype
+        sklearn trees are evaluated in) and handed to the PackedIsolationForest
+        engine, or with ML_COMPILED_ENGINE off to the forest's public
+        decision_function (no private sklearn API, so upgrades cannot break
+        scoring at request time). Single-row calls reuse a per-thread buffer.
+        """
+        X = self._buffer(features.shape[0])
+        np.divide(features - self._mean, self._scale, out=X, casting="same_kind")
+        if self._engine is not None:
+            return self._engine.decision_function(X)
+        return self._model.decision_function(X)
+
+    def _buffer(self, n_rows: int) -> np.ndarray:
+        if n_rows != 1:
+            return np.empty((n_rows, _N_FEATURES), dtype=np.float32)
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = self._local.row = np.empty((1, _N_FEATURES), dtype=np.float32)
+        return buf
+
+    def _result(self, raw: float, is_anomaly: bool, features: np.ndarray, count_1h: int) -> dict:
+        """Map a raw decision_function value and its feature row to the result dict."""
         # decision_function: higher (more positive) = more normal.
         # Calibrated mapping to 0–100 anomaly score:
         #   raw ≈  0.10 → score ≈   0   (typical normal transaction)
@@ -242,7 +619,7 @@ class IsolationFraudScorer:
         return {
             "anomaly_score": round(anomaly_score, 2),
             "is_anomaly": is_anomaly,
-            "model_version": MODEL_VERSION,
+            "model_version": self.version,
             "signals": {
                 "log_amount": round(float(features[0]), 3),
                 "is_night": bool(features[4] > 0.5),
@@ -250,24 +627,254 @@ class IsolationFraudScorer:
                 "location_risk": round(float(features[6]), 2),
                 "has_device": bool(features[7] > 0.5),
                 "velocity_1h": int(count_1h),
+                "distinct_devices_24h": round(float(features[10]) * 5.0),
             },
         }
 
 
-# ─── Lazy singleton ───────────────────────────────────────────────────────────
+# ─── Model Registry ───────────────────────────────────────────────────────────
+
+class ModelRegistry:
+    """
+    Holds the active IsolationFraudScorer and hot-swaps it without blocking.
+
+    - get() returns the active scorer, loading it lazily on first use
+      (double-checked locking, as before).
+    - reload_async() builds a replacement in a background thread — either
+      re-reading the model store or retraining — and swaps it in with a
+      single reference assignment. Callers that already hold the old scorer
+      (in-flight compute_fraud_score_ml calls) finish on it; new calls get
+      the new one. Only one reload runs at a time.
+    - reload_async() only affects the calling process. start_watcher() polls
+      the model store (artifact and segment file stamps) every
+      ML_MODEL_WATCH_SECS and reloads when they change, so a retrain
+      published by any worker reaches every worker on the node.
+    """
+
+    def __init__(self) -> None:
+        self._active: Optional[IsolationFraudScorer] = None
+        self._lock = threading.Lock()
+        self._reloading = False
+        # Model store stamp the active scorer was loaded from (see _store_stamp)
+        self._stamp: Optional[tuple] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+
+    def get(self) -> IsolationFraudScorer:
+        scorer = self._active
+        if scorer is None:
+            with self._lock:
+                if self._active is None:  # double-checked locking
+                    self._active = load_or_train_scorer()
+                    self._stamp = _store_stamp()
+                scorer = self._active
+        return scorer
+
+    @property
+    def active_version(self) -> Optional[str]:
+        """Version of the active scorer, or None if none has been loaded yet."""
+        scorer = self._active
+        return scorer.version if scorer is not None else None
+
+    @property
+    def reloading(self) -> bool:
+        return self._reloading
+
+    def swap(self, scorer: IsolationFraudScorer) -> None:
+        """Atomically make ``scorer`` the active model."""
+        previous = self.active_version
+        self._active = scorer
+        logger.info(f"[ML-SCORER] SWAPPED | previous={previous} active={scorer.version}")
+
+    def reload_async(
+        self,
+        retrain: bool = False,
+        training_data: Optional[Callable[[], Optional[np.ndarray]]] = None,
+    ) -> bool:
+        """
+        Start a background reload (or retrain when ``retrain`` is True).
+
+        ``training_data`` optionally supplies the feature matrix for a retrain
+        (e.g. training.build_training_matrix); it runs in the background
+        thread too. When it returns None, synthetic data is used instead.
+
+        Returns False without doing anything if a reload is already running.
+        """
+        with self._lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+        threading.Thread(
+            target=self._reload,
+            args=(retrain, training_data),
+            name="fraud-model-reload",
+            daemon=True,
+        ).start()
+        return True
+
+    def _reload(
+        self,
+        retrain: bool,
+        training_data: Optional[Callable[[], Optional[np.ndarray]]],
+    ) -> None:
+        try:
+            if retrain:
+                X = training_data() if training_data is not None else None
+                scorer = retrain_scorer(X)
+            else:
+                scorer = load_or_train_scorer()
+            # Includes this worker's own publish, so the watcher does not reload it again
+            stamp = _store_stamp()
+            self.swap(scorer)
+            self._stamp = stamp
+        except Exception:
+            logger.exception(f"[ML-SCORER] RELOAD FAILED | retrain={retrain}")
+        finally:
+            self._reloading = False
+
+    def check_store(self) -> bool:
+        """
+        Start a reload if the model store changed since the active scorer was
+        loaded. Returns True when a reload was started.
+        """
+        if self._active is None or self._reloading:
+            return False  # not loaded yet: get() reads the current store anyway
+        stamp = _store_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        logger.info(f"[ML-SCORER] STORE CHANGED | active={self.active_version}")
+        return self.reload_async()
+
+    def start_watcher(self, interval_secs: Optional[float] = None) -> None:
+        """Run check_store() every ``interval_secs`` on a daemon thread (idempotent)."""
+        interval = settings.ML_MODEL_WATCH_SECS if interval_secs is None else interval_secs
+        if interval <= 0 or not settings.ML_MODEL_PERSIST:
+            return
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval,), name="fraud-model-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._watcher_stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch_loop(self, interval: float) -> None:
+        while not self._watcher_stop.wait(interval):
+            try:
+                self.check_store()
+            except Exception as e:
+                logger.warning(f"[ML-SCORER] WATCH FAILED | error={e}")
 
-_scorer: Optional[IsolationFraudScorer] = None
-_scorer_lock = threading.Lock()
+
+model_registry = ModelRegistry()
 
 
 def get_ml_scorer() -> IsolationFraudScorer:
-    """Return the module-level scorer, initialising it on the first call."""
-    global _scorer
-    if _scorer is None:
-        with _scorer_lock:
-            if _scorer is None:  # double-checked locking
-                _scorer = IsolationFraudScorer()
-    return _scorer
+    """Return the active scorer from the registry, loading it on the first call."""
+    return model_registry.get()
+
+
+def _artifact_metadata() -> dict:
+    return {
+        "model_version": MODEL_VERSION,
+        "feature_schema": list(FEATURE_SCHEMA),
+        "training_params": _TRAINING_PARAMS,
+        "sklearn_version": sklearn.__version__,
+    }
+
+
+def _store_stamp() -> Optional[tuple]:
+    """
+    (mtime_ns, inode, size) of the current artifact and shared segment, or
+    None without a persisted artifact. Publishing goes through os.replace(),
+    so every save changes the stamp.
+    """
+    if not settings.ML_MODEL_PERSIST:
+        return None
+    path = model_store.artifact_path(settings.ML_MODEL_DIR, MODEL_VERSION, _artifact_metadata())
+    stamp = []
+    for file in (path, path.with_suffix(model_store.SEGMENT_SUFFIX)):
+        try:
+            st = file.stat()
+        except OSError:
+            stamp.append(None)
+            continue
+        stamp.append((st.st_mtime_ns, st.st_ino, st.st_size))
+    return tuple(stamp) if stamp[0] is not None else None
+
+
+def load_or_train_scorer() -> IsolationFraudScorer:
+    """
+    Load the persisted artifact for the current MODEL_VERSION / feature schema,
+    training and saving it only when no matching artifact exists.
+
+    With ML_SHARED_MODEL enabled, the packed forest and scaler parameters are
+    additionally written once to a read-only segment next to the artifact and
+    every worker attaches to it via mmap, so model RSS stays flat regardless
+    of worker count.
+
+    With ML_MODEL_PERSIST disabled, always trains in-process (previous behaviour).
+    """
+    if not settings.ML_MODEL_PERSIST:
+        return IsolationFraudScorer.train()
+
+    metadata = _artifact_metadata()
+    path = model_store.artifact_path(settings.ML_MODEL_DIR, MODEL_VERSION, metadata)
+    segment_path = path.with_suffix(model_store.SEGMENT_SUFFIX)
+    with model_store.artifact_lock(path):
+        if settings.ML_SHARED_MODEL:
+            arrays = model_store.attach_segment(segment_path, metadata)
+            if arrays is not None:
+                return IsolationFraudScorer.from_segment(arrays)
+
+        artifact = model_store.load_artifact(path, metadata)
+        if artifact is not None:
+            scorer = IsolationFraudScorer.from_artifact(artifact)
+        else:
+            scorer = IsolationFraudScorer.train()
+            model_store.save_artifact(path, scorer.to_artifact(), metadata)
+
+        if settings.ML_SHARED_MODEL and model_store.save_segment(
+            segment_path, scorer.to_segment(), metadata
+        ):
+            arrays = model_store.attach_segment(segment_path, metadata)
+            if arrays is not None:
+                # Drop the private copy so this worker also serves from the segment.
+                return IsolationFraudScorer.from_segment(arrays)
+    return scorer
+
+
+def retrain_scorer(X: Optional[np.ndarray] = None) -> IsolationFraudScorer:
+    """
+    Train a fresh scorer and publish it to the model store.
+
+    The new scorer gets a timestamped version (``<MODEL_VERSION>-<UTC time>``)
+    and replaces the stored artifact (and shared segment) for the current
+    schema. Workers that start later load it; running workers on the same
+    model store pick it up through ModelRegistry's watcher within
+    ML_MODEL_WATCH_SECS.
+    """
+    version = f"{MODEL_VERSION}-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}"
+    scorer = IsolationFraudScorer.train(X, version=version)
+    if settings.ML_MODEL_PERSIST:
+        metadata = _artifact_metadata()
+        path = model_store.artifact_path(settings.ML_MODEL_DIR, MODEL_VERSION, metadata)
+        with model_store.artifact_lock(path):
+            model_store.save_artifact(path, scorer.to_artifact(), metadata)
+            segment_path = path.with_suffix(model_store.SEGMENT_SUFFIX)
+            if settings.ML_SHARED_MODEL and model_store.save_segment(
+                segment_path, scorer.to_segment(), metadata
+            ):
+                arrays = model_store.attach_segment(segment_path, metadata)
+                if arrays is not None:
+                    return IsolationFraudScorer.from_segment(arrays)
+    return scorer
 
 
 def warmup() -> None:
@@ -0,0 +1,227 @@
+"""
+model_store.py
+───────────────
+Versioned on-disk store for trained fraud model artifacts.
+
+Design:
+  - One file per artifact key: ``<MODEL_VERSION>-<digest>.joblib`` where the
+    digest covers the feature schema, training parameters and the
+    scikit-learn version. Any change to those produces a new file name, so a
+    stale artifact is never loaded into a scorer it does not match.
+  - Artifacts are plain dicts serialised with joblib (already a scikit-learn
+    dependency). Loading uses mmap_mode="r" so large NumPy arrays are paged
+    in from the OS cache instead of copied.
+  - Writes go to a temporary file in the same directory and are published
+    with os.replace(), so readers never see a half-written artifact.
+  - An advisory file lock serialises training across worker processes on the
+    same node: the first worker trains and saves, the rest wait and load.
+    On platforms without fcntl the lock is a no-op (atomic replace still
+    keeps the store consistent; workers may just train redundantly).
+  - Shared segments (``.segment``) hold only the flat NumPy arrays needed for
+    inference in one file: a JSON header followed by 64-byte-aligned raw
+    array data. attach_segment() maps the file read-only and returns views,
+    so all workers on a node share one copy of the pages in the OS cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import joblib
+import numpy as np
+
+try:  # POSIX only — Windows dev machines fall back to lock-free behaviour
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SUFFIX = ".joblib"
+SEGMENT_SUFFIX = ".segment"
+
+_SEGMENT_MAGIC = b"AURIXSEG"
+_SEGMENT_ALIGN = 64
+
+
+def artifact_digest(metadata: dict[str, Any]) -> str:
+    """Stable short digest of the metadata an artifact must match."""
+    encoded = json.dumps(metadata, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+def artifact_path(model_dir: str, model_version: str, metadata: dict[str, Any]) -> Path:
+    """Return the artifact file path for the given version and metadata."""
+    return Path(model_dir) / f"{model_version}-{artifact_digest(metadata)}{ARTIFACT_SUFFIX}"
+
+
+@contextmanager
+def artifact_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock for ``path`` across processes.
+
+    Degrades to no locking when fcntl is unavailable or the model directory
+    is not writable (e.g. a read-only image with pre-built artifacts).
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(path.with_suffix(path.suffix + ".lock"), "a+b")
+    except OSError as e:
+        logger.warning(f"[MODEL-STORE] LOCK UNAVAILABLE | path={path} error={e}")
+        lock_file = None
+    if fcntl is None or lock_file is None:
+        try:
+            yield
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+        return
+    with lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def load_artifact(path: Path, metadata: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """
+    Load the artifact at ``path`` if it exists and its metadata matches.
+
+    Returns None when the file is missing, unreadable or was written for a
+    different schema — the caller is expected to retrain in that case.
+    """
+    if not path.exists():
+        return None
+    try:
+        artifact = joblib.load(path, mmap_mode="r")
+    except Exception as e:
+        logger.warning(f"[MODEL-STORE] LOAD FAILED | path={path} error={e}")
+        return None
+
+    if not isinstance(artifact, dict) or artifact.get("metadata") != metadata:
+        logger.warning(f"[MODEL-STORE] METADATA MISMATCH | path={path}")
+        return None
+
+    logger.info(f"[MODEL-STORE] LOADED | path={path}")
+    return artifact
+
+
+def save_artifact(path: Path, artifact: dict[str, Any], metadata: dict[str, Any]) -> bool:
+    """
+    Atomically write ``artifact`` (plus its metadata) to ``path``.
+
+    Returns False instead of raising when the store is not writable, so a
+    read-only filesystem degrades to train-at-startup rather than a crash.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=ARTIFACT_SUFFIX + ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                joblib.dump({**artifact, "metadata": metadata}, tmp_file)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    except Exception as e:
+        logger.warning(f"[MODEL-STORE] SAVE FAILED | path={path} error={e}")
+        return False
+
+    logger.info(f"[MODEL-STORE] SAVED | path={path}")
+    return True
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _SEGMENT_ALIGN) * _SEGMENT_ALIGN
+
+
+def save_segment(
+    path: Path,
+    arrays: dict[str, np.ndarray],
+    metadata: dict[str, Any],
+) -> bool:
+    """
+    Atomically write ``arrays`` as a single shared model segment.
+
+    Layout: magic (8 bytes) · header length (uint64, little-endian) · JSON
+    header {metadata, arrays: {name: {dtype, shape, offset}}} · array data,
+    each array starting on a 64-byte boundary.
+    """
+    contiguous = {name: np.asarray(arr, order="C") for name, arr in arrays.items()}
+    layout: dict[str, dict[str, Any]] = {}
+    offset = 0
+    for name, arr in contiguous.items():
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset = _align(offset + arr.nbytes)
+
+    header = json.dumps({"metadata": metadata, "arrays": layout}, default=str).encode()
+    data_start = _align(len(_SEGMENT_MAGIC) + 8 + len(header))
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=SEGMENT_SUFFIX + ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(_SEGMENT_MAGIC)
+                tmp_file.write(len(header).to_bytes(8, "little"))
+                tmp_file.write(header)
+                for name, arr in contiguous.items():
+                    tmp_file.seek(data_start + layout[name]["offset"])
+                    tmp_file.write(arr.tobytes())
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    except Exception as e:
+        logger.warning(f"[MODEL-STORE] SEGMENT SAVE FAILED | path={path} error={e}")
+        return False
+
+    logger.info(f"[MODEL-STORE] SEGMENT SAVED | path={path} bytes={data_start + offset}")
+    return True
+
+
+def attach_segment(path: Path, metadata: dict[str, Any]) -> Optional[dict[str, np.ndarray]]:
+    """
+    Map a shared model segment read-only and return name → array views.
+
+    Returns None when the segment is missing, malformed or was written for
+    different metadata.
+    """
+    if not path.exists():
+        return None
+    try:
+        mapped = np.memmap(path, dtype=np.uint8, mode="r")
+        prefix = len(_SEGMENT_MAGIC)
+        if bytes(mapped[:prefix]) != _SEGMENT_MAGIC:
+            raise ValueError("bad segment magic")
+        header_len = int.from_bytes(bytes(mapped[prefix:prefix + 8]), "little")
+        header = json.loads(bytes(mapped[prefix + 8:prefix + 8 + header_len]))
+    except Exception as e:
+        logger.warning(f"[MODEL-STORE] SEGMENT ATTACH FAILED | path={path} error={e}")
+        return None
+
+    # Round-trip through JSON so tuples/defaults compare like the stored header.
+    if header.get("metadata") != json.loads(json.dumps(metadata, default=str)):
+        logger.warning(f"[MODEL-STORE] SEGMENT METADATA MISMATCH | path={path}")
+        return None
+
+    data_start = _align(prefix + 8 + header_len)
+    arrays: dict[str, np.ndarray] = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        start = data_start + spec["offset"]
+        nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        # np.asarray drops the memmap subclass (cheaper ufunc dispatch) but keeps the mapping.
+        arrays[name] = np.asarray(mapped[start:start + nbytes]).view(dtype).reshape(shape)
+
+    logger.info(f"[MODEL-STORE] SEGMENT ATTACHED | path={path}")
+    return arrays
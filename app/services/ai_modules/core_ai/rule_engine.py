@@ -0,0 +1,337 @@
+"""
+core_ai/rule_engine.py
+───────────────────────
+Columnar evaluation of the five core_ai rule signals.
+
+RuleBatch scores whole arrays of transactions with NumPy masks instead of
+calling the per-row analyze_*_risk() functions in service.py once per row.
+
+Design:
+  - Scores are identical to the per-row analysers (same bands, same caps).
+  - Reason strings are built lazily: only by RuleBatch.reasons(i), and only
+    for the signals row i actually triggered. Jobs that need scores and
+    decisions alone (nightly rescoring, bulk backfills) never format a string.
+  - Categorical columns (currency, location) are resolved once per distinct
+    value, then expanded to per-row masks.
+  - Velocity is an input (count / amount per window) rather than a tracker
+    read, so callers choose how it is sourced: the live VelocityTracker,
+    replayed history, or nothing at all.
+  - distinct_devices_24h (velocity_sketch.DistinctDeviceSketch) is an
+    optional velocity column; older callers that omit it score as before.
+  - Device velocity (transactions per device in 24h) is an optional
+    column too; a device behind _HIGH_DEVICE_COUNT_24H+ transactions scores
+    as shared / automated.
+  - Reason formatters live here and are shared with the per-row analysers,
+    so both paths emit the same text. Currency sets, jurisdiction lists and
+    decision thresholds come from the shared compiled risk rules
+    (app/services/risk_rules.py); a RuleBatch keeps the rules it was built
+    with even if they are reloaded mid-batch.
+"""
+
+from typing import Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.risk_rules import LOC_HIGH, LOC_MISSING, CompiledRules, get_rules
+from app.services.velocity_tracker import (
+    _HIGH_AMOUNT_1H,
+    _HIGH_AMOUNT_24H,
+    _HIGH_COUNT_1H,
+    _HIGH_COUNT_24H,
+    _HIGH_DEVICE_COUNT_24H,
+    _HIGH_DISTINCT_DEVICES_24H,
+)
+
+_VELOCITY_KEYS = ("count_1h", "count_24h", "amount_1h", "amount_24h")
+_VELOCITY_FLAGS = ("high_count_1h", "high_count_24h", "high_amount_1h", "high_amount_24h")
+
+
+# ─── Reason Formatters ────────────────────────────────────────────────────────
+
+def amount_reason(amount: float, currency: str, high: bool) -> str:
+    if high:
+        return (
+            f"Amount {amount:.2f} {currency} exceeds high-risk threshold "
+            f"({settings.HIGH_RISK_AMOUNT:.2f})."
+        )
+    return (
+        f"Amount {amount:.2f} {currency} exceeds medium-risk threshold "
+        f"({settings.MEDIUM_RISK_AMOUNT:.2f})."
+    )
+
+
+def currency_reason(currency: str) -> str:
+    return f"Unusual or unsupported currency: {currency}."
+
+
+def location_reason(location: str | None, high: bool) -> str:
+    if location is None:
+        return "Location unknown — geographic risk cannot be assessed."
+    level = "high" if high else "medium"
+    return f"Transaction originates from {level}-risk jurisdiction: {location.upper()}."
+
+
+def device_reason() -> str:
+    return "No device ID — transaction is from an anonymous session."
+
+
+def shared_device_reason(device_id: str, count_24h: int) -> str:
+    return (
+        f"Device {device_id} used for {count_24h} transactions in the last 24 hours "
+        "(shared or automated device)."
+    )
+
+
+def device_velocity_score(count_24h: float) -> float:
+    return 15.0 if count_24h >= _HIGH_DEVICE_COUNT_24H else 0.0
+
+
+def velocity_reason(v: Mapping) -> str:
+    """Join the reason parts for every velocity flag set in ``v``."""
+    parts: list[str] = []
+    if v["high_count_1h"]:
+        parts.append(f"{v['count_1h']} transactions in the last hour (high velocity).")
+    if v["high_count_24h"]:
+        parts.append(
+            f"{v['count_24h']} transactions in the last 24 hours (elevated frequency)."
+        )
+    if v["high_amount_1h"]:
+        parts.append(
+            f"Transaction volume in last hour: {v['amount_1h']:.2f} (high amount velocity)."
+        )
+    if v["high_amount_24h"]:
+        parts.append(
+            f"Transaction volume in last 24 h: {v['amount_24h']:.2f} (elevated daily volume)."
+        )
+    if v.get("high_distinct_devices_24h"):
+        parts.append(
+            f"{v['distinct_devices_24h']} distinct devices in the last 24 hours "
+            "(possible account sharing or takeover)."
+        )
+    return " ".join(parts)
+
+
+def velocity_score(v: Mapping) -> float:
+    score = (
+        20.0 * bool(v["high_count_1h"])
+        + 10.0 * bool(v["high_count_24h"])
+        + 15.0 * bool(v["high_amount_1h"])
+        + 10.0 * bool(v["high_amount_24h"])
+        + 10.0 * bool(v.get("high_distinct_devices_24h"))
+    )
+    return min(score, 35.0)
+
+
+def derive_decision(risk_score: float, rules: Optional[CompiledRules] = None) -> str:
+    rules = rules or get_rules()
+    if risk_score >= rules.block_threshold:
+        return "BLOCK"
+    if risk_score >= rules.review_threshold:
+        return "REVIEW"
+    return "APPROVE"
+
+
+# ─── Columnar Helpers ─────────────────────────────────────────────────────────
+
+def _classify(values: Iterable, fn, count: int) -> np.ndarray:
+    """Apply ``fn`` once per distinct value and return an int8 class column."""
+    cache: dict = {}
+    return np.fromiter(
+        (cache[v] if v in cache else cache.setdefault(v, fn(v)) for v in values),
+        dtype=np.int8,
+        count=count,
+    )
+
+
+def velocity_columns(signals: Sequence[Mapping]) -> dict[str, np.ndarray]:
+    """Convert VelocityTracker.get_signals() dicts into RuleBatch velocity columns."""
+    n = len(signals)
+    columns = {
+        key: np.fromiter((v[key] for v in signals), dtype=np.float64, count=n)
+        for key in _VELOCITY_KEYS
+    }
+    columns.update({
+        key: np.fromiter((v[key] for v in signals), dtype=bool, count=n)
+        for key in _VELOCITY_FLAGS
+    })
+    if n and all("distinct_devices_24h" in v for v in signals):
+        columns["distinct_devices_24h"] = np.fromiter(
+            (v["distinct_devices_24h"] for v in signals), dtype=np.float64, count=n
+        )
+    return columns
+
+
+# ─── Columnar Rule Batch ──────────────────────────────────────────────────────
+
+class RuleBatch:
+    """
+    Per-signal rule scores for a batch of transactions.
+
+    ``velocity`` maps count_1h / count_24h / amount_1h / amount_24h (and
+    optionally distinct_devices_24h) to columns (see velocity_columns());
+    the high_* flags are derived from the
+    VelocityTracker thresholds when not supplied. Without ``velocity`` the
+    velocity signal scores zero for every row.
+
+    ``device_counts_24h`` is the 24h transaction count of each row's device
+    window; without it only missing device ids score.
+    """
+
+    __slots__ = (
+        "amounts", "currencies", "locations", "device_ids", "_rules", "_velocity", "_high_amount",
+        "_location_class", "_device_counts",
+        "amount_score", "currency_score", "location_score", "device_score",
+        "velocity_score",
+    )
+
+    def __init__(
+        self,
+        amounts: Sequence[float],
+        currencies: Sequence[str],
+        locations: Sequence[Optional[str]],
+        device_ids: Sequence[Optional[str]],
+        velocity: Optional[Mapping[str, Sequence]] = None,
+        device_counts_24h: Optional[Sequence[int]] = None,
+    ) -> None:
+        n = len(amounts)
+        rules = self._rules = get_rules()
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.currencies = currencies
+        self.locations = locations
+        self.device_ids = device_ids
+
+        # Signal 1: amount bands
+        self._high_amount = self.amounts > settings.HIGH_RISK_AMOUNT
+        medium_amount = ~self._high_amount & (self.amounts > settings.MEDIUM_RISK_AMOUNT)
+        self.amount_score = 45.0 * self._high_amount + 25.0 * medium_amount
+
+        # Signal 2: currency outside the known set
+        unknown_currency = _classify(
+            currencies, lambda c: c.upper() not in rules.known_currencies, n
+        ).astype(bool)
+        self.currency_score = 10.0 * unknown_currency
+
+        # Signal 3: location class → score
+        self._location_class = _classify(
+            locations,
+            lambda loc: LOC_MISSING if loc is None else rules.core_location_class.get(loc),
+            n,
+        )
+        self.location_score = np.array([0.0, 12.0, 15.0, 30.0])[self._location_class]
+
+        # Signal 4: anonymous session, or a device shared across many transactions
+        self.device_score = 10.0 * np.fromiter(
+            (d is None for d in device_ids), dtype=bool, count=n
+        )
+        self._device_counts = None
+        if device_counts_24h is not None:
+            self._device_counts = np.asarray(device_counts_24h, dtype=np.int64)
+            shared = (self._device_counts >= _HIGH_DEVICE_COUNT_24H) & (self.device_score == 0)
+            self.device_score = self.device_score + 15.0 * shared
+
+        # Signal 5: velocity flags → capped score
+        self._velocity = None
+        self.velocity_score = np.zeros(n)
+        if velocity is not None:
+            self._velocity = self._velocity_flags(velocity)
+            self.velocity_score = np.minimum(
+                20.0 * self._velocity["high_count_1h"]
+                + 10.0 * self._velocity["high_count_24h"]
+                + 15.0 * self._velocity["high_amount_1h"]
+                + 10.0 * self._velocity["high_amount_24h"]
+                + 10.0 * self._velocity["high_distinct_devices_24h"],
+                35.0,
+            )
+
+    @staticmethod
+    def _velocity_flags(velocity: Mapping[str, Sequence]) -> dict[str, np.ndarray]:
+        columns = {key: np.asarray(velocity[key], dtype=np.float64) for key in _VELOCITY_KEYS}
+        thresholds = {
+            "high_count_1h": ("count_1h", _HIGH_COUNT_1H),
+            "high_count_24h": ("count_24h", _HIGH_COUNT_24H),
+            "high_amount_1h": ("amount_1h", _HIGH_AMOUNT_1H),
+            "high_amount_24h": ("amount_24h", _HIGH_AMOUNT_24H),
+        }
+        if "distinct_devices_24h" in velocity:
+            columns["distinct_devices_24h"] = np.asarray(
+                velocity["distinct_devices_24h"], dtype=np.float64
+            )
+            thresholds["high_distinct_devices_24h"] = (
+                "distinct_devices_24h", _HIGH_DISTINCT_DEVICES_24H
+            )
+        for flag, (key, threshold) in thresholds.items():
+            if flag in velocity:
+                columns[flag] = np.asarray(velocity[flag], dtype=bool)
+            else:
+                columns[flag] = columns[key] >= threshold
+        if "high_distinct_devices_24h" not in columns:
+            columns["high_distinct_devices_24h"] = np.zeros(len(columns["count_1h"]), dtype=bool)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def raw_scores(self, include_velocity: bool = True) -> np.ndarray:
+        """Unclamped per-row signal sum."""
+        total = self.amount_score + self.currency_score + self.location_score + self.device_score
+        if include_velocity:
+            total = total + self.velocity_score
+        return total
+
+    def risk_scores(self, include_velocity: bool = True) -> np.ndarray:
+        """Aggregate risk_score per row, clamped to [0, 100] and rounded to 2 dp."""
+        return np.round(np.clip(self.raw_scores(include_velocity), 0.0, 100.0), 2)
+
+    def decisions(self, include_velocity: bool = True) -> np.ndarray:
+        """APPROVE / REVIEW / BLOCK per row from the aggregate risk_score."""
+        scores = self.risk_scores(include_velocity)
+        return np.where(
+            scores >= self._rules.block_threshold,
+            "BLOCK",
+            np.where(scores >= self._rules.review_threshold, "REVIEW", "APPROVE"),
+        )
+
+    def flagged(self, include_velocity: bool = True) -> np.ndarray:
+        """Boolean mask of rows that triggered at least one signal."""
+        return self.raw_scores(include_velocity) > 0
+
+    def reasons(self, i: int, include_velocity: bool = True) -> list[str]:
+        """
+        Reason strings for row ``i``, in analyser order.
+
+        Only signals that fired are formatted; a clean row costs five
+        array lookups and returns an empty list.
+        """
+        reasons: list[str] = []
+        if self.amount_score[i]:
+            reasons.append(
+                amount_reason(float(self.amounts[i]), self.currencies[i], bool(self._high_amount[i]))
+            )
+        if self.currency_score[i]:
+            reasons.append(currency_reason(self.currencies[i]))
+        if self.location_score[i]:
+            reasons.append(
+                location_reason(self.locations[i], self._location_class[i] == LOC_HIGH)
+            )
+        if self.device_score[i]:
+            if self.device_ids[i] is None:
+                reasons.append(device_reason())
+            else:
+                reasons.append(
+                    shared_device_reason(self.device_ids[i], int(self._device_counts[i]))
+                )
+        if include_velocity and self.velocity_score[i]:
+            reasons.append(velocity_reason(self._velocity_row(i)))
+        return reasons
+
+    def _velocity_row(self, i: int) -> dict:
+        row = {key: self._velocity[key][i] for key in _VELOCITY_FLAGS}
+        row["count_1h"] = int(self._velocity["count_1h"][i])
+        row["count_24h"] = int(self._velocity["count_24h"][i])
+        row["amount_1h"] = float(self._velocity["amount_1h"][i])
+        row["amount_24h"] = float(self._velocity["amount_24h"][i])
+        row["high_distinct_devices_24h"] = bool(self._velocity["high_distinct_devices_24h"][i])
+        if "distinct_devices_24h" in self._velocity:
+            row["distinct_devices_24h"] = int(self._velocity["distinct_devices_24h"][i])
+        return row
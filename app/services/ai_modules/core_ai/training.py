@@ -0,0 +1,241 @@
+"""
+core_ai/training.py
+────────────────────
+Streaming training-data pipeline for the fraud Isolation Forest.
+
+Builds the scorer's 11-feature matrix from historical ``fraud_logs`` rows
+instead of _synthetic_training_data().
+
+Design:
+  - Rows are streamed from the database through a server-side cursor
+    (``yield_per``) in fixed-size chunks, ordered by (user_id, timestamp).
+  - Each chunk is turned into feature rows with the same vectorised
+    _feature_matrix() used for synthetic data and batch scoring.
+  - velocity_1h is reconstructed per row as the number of earlier non-BLOCK
+    transactions of the same user in the preceding hour (what the live
+    VelocityTracker would have reported), carrying the tail of the last
+    user across chunk boundaries.
+  - distinct_devices_24h is reconstructed the same way: distinct device ids
+    among the user's earlier rows in the preceding 24 hours — the exact
+    value the live DistinctDeviceSketch approximates.
+  - Rows are reservoir-sampled into a fixed-size matrix
+    (ML_TRAINING_MAX_ROWS). Isolation Forest fits each tree on 256 samples,
+    so a large uniform sample loses nothing while peak memory stays bounded
+    and total time stays linear in the number of rows scanned.
+  - Hours and weekdays are derived in UTC, the timezone fraud_logs stores.
+"""
+
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.database import SessionLocal
+from app.models.logs import FraudLog
+from app.services.ai_modules.core_ai.ml_scorer import (
+    _N_FEATURES,
+    _currency_risk,
+    _feature_matrix,
+    _location_risk,
+)
+from app.services.velocity_tracker import _to_unix
+
+logger = get_logger(__name__)
+
+_WINDOW_1H_MS = 3_600_000
+_WINDOW_24H_MS = 86_400_000
+# Per-chunk composite sort key: user_index * _USER_STRIDE + epoch_ms.
+_USER_STRIDE = 1 << 42
+
+
+def _map_unique(values: list, fn) -> np.ndarray:
+    """Apply a scalar risk lookup once per distinct value (None included)."""
+    cache: dict = {}
+    return np.fromiter(
+        (cache[v] if v in cache else cache.setdefault(v, fn(v)) for v in values),
+        dtype=np.float64,
+        count=len(values),
+    )
+
+
+class _VelocityCarry:
+    """Tail of the previous chunk's last user, for cross-chunk count_1h."""
+
+    __slots__ = ("user_id", "epoch_ms")
+
+    def __init__(self) -> None:
+        self.user_id: Optional[str] = None
+        self.epoch_ms = np.empty(0, dtype=np.int64)
+
+
+def _count_1h(user_ids: list[str], epoch_ms: np.ndarray, carry: _VelocityCarry) -> np.ndarray:
+    """
+    Prior same-user transactions in the hour before each row.
+
+    Rows must be sorted by (user_id, timestamp). Counts are computed with one
+    searchsorted over a composite (user, time) key; ``carry`` supplies the
+    previous chunk's rows for a user that spans the chunk boundary.
+    """
+    prefix = carry.epoch_ms if user_ids[0] == carry.user_id else carry.epoch_ms[:0]
+    all_users = np.asarray([user_ids[0]] * len(prefix) + user_ids, dtype=object)
+    all_ms = np.concatenate([prefix, epoch_ms])
+
+    # Users are sorted, so a running "user changed" counter is a valid group index.
+    user_change = np.zeros(len(all_users), dtype=np.int64)
+    user_change[1:] = all_users[1:] != all_users[:-1]
+    keys = np.cumsum(user_change) * _USER_STRIDE + all_ms
+    lo = np.searchsorted(keys, keys - _WINDOW_1H_MS, side="left")
+    counts = np.arange(len(keys)) - lo
+
+    last_user = user_ids[-1]
+    last_rows = all_ms[all_users == last_user]
+    carry.user_id = last_user
+    carry.epoch_ms = last_rows[last_rows >= last_rows[-1] - _WINDOW_1H_MS]
+
+    return counts[len(prefix):]
+
+
+class _DeviceWindow:
+    """Sliding 24h device window of the current user, carried across chunks."""
+
+    __slots__ = ("user_id", "rows", "counts")
+
+    def __init__(self) -> None:
+        self.user_id: Optional[str] = None
+        self.rows: deque = deque()          # (epoch_ms, device_id) in time order
+        self.counts: dict[str, int] = {}    # device_id -> rows in window
+
+
+def _distinct_devices_24h(
+    user_ids: list[str],
+    epoch_ms: np.ndarray,
+    device_ids: list[Optional[str]],
+    window: _DeviceWindow,
+) -> np.ndarray:
+    """
+    Distinct device ids among each row's same-user rows in the prior 24 hours.
+
+    Rows must be sorted by (user_id, timestamp); ``window`` persists between
+    chunks so a user spanning a chunk boundary keeps its history.
+    """
+    out = np.empty(len(user_ids), dtype=np.float64)
+    rows, counts = window.rows, window.counts
+    for i, (user_id, ms, device_id) in enumerate(zip(user_ids, epoch_ms.tolist(), device_ids)):
+        if user_id != window.user_id:
+            window.user_id = user_id
+            rows.clear()
+            counts.clear()
+        while rows and rows[0][0] < ms - _WINDOW_24H_MS:
+            _, old = rows.popleft()
+            counts[old] -= 1
+            if not counts[old]:
+                del counts[old]
+        out[i] = len(counts)
+        if device_id is not None:
+            rows.append((ms, device_id))
+            counts[device_id] = counts.get(device_id, 0) + 1
+    return out
+
+
+def iter_fraud_log_features(
+    chunk_size: Optional[int] = None,
+    lookback_days: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Yield feature matrices for non-BLOCK fraud_logs rows, one chunk at a time.
+
+    BLOCK decisions are excluded: they were never recorded as velocity and
+    are, by construction, not the "normal" traffic the forest should learn.
+    """
+    chunk_size = chunk_size or settings.ML_TRAINING_CHUNK_SIZE
+    lookback_days = lookback_days or settings.ML_TRAINING_LOOKBACK_DAYS
+    since = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+
+    stmt = (
+        select(
+            FraudLog.user_id,
+            FraudLog.amount,
+            FraudLog.currency,
+            FraudLog.location,
+            FraudLog.device_id,
+            FraudLog.timestamp,
+        )
+        .where(FraudLog.decision != "BLOCK", FraudLog.timestamp >= since)
+        .order_by(FraudLog.user_id, FraudLog.timestamp)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    carry = _VelocityCarry()
+    devices = _DeviceWindow()
+    with SessionLocal() as session:
+        for rows in session.execute(stmt).partitions(chunk_size):
+            user_ids = [r.user_id for r in rows]
+            epoch_s = np.fromiter(
+                (_to_unix(r.timestamp) for r in rows), dtype=np.float64, count=len(rows)
+            )
+            epoch_ms = np.round(epoch_s * 1_000).astype(np.int64)
+            epoch_whole_s = np.floor(epoch_s).astype(np.int64)
+
+            yield _feature_matrix(
+                amounts=np.fromiter((r.amount for r in rows), dtype=np.float64, count=len(rows)),
+                hours=((epoch_whole_s // 3_600) % 24).astype(np.float64),
+                # 1970-01-01 was a Thursday (weekday 3).
+                weekdays=((epoch_whole_s // 86_400 + 3) % 7).astype(np.float64),
+                currency_risks=_map_unique([r.currency for r in rows], _currency_risk),
+                location_risks=_map_unique([r.location for r in rows], _location_risk),
+                has_device=np.fromiter(
+                    (r.device_id is not None for r in rows), dtype=np.float64, count=len(rows)
+                ),
+                count_1h=_count_1h(user_ids, epoch_ms, carry).astype(np.float64),
+                distinct_devices_24h=_distinct_devices_24h(
+                    user_ids, epoch_ms, [r.device_id for r in rows], devices
+                ),
+            )
+
+
+def build_training_matrix(
+    max_rows: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    lookback_days: Optional[int] = None,
+    seed: int = 42,
+) -> Optional[np.ndarray]:
+    """
+    Stream fraud_logs into a uniformly sampled training matrix.
+
+    Uses reservoir sampling (Algorithm R, vectorised per chunk) so at most
+    ``max_rows`` feature rows are ever held in memory. Returns None when
+    fewer than ML_TRAINING_MIN_ROWS usable rows exist, so callers can fall
+    back to synthetic data.
+    """
+    max_rows = max_rows or settings.ML_TRAINING_MAX_ROWS
+    rng = np.random.default_rng(seed)
+    reservoir = np.empty((max_rows, _N_FEATURES), dtype=np.float64)
+    seen = 0
+
+    for chunk in iter_fraud_log_features(chunk_size=chunk_size, lookback_days=lookback_days):
+        n = len(chunk)
+        fill = max(0, min(n, max_rows - seen))
+        if fill:
+            reservoir[seen:seen + fill] = chunk[:fill]
+        if fill < n:
+            # Row with global index j (0-based) replaces slot r ~ U[0, j] if r < max_rows.
+            positions = np.arange(seen + fill, seen + n, dtype=np.int64)
+            slots = rng.integers(0, positions + 1)
+            keep = slots < max_rows
+            reservoir[slots[keep]] = chunk[fill:][keep]
+        seen += n
+
+    logger.info(
+        f"[ML-TRAINING] fraud_logs scanned={seen} sampled={min(seen, max_rows)}"
+    )
+    if seen < settings.ML_TRAINING_MIN_ROWS:
+        logger.warning(
+            f"[ML-TRAINING] Not enough fraud_logs rows to train "
+            f"(have={seen}, need={settings.ML_TRAINING_MIN_ROWS})."
+        )
+        return None
+    return reservoir[:min(seen, max_rows)]
@@ -0,0 +1,147 @@
+"""
+market_ai/cache.py
+───────────────────
+Forecast quantile cache.
+
+Forecasts are deterministic (stable per-asset seed) and proportional to the
+starting price, so the quantiles computed for a price of 1.0 can be reused
+for every request on the same asset and days until the TTL expires, whatever
+price the caller supplies. Dashboards that poll the same assets and horizons
+are then served without simulating.
+
+Design:
+  - Keyed on (asset, model version, forecast days); the model version also
+    encodes the method, so Monte Carlo and analytic results never mix and a
+    model bump invalidates old entries. The days are the horizon plus any
+    curve days, so curve and plain forecasts are cached separately. Values
+    are ``{"quantiles": [[day, median, p10, p90], ...]}`` per unit of price.
+  - "memory": per-process OrderedDict with a TTL per entry and LRU eviction
+    beyond FORECAST_CACHE_MAX_ENTRIES, guarded by one lock (forecasts run in
+    worker threads).
+  - "redis": shared by every worker and pod through REDIS_URL; JSON values
+    written with SETEX, so the TTL is enforced server-side. Redis errors fail
+    open (treated as a miss / skipped write) with a warning.
+  - "none" (or TTL <= 0) disables caching.
+  - Hits return a copy, so callers may modify the value freely.
+"""
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+try:  # optional dependency — only needed for FORECAST_CACHE_BACKEND=redis
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+logger = get_logger(__name__)
+
+
+def forecast_cache_key(asset: str, days: list[int], model_version: str) -> str:
+    """Cache key for the sorted forecast ``days`` (1..N written as a range)."""
+    if days == list(range(1, len(days) + 1)):
+        spec = f"1-{len(days)}"
+    else:
+        spec = ",".join(map(str, days))
+    return f"{asset}|{model_version}|{spec}"
+
+
+class ForecastCache:
+    """In-process TTL + LRU cache of unit-price forecast quantiles."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl_secs: float) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_secs
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: dict) -> None:
+        value = copy.deepcopy(value)
+        expires = time.monotonic() + self._ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisForecastCache:
+    """Unit-price forecast quantiles shared across workers/pods in Redis."""
+
+    name = "redis"
+
+    def __init__(self, client: Any, ttl_secs: float, prefix: Optional[str] = None) -> None:
+        self._client = client
+        self._ttl = max(1, int(ttl_secs))
+        self._prefix = prefix if prefix is not None else settings.FORECAST_CACHE_REDIS_PREFIX
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_url(cls, url: Optional[str], ttl_secs: float) -> "RedisForecastCache":
+        if redis is None:
+            raise RuntimeError("FORECAST_CACHE_BACKEND=redis requires the 'redis' package")
+        if not url:
+            raise ValueError("FORECAST_CACHE_BACKEND=redis requires REDIS_URL")
+        return cls(redis.Redis.from_url(url), ttl_secs)
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            raw = self._client.get(f"{self._prefix}{key}")
+        except Exception as e:
+            logger.warning(f"[MARKET_AI] CACHE READ FAILED | backend=redis error={e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: dict) -> None:
+        try:
+            self._client.setex(f"{self._prefix}{key}", self._ttl, json.dumps(value))
+        except Exception as e:
+            logger.warning(f"[MARKET_AI] CACHE WRITE FAILED | backend=redis error={e}")
+
+
+def create_forecast_cache():
+    """Cache selected by FORECAST_CACHE_BACKEND, or None when caching is off."""
+    if settings.FORECAST_CACHE_BACKEND == "none" or settings.FORECAST_CACHE_TTL_SECS <= 0:
+        return None
+    if settings.FORECAST_CACHE_BACKEND == "redis":
+        return RedisForecastCache.from_url(settings.REDIS_URL, settings.FORECAST_CACHE_TTL_SECS)
+    return ForecastCache(settings.FORECAST_CACHE_MAX_ENTRIES, settings.FORECAST_CACHE_TTL_SECS)
+
+
+forecast_cache = create_forecast_cache()
@@ -8,8 +8,25 @@ Supported assets: gold, silver, btc, eth, spy (S&P 500 ETF), xau (alias for gold
 Design:
   - Uses GBM (Geometric Brownian Motion) with market-calibrated parameters.
   - Monte Carlo simulation (500 paths) returns median + p10/p90 confidence band.
-  - Seeded with deterministic seed per (asset + horizon) for reproducible results
-    across identical requests, while still reflecting statistical uncertainty.
+  - method="analytic" skips simulation: with constant drift/vol the terminal
+    price is lognormal, so median/p10/p90 are exact closed-form quantiles and
+    cost O(1) whatever the horizon. Default method comes from FORECAST_METHOD.
+  - Vectorised with NumPy: one (horizon, paths) standard-normal draw, the
+    terminal log price is the per-path sum of daily log returns, and the
+    quantiles come from a single np.partition — no Python-level loop per step.
+  - Seeded from a blake2b digest of the asset, so identical requests return
+    identical forecasts in every process and on every node (Python's hash() is
+    randomised per process). Because draws are step-major, every horizon of an
+    asset reads a prefix of the same simulated paths.
+  - Curve mode (curve_days / full_curve) simulates once to the furthest
+    requested day and reads median/p10/p90 for every requested day off the
+    same cumulative path matrix — a chart is one simulation, not one per
+    horizon. The terminal forecast is identical with or without a curve.
+  - GBM quantiles are proportional to the starting price, so forecasts are
+    computed per unit of price and scaled by the caller's exact price. The
+    cache (cache.py) holds those unit quantiles keyed on asset, horizon and
+    model version: every price override of an asset shares one entry, and a
+    cache hit is identical to recomputing.
   - Baseline prices are hardcoded to realistic May 2026 market levels.
     In production: replace _ASSET_PARAMS["base_price"] with a live feed call
     (CoinGecko, Alpha Vantage, Quandl, or Bloomberg).
@@ -20,12 +37,15 @@ Forecasting accuracy:
   - Long horizons (> 30 days):  treat as scenario planning, not point forecast
 """
 
+import hashlib
 import math
-import random
-import threading
 from typing import Optional
 
+import numpy as np
+
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.services.ai_modules.market_ai.cache import forecast_cache, forecast_cache_key
 
 logger = get_logger(__name__)
 
@@ -52,20 +72,32 @@ _TREND_THRESHOLDS = {
 }
 
 _N_SIMULATIONS = 500
+# Order statistics reported as median / p10 / p90 (indices into the sorted terminal prices)
+_QUANTILE_INDICES = (_N_SIMULATIONS // 2, int(_N_SIMULATIONS * 0.10), int(_N_SIMULATIONS * 0.90))
+
+# Standard-normal 90th percentile (p10 = -z, p90 = +z)
+_Z_P90 = 1.2815515655446004
 
-# Per-thread Random instance — avoids lock contention on the shared random state
-# when multiple forecast calls run concurrently in different threads.
-_thread_local = threading.local()
+FORECAST_METHODS = ("monte_carlo", "analytic")
+MODEL_VERSIONS = {"monte_carlo": "gbm_monte_carlo_v3", "analytic": "gbm_lognormal_v1"}
+_METHOD_NOTES = {
+    "monte_carlo": "Confidence interval is p10–p90 across 500 paths.",
+    "analytic": "Confidence interval is the exact p10–p90 of the GBM terminal (lognormal) distribution.",
+}
 
 
-def _get_rng(seed: int) -> random.Random:
-    """Return a seeded Random instance (one per call for determinism)."""
-    rng = random.Random(seed)
-    return rng
+def _get_rng(seed: int) -> np.random.Generator:
+    """Return a seeded Generator (one per call, so concurrent threads share no state)."""
+    return np.random.default_rng(seed)
 
 
 # ─── Internal Helpers ─────────────────────────────────────────────────────────
 
+def _stable_seed(asset: str) -> int:
+    """64-bit seed from a blake2b digest — the same in every process, unlike hash()."""
+    return int.from_bytes(hashlib.blake2b(asset.encode(), digest_size=8).digest(), "big")
+
+
 def _classify_trend(pct_change: float) -> str:
     if pct_change >= _TREND_THRESHOLDS["strong_bullish"]:
         return "strong_bullish"
@@ -78,6 +110,42 @@ def _classify_trend(pct_change: float) -> str:
     return "neutral"
 
 
+def _gbm_simulate_curve(
+    current_price: float,
+    daily_vol: float,
+    annual_drift: float,
+    days: list[int],
+    seed: int,
+) -> dict[int, tuple[float, float, float]]:
+    """
+    Run one Monte Carlo GBM simulation up to max(days).
+
+    Each path: S(t+1) = S(t) * exp((μ - σ²/2)Δt + σ√Δt * Z)
+    where Z ~ N(0,1), Δt = 1 day, so
+    S(t) = S(0) * exp(t(μ - σ²/2) + σ Σ_{i≤t} Z_i).
+
+    Draws are step-major — row t holds day t+1 for every path — so a shorter
+    horizon with the same seed sees a prefix of the same paths, and a running
+    cumulative sum gives every day's log price from the one matrix.
+
+    Returns:
+        {day: (median_price, p10_price, p90_price)} for each requested day (unrounded)
+    """
+    rng = _get_rng(seed)
+    daily_drift = annual_drift / 365.0
+    rows = np.asarray(days) - 1
+
+    z = rng.standard_normal((max(days), _N_SIMULATIONS))
+    np.cumsum(z, axis=0, out=z)
+    log_returns = (rows + 1)[:, None] * (daily_drift - 0.5 * daily_vol ** 2) + daily_vol * z[rows]
+
+    # exp() is monotonic, so order statistics can be picked on log returns
+    picked = np.partition(log_returns, _QUANTILE_INDICES, axis=1)[:, _QUANTILE_INDICES]
+    prices = current_price * np.exp(picked)
+
+    return {day: (float(m), float(lo), float(hi)) for day, (m, lo, hi) in zip(days, prices)}
+
+
 def _gbm_simulate(
     current_price: float,
     daily_vol: float,
@@ -86,34 +154,66 @@ def _gbm_simulate(
     seed: int,
 ) -> tuple[float, float, float]:
     """
-    Run a Monte Carlo GBM simulation.
+    Monte Carlo GBM terminal quantiles.
 
-    Each path: S(t+1) = S(t) * exp((μ - σ²/2)Δt + σ√Δt * Z)
-    where Z ~ N(0,1), Δt = 1 day.
+    Returns:
+        (median_price, p10_price, p90_price), unrounded
+    """
+    return _gbm_simulate_curve(current_price, daily_vol, annual_drift, [horizon_days], seed)[horizon_days]
+
+
+def _gbm_quantiles(
+    current_price: float,
+    daily_vol: float,
+    annual_drift: float,
+    horizon_days: int,
+) -> tuple[float, float, float]:
+    """
+    Closed-form GBM terminal quantiles.
+
+    ln S(T) ~ N(ln S(0) + T(μ - σ²/2), σ²T), so the q-quantile is
+    S(0) * exp(T(μ - σ²/2) + σ√T * z_q) with z = 0 for the median, ∓1.2816 for p10/p90.
 
     Returns:
-        (median_price, p10_price, p90_price)
+        (median_price, p10_price, p90_price), unrounded
     """
-    rng = _get_rng(seed)
     daily_drift = annual_drift / 365.0
+    median = current_price * math.exp(horizon_days * (daily_drift - 0.5 * daily_vol ** 2))
+    spread = math.exp(daily_vol * math.sqrt(horizon_days) * _Z_P90)
+    return median, median / spread, median * spread
 
-    terminal_prices: list[float] = []
-    for _ in range(_N_SIMULATIONS):
-        price = current_price
-        for _ in range(horizon_days):
-            z = rng.gauss(0, 1)
-            price *= math.exp(
-                (daily_drift - 0.5 * daily_vol ** 2) + daily_vol * z
-            )
-        terminal_prices.append(price)
 
-    terminal_prices.sort()
-    n = len(terminal_prices)
-    median = terminal_prices[n // 2]
-    p10 = terminal_prices[int(n * 0.10)]
-    p90 = terminal_prices[int(n * 0.90)]
+def _unit_quantiles(key: str, method: str, days: list[int]) -> dict[int, tuple[float, float, float]]:
+    """Quantiles for a starting price of 1.0, from the cache when possible."""
+    cache_key = forecast_cache_key(key, days, MODEL_VERSIONS[method])
+    if forecast_cache is not None:
+        cached = forecast_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"[MARKET_AI] forecast_price CACHE HIT | asset={key} days={len(days)} method={method}")
+            return {day: (m, lo, hi) for day, m, lo, hi in cached["quantiles"]}
 
-    return round(median, 2), round(p10, 2), round(p90, 2)
+    params = _ASSET_PARAMS[key]
+    if method == "analytic":
+        quantiles = {
+            day: _gbm_quantiles(
+                current_price=1.0,
+                daily_vol=params["daily_vol"],
+                annual_drift=params["annual_drift"],
+                horizon_days=day,
+            )
+            for day in days
+        }
+    else:
+        quantiles = _gbm_simulate_curve(
+            current_price=1.0,
+            daily_vol=params["daily_vol"],
+            annual_drift=params["annual_drift"],
+            days=days,
+            seed=_stable_seed(key),
+        )
+    if forecast_cache is not None:
+        forecast_cache.set(cache_key, {"quantiles": [[day, *quantiles[day]] for day in days]})
+    return quantiles
 
 
 # ─── Public API ───────────────────────────────────────────────────────────────
@@ -122,6 +222,9 @@ def forecast_price(
     asset: str,
     horizon_days: int = 30,
     current_price: Optional[float] = None,
+    method: Optional[str] = None,
+    curve_days: Optional[list[int]] = None,
+    full_curve: bool = False,
 ) -> dict:
     """
     Forecast the price of an asset over the given horizon.
@@ -130,11 +233,15 @@ def forecast_price(
         asset         — one of: gold, silver, btc, eth, spy, xau
         horizon_days  — forecast horizon in calendar days (1–365)
         current_price — optional live price override; uses baseline if None
+        method        — "monte_carlo" or "analytic"; FORECAST_METHOD if None
+        curve_days    — optional extra days (1–365) to report median/p10/p90 for
+        full_curve    — report every day from 1 to horizon_days
 
     Returns a dict with:
         asset, current_price, unit, horizon_days,
         forecast_price, confidence_interval (p10, p90),
-        pct_change, trend, model, note
+        pct_change, trend, method, model, note
+        (+ curve: [{day, median, p10, p90}, ...] when a curve was requested)
     """
     key = asset.lower()
     if key not in SUPPORTED_ASSETS:
@@ -146,31 +253,42 @@ def forecast_price(
     if horizon_days < 1 or horizon_days > 365:
         raise ValueError("horizon_days must be between 1 and 365.")
 
+    method = method or settings.FORECAST_METHOD
+    if method not in FORECAST_METHODS:
+        raise ValueError(f"Unsupported method '{method}'. Supported methods: {list(FORECAST_METHODS)}")
+
+    curve = set(curve_days or ())
+    if any(d < 1 or d > 365 for d in curve):
+        raise ValueError("curve_days must be between 1 and 365.")
+    if full_curve:
+        curve.update(range(1, horizon_days + 1))
+    curve = sorted(curve)
+    days = sorted(set(curve) | {horizon_days})
+
     params = _ASSET_PARAMS[key]
     base_price = current_price if current_price is not None else params["base_price"]
+    if not base_price > 0:
+        raise ValueError("current_price must be greater than 0.")
 
-    # Deterministic seed per asset + horizon so identical requests return
-    # identical forecasts (useful for caching / testing).
-    seed = hash((key, horizon_days)) % (2 ** 31)
-
-    median, p10, p90 = _gbm_simulate(
-        current_price=base_price,
-        daily_vol=params["daily_vol"],
-        annual_drift=params["annual_drift"],
-        horizon_days=horizon_days,
-        seed=seed,
-    )
+    unit = _unit_quantiles(key, method, days)
+    quantiles = {
+        day: tuple(round(base_price * q, 2) for q in unit[day])
+        for day in days
+    }
+    median, p10, p90 = quantiles[horizon_days]
 
-    pct_change = round((median - base_price) / base_price, 4)
+    # Relative change comes from the unit forecast: exact, and never divides by
+    # a price that rounds to zero
+    pct_change = round(unit[horizon_days][0] - 1.0, 4)
     trend = _classify_trend(pct_change)
 
     logger.info(
         f"[MARKET_AI] forecast_price | asset={key} horizon={horizon_days}d "
         f"current={base_price:.2f} forecast={median:.2f} "
-        f"pct_change={pct_change:.2%} trend={trend}"
+        f"pct_change={pct_change:.2%} trend={trend} method={method} curve_points={len(curve)}"
     )
 
-    return {
+    result = {
         "asset": key,
         "current_price": round(base_price, 2),
         "unit": params["unit"],
@@ -179,18 +297,31 @@ def forecast_price(
         "confidence_interval": {"p10": p10, "p90": p90},
         "pct_change": pct_change,
         "trend": trend,
-        "model": "gbm_monte_carlo_v1",
+        "method": method,
+        "model": MODEL_VERSIONS[method],
         "note": (
-            "Forecast uses GBM Monte Carlo simulation calibrated to historical "
-            "market volatility. Confidence interval is p10–p90 across 500 paths. "
+            "Forecast uses Geometric Brownian Motion calibrated to historical "
+            f"market volatility. {_METHOD_NOTES[method]} "
             "For live accuracy, supply current_price from a real-time market feed."
         ),
     }
+    if curve:
+        result["curve"] = [
+            {"day": day, "median": quantiles[day][0], "p10": quantiles[day][1], "p90": quantiles[day][2]}
+            for day in curve
+        ]
+    return result
 
 
 def batch_forecast(
     assets: list[str],
     horizon_days: int = 30,
+    method: Optional[str] = None,
+    curve_days: Optional[list[int]] = None,
+    full_curve: bool = False,
 ) -> list[dict]:
-    """Forecast multiple assets in a single call."""
-    return [forecast_price(asset, horizon_days) for asset in assets]
+    """Forecast multiple assets in a single call (one simulation per asset, curve included)."""
+    return [
+        forecast_price(asset, horizon_days, method=method, curve_days=curve_days, full_curve=full_curve)
+        for asset in assets
+    ]
@@ -10,6 +10,7 @@ import hashlib
 from datetime import datetime, timezone
 
 from app.core.logging import get_logger
+from app.services.risk_rules import get_rules
 
 logger = get_logger(__name__)
 
@@ -19,8 +20,7 @@ _ANOMALY_RAPID_COUNT = 5            # transactions in one request payload
 _AML_STRUCTURING_BAND = (9000.0, 10000.0)  # just-below-10k structuring band
 _AML_ROUND_AMOUNT_THRESHOLD = 5000.0        # suspiciously round large amounts
 
-# Known high-risk jurisdictions (mirrors core_ai)
-_HIGH_RISK_LOCATIONS = frozenset({"KP", "IR", "SY", "CU", "SD", "MM"})
+# High-risk jurisdictions: "sanctioned" list in the shared risk rules (risk_rules.json)
 
 
 # ─── Anomaly Detection ────────────────────────────────────────────────────────
@@ -62,7 +62,7 @@ def detect_anomaly(user_id: str, transaction_data: dict) -> dict:
         flags.append(f"High transaction velocity: {tx_count} recent transactions detected.")
 
     # Signal 3: High-risk location
-    if location in _HIGH_RISK_LOCATIONS:
+    if location in get_rules().high_risk_jurisdictions:
         score += 25.0
         flags.append(f"Transaction from high-risk jurisdiction: {location}.")
 
@@ -127,7 +127,7 @@ def check_aml_patterns(user_id: str, transaction_data: dict) -> dict:
         patterns.append(f"Round-amount pattern: {amount:.2f} is a suspiciously round large sum.")
 
     # Pattern 3: High-risk jurisdiction
-    if location in _HIGH_RISK_LOCATIONS:
+    if location in get_rules().high_risk_jurisdictions:
         risk_points += 30
         patterns.append(f"High-risk jurisdiction: {location} is on the AML watchlist.")
 
@@ -17,6 +17,7 @@ import statistics
 from typing import Optional
 
 from app.core.logging import get_logger
+from app.services.risk_rules import get_rules
 
 logger = get_logger(__name__)
 
@@ -38,8 +39,8 @@ _CARRIER_COSTS_PER_KG: dict[str, float] = {
 _MISMATCH_TOLERANCE_PCT: float = 2.0      # acceptable weight discrepancy %
 _SUSPICIOUSLY_ROUND_KG: float = 10.0      # flag exact round-kg large shipments
 
-# High-risk shipment origin countries (OFAC/FATF aligned)
-_HIGH_RISK_COUNTRIES: frozenset = frozenset({"KP", "IR", "SY", "CU", "SD", "MM", "AF"})
+# High-risk shipment origin countries (OFAC/FATF aligned): "vault_high_risk_origins"
+# in the shared risk rules (risk_rules.json)
 
 
 # ─── 1. Inventory Forecasting ─────────────────────────────────────────────────
@@ -292,7 +293,7 @@ def detect_supply_chain_anomaly(shipment_id: str, shipment_data: dict) -> dict:
             )
 
     # Signal 2: High-risk origin country
-    if origin in _HIGH_RISK_COUNTRIES:
+    if origin in get_rules().vault_high_risk_origins:
         score += 30.0
         flags.append(f"Shipment originates from high-risk jurisdiction: {origin}.")
 
@@ -0,0 +1,166 @@
+"""
+fraud_rollups.py
+─────────────────
+Incremental rollups of fraud_logs for dashboards.
+
+Ops queries (decision mix, score distribution, per-user history) used to
+aggregate the raw fraud_logs table, competing with inserts. They now read
+two small pre-aggregated tables instead:
+
+  fraud_log_hourly      — per UTC hour x decision x currency x location x
+                          risk bucket (risk_score // 10)
+  fraud_log_user_daily  — per user x UTC day
+
+Design:
+  - rollup_upserts() folds a batch of fraud_logs rows into per-key deltas in
+    memory and returns one ``INSERT ... ON CONFLICT DO UPDATE`` per table that
+    adds counts/sums and keeps maxima. A batch of 500 log rows typically turns
+    into a few dozen upserted rows.
+  - The log writer runs these in the same transaction as the fraud_logs
+    insert, so rollups never drift from the raw table; the routers' direct
+    write fallback does the same through its AsyncSession.
+  - Keys are sorted before the upsert so concurrent writers (several
+    workers) lock rollup rows in the same order and cannot deadlock.
+  - Rollups outlive fraud_logs partition retention: history stays queryable
+    after raw months are dropped.
+  - Existing history is backfilled by
+    scripts/migrations/20261018_fraud_log_rollups.sql.
+  - Upserts are built for PostgreSQL and SQLite, the two supported backends.
+    On any other backend rollups are skipped (warned once per dialect) and
+    the fraud_logs write goes through unchanged.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import func
+from sqlalchemy.sql.expression import Insert
+
+from app.core.logging import get_logger
+from app.models.logs import FraudLogHourly, FraudLogUserDaily
+
+logger = get_logger(__name__)
+
+_HOURLY = FraudLogHourly.__table__
+_DAILY = FraudLogUserDaily.__table__
+_HOURLY_KEYS = ("bucket_start", "decision", "currency", "location", "risk_bucket")
+_DAILY_KEYS = ("user_id", "day")
+_DECISION_COUNTS = {"APPROVE": "approve_count", "REVIEW": "review_count", "BLOCK": "block_count"}
+_SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+# Dialects already warned about, so the log writer does not warn on every batch
+_warned_dialects: set[str] = set()
+
+
+def risk_bucket(risk_score: float) -> int:
+    """0..9 decile of a 0-100 risk score (100 falls into 9)."""
+    return min(max(int(risk_score // 10), 0), 9)
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _insert_for(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert, func.greatest
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert, func.max
+    raise ValueError(f"fraud rollups need PostgreSQL or SQLite, not {dialect_name!r}")
+
+
+def _supported(dialect_name: str) -> bool:
+    if dialect_name in _SUPPORTED_DIALECTS:
+        return True
+    if dialect_name not in _warned_dialects:
+        _warned_dialects.add(dialect_name)
+        logger.warning(
+            f"[ROLLUPS] SKIPPED | dialect={dialect_name} "
+            "(rollups need PostgreSQL or SQLite; fraud_logs is still written)"
+        )
+    return False
+
+
+def _upsert(dialect_name: str, table, keys: tuple[str, ...], max_cols: tuple[str, ...]) -> Insert:
+    insert, greatest = _insert_for(dialect_name)
+    stmt = insert(table)
+    set_ = {}
+    for column in table.columns:
+        if column.name in keys:
+            continue
+        if column.name in max_cols:
+            set_[column.name] = greatest(column, stmt.excluded[column.name])
+        else:
+            set_[column.name] = column + stmt.excluded[column.name]
+    return stmt.on_conflict_do_update(index_elements=list(keys), set_=set_)
+
+
+def rollup_deltas(rows: Iterable[dict]) -> tuple[list[dict], list[dict]]:
+    """Fold fraud_logs rows into (hourly, user_daily) delta rows, sorted by key."""
+    hourly: dict[tuple, dict[str, Any]] = {}
+    daily: dict[tuple, dict[str, Any]] = {}
+    for row in rows:
+        ts = _utc(row["timestamp"])
+        amount = float(row["amount"])
+        score = float(row["risk_score"])
+        decision = row["decision"]
+
+        key = (
+            ts.replace(minute=0, second=0, microsecond=0),
+            decision,
+            row["currency"],
+            row.get("location") or "",
+            risk_bucket(score),
+        )
+        h = hourly.get(key)
+        if h is None:
+            h = hourly[key] = dict(
+                zip(_HOURLY_KEYS, key),
+                tx_count=0, amount_sum=0.0, risk_score_sum=0.0, risk_score_max=score,
+            )
+        h["tx_count"] += 1
+        h["amount_sum"] += amount
+        h["risk_score_sum"] += score
+        h["risk_score_max"] = max(h["risk_score_max"], score)
+
+        day: date = ts.date()
+        key = (row["user_id"], day)
+        d = daily.get(key)
+        if d is None:
+            d = daily[key] = dict(
+                user_id=row["user_id"], day=day,
+                tx_count=0, approve_count=0, review_count=0, block_count=0,
+                amount_sum=0.0, amount_max=amount,
+                risk_score_sum=0.0, risk_score_max=score, last_seen=ts,
+            )
+        d["tx_count"] += 1
+        if decision in _DECISION_COUNTS:
+            d[_DECISION_COUNTS[decision]] += 1
+        d["amount_sum"] += amount
+        d["amount_max"] = max(d["amount_max"], amount)
+        d["risk_score_sum"] += score
+        d["risk_score_max"] = max(d["risk_score_max"], score)
+        d["last_seen"] = max(d["last_seen"], ts)
+
+    return [hourly[k] for k in sorted(hourly)], [daily[k] for k in sorted(daily)]
+
+
+def rollup_upserts(dialect_name: str, rows: Iterable[dict]) -> list[tuple[Insert, list[dict]]]:
+    """
+    (statement, params) pairs that add ``rows`` (fraud_logs dicts) to both
+    rollups. Empty on unsupported dialects, so the caller's log insert still
+    commits.
+    """
+    if not _supported(dialect_name):
+        return []
+    hourly, daily = rollup_deltas(rows)
+    statements = []
+    if hourly:
+        statements.append((_upsert(dialect_name, _HOURLY, _HOURLY_KEYS, ("risk_score_max",)), hourly))
+    if daily:
+        statements.append((
+            _upsert(dialect_name, _DAILY, _DAILY_KEYS, ("amount_max", "risk_score_max", "last_seen")),
+            daily,
+        ))
+    return statements
@@ -0,0 +1,170 @@
+"""
+log_writer.py
+──────────────
+Background batched writer for fraud_logs / portfolio_logs.
+
+Routers used to add + commit one ORM row per request on the event loop,
+paying a full database round trip before responding. They now hand the
+row to log_writer.submit(), which only appends to an in-memory queue.
+
+Design:
+  - One asyncio task drains the queue. A flush happens when
+    LOG_WRITER_BATCH_SIZE rows are waiting or LOG_WRITER_FLUSH_MS has
+    elapsed since the first queued row, whichever comes first.
+  - Each flush is a single transaction in a worker thread: one executemany
+    INSERT per table, which SQLAlchemy sends as multi-row
+    ``INSERT ... VALUES (...), (...)`` statements (insertmanyvalues).
+  - Backpressure: the queue holds at most LOG_WRITER_MAX_QUEUE rows. When
+    the database falls that far behind, new rows are dropped with a warning
+    rather than slowing down scoring; ``dropped`` counts them.
+  - fraud_logs rows also update the dashboard rollups (fraud_rollups.py)
+    in the same transaction, so the rollups always match the raw table.
+  - A failed flush is logged and its rows are discarded, matching the
+    routers' previous "don't fail the request if logging fails" behaviour.
+  - Started and drained in the app lifespan: stop() flushes everything
+    still queued before shutdown. When the writer is not running (disabled
+    or outside the app lifespan) routers fall back to writing directly
+    through an AsyncSession.
+  - submit() must be called from the event loop thread.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import Table
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.database import engine
+from app.models.logs import FraudLog
+from app.services.fraud_rollups import rollup_upserts
+
+logger = get_logger(__name__)
+
+_STOP = object()
+# Backpressure warnings are logged at most this often
+_DROP_LOG_INTERVAL_SECS: float = 5.0
+
+
+class LogWriter:
+    """Queues log rows and bulk-inserts them off the request path."""
+
+    def __init__(self, batch_size: int, flush_ms: float, max_queue: int) -> None:
+        self._batch_size = batch_size
+        self._flush_s = flush_ms / 1_000.0
+        self._max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_drop_log = 0.0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Start the writer task on the running event loop (idempotent)."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="log-writer")
+        logger.info(
+            f"[LOG-WRITER] STARTED | batch_size={self._batch_size} "
+            f"flush_ms={self._flush_s * 1_000:.0f} max_queue={self._max_queue}"
+        )
+
+    async def stop(self) -> None:
+        """Flush every queued row, then stop the writer task."""
+        if self._task is None:
+            return
+        # The queue itself is unbounded (the cap is enforced in submit()), so
+        # the stop marker always fits behind the rows still waiting.
+        self._queue.put_nowait(_STOP)
+        await self._task
+        self._task = None
+        logger.info(
+            f"[LOG-WRITER] STOPPED | written={self.written} dropped={self.dropped} "
+            f"failed={self.failed}"
+        )
+
+    def submit(self, table: Table, row: dict) -> bool:
+        """Queue one row for ``table``. Returns False if it was dropped (queue full)."""
+        if self._queue.qsize() >= self._max_queue:
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self._last_drop_log >= _DROP_LOG_INTERVAL_SECS:
+                self._last_drop_log = now
+                logger.warning(
+                    f"[LOG-WRITER] QUEUE FULL | table={table.name} "
+                    f"max_queue={self._max_queue} dropped_total={self.dropped}"
+                )
+            return False
+        self._queue.put_nowait((table, row))
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = loop.time() + self._flush_s
+            while len(batch) < self._batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[Table, dict]]) -> None:
+        by_table: dict[Table, list[dict]] = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(_insert, by_table)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning(f"[LOG-WRITER] FLUSH FAILED | rows={len(batch)} error={e}")
+            return
+        self.written += len(batch)
+        logger.debug(
+            f"[LOG-WRITER] FLUSHED | rows={len(batch)} "
+            f"tables={','.join(t.name for t in by_table)} "
+            f"ms={(time.perf_counter() - started) * 1_000:.1f}"
+        )
+
+
+def _insert(by_table: dict[Table, list[dict]]) -> None:
+    with engine.begin() as conn:
+        for table, rows in by_table.items():
+            conn.execute(table.insert(), rows)
+            if table is FraudLog.__table__:
+                for stmt, params in rollup_upserts(conn.dialect.name, rows):
+                    conn.execute(stmt, params)
+
+
+log_writer = LogWriter(
+    batch_size=settings.LOG_WRITER_BATCH_SIZE,
+    flush_ms=settings.LOG_WRITER_FLUSH_MS,
+    max_queue=settings.LOG_WRITER_MAX_QUEUE,
+)
@@ -0,0 +1,199 @@
+"""
+risk_rules.py
+──────────────
+Declarative risk rules shared by core_ai, ml_scorer, risk_ai and vault_ai.
+
+Currency sets, jurisdiction lists and decision thresholds live in one JSON
+file (risk_rules.json next to this module, or RISK_RULES_PATH) instead of
+being hard-coded in every module.
+
+Design:
+  - The file is loaded once and compiled into lookup structures:
+    jurisdiction lists become fixed 26x26 tables indexed by the two ISO-2
+    letters (a flat 676-entry list for scalar reads, the NumPy view for
+    columnar code), currency lists become frozensets.
+  - List entries of the form "@name" include another list of the same
+    section, so e.g. the sanctions list is written once and extended by the
+    modules that need more.
+  - Consumers call get_rules() once per evaluation and read from the
+    returned CompiledRules, which is immutable.
+  - reload_rules() parses and compiles a new file completely before swapping
+    the module-level reference, so readers see either the old or the new
+    rules, never a mix. An invalid file raises and leaves the active rules
+    untouched — sanctions updates ship without a deploy.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULT_RULES_PATH = Path(__file__).with_name("risk_rules.json")
+
+_ALPHABET = 26
+_TABLE_SIZE = _ALPHABET * _ALPHABET
+
+# core_ai location classes (see rule_engine.RuleBatch)
+LOC_NONE, LOC_MISSING, LOC_MEDIUM, LOC_HIGH = 0, 1, 2, 3
+
+
+class RiskRulesError(ValueError):
+    """Raised when a rules file is malformed; the active rules are kept."""
+
+
+def _iso2_index(code: Optional[str]) -> int:
+    """Flat table index for an ISO-2 code, or -1 if it is not two ASCII letters."""
+    if code is None or len(code) != 2:
+        return -1
+    a = ord(code[0]) & ~0x20  # ASCII upper-case
+    b = ord(code[1]) & ~0x20
+    if not (65 <= a <= 90 and 65 <= b <= 90):
+        return -1
+    return (a - 65) * _ALPHABET + (b - 65)
+
+
+class CountryTable:
+    """Constant-time value lookup by ISO-2 country code."""
+
+    __slots__ = ("_flat", "_default", "array")
+
+    def __init__(self, default: Any = 0, dtype: Any = np.int8) -> None:
+        self._flat: list = [default] * _TABLE_SIZE
+        self._default = default
+        self.array = np.full((_ALPHABET, _ALPHABET), default, dtype=dtype)
+
+    def set(self, codes: frozenset[str], value: Any) -> None:
+        for code in codes:
+            idx = _iso2_index(code)
+            self._flat[idx] = value
+            self.array[divmod(idx, _ALPHABET)] = value
+
+    def get(self, code: Optional[str]) -> Any:
+        """Value for ``code`` (case-insensitive); the default for unknown/invalid codes."""
+        idx = _iso2_index(code)
+        return self._flat[idx] if idx >= 0 else self._default
+
+    def __contains__(self, code: Optional[str]) -> bool:
+        return bool(self.get(code))
+
+
+class CompiledRules:
+    """Immutable, precompiled view of one rules file."""
+
+    def __init__(self, raw: dict[str, Any], source: str) -> None:
+        self.version: str = str(raw.get("version", "unversioned"))
+        self.source = source
+
+        currencies = _resolve_section(raw, "currencies", _is_currency)
+        jurisdictions = _resolve_section(raw, "jurisdictions", lambda c: _iso2_index(c) >= 0)
+
+        # core_ai rule signals
+        self.known_currencies: frozenset[str] = currencies.get("core_known", frozenset())
+        self.core_location_class = CountryTable(LOC_NONE)
+        self.core_location_class.set(jurisdictions.get("elevated", frozenset()), LOC_MEDIUM)
+        self.core_location_class.set(jurisdictions.get("sanctioned", frozenset()), LOC_HIGH)
+
+        # ml_scorer feature lookups — high risk wins over low risk
+        self.ml_trusted_currencies: frozenset[str] = currencies.get("ml_trusted", frozenset())
+        self.ml_location_risk = CountryTable(0.35, dtype=np.float64)
+        self.ml_location_risk.set(jurisdictions.get("ml_low_risk", frozenset()), 0.0)
+        self.ml_location_risk.set(jurisdictions.get("ml_high_risk", frozenset()), 1.0)
+
+        # risk_ai AML / anomaly checks and vault_ai shipment origins
+        self.high_risk_jurisdictions = CountryTable(False, dtype=bool)
+        self.high_risk_jurisdictions.set(jurisdictions.get("sanctioned", frozenset()), True)
+        self.vault_high_risk_origins = CountryTable(False, dtype=bool)
+        self.vault_high_risk_origins.set(
+            jurisdictions.get("vault_high_risk_origins", frozenset()), True
+        )
+
+        thresholds = raw.get("decision_thresholds", {})
+        self.block_threshold = float(thresholds.get("block", 80.0))
+        self.review_threshold = float(thresholds.get("review", 50.0))
+        if not 0.0 <= self.review_threshold <= self.block_threshold <= 100.0:
+            raise RiskRulesError(
+                "decision_thresholds must satisfy 0 <= review <= block <= 100"
+            )
+
+
+def _is_currency(code: str) -> bool:
+    return len(code) == 3 and code.isascii() and code.isalpha()
+
+
+def _resolve_section(raw: dict[str, Any], section: str, valid) -> dict[str, frozenset[str]]:
+    """Expand "@name" includes and upper-case every code in one section."""
+    lists = raw.get(section, {})
+    if not isinstance(lists, dict):
+        raise RiskRulesError(f"'{section}' must be an object of name → list")
+
+    resolved: dict[str, frozenset[str]] = {}
+
+    def resolve(name: str, stack: tuple[str, ...]) -> frozenset[str]:
+        if name in resolved:
+            return resolved[name]
+        if name in stack:
+            raise RiskRulesError(f"circular include in {section}: {' → '.join(stack + (name,))}")
+        if name not in lists:
+            raise RiskRulesError(f"unknown list '@{name}' in {section}")
+        codes: set[str] = set()
+        for entry in lists[name]:
+            if not isinstance(entry, str):
+                raise RiskRulesError(f"{section}.{name}: entries must be strings")
+            if entry.startswith("@"):
+                codes |= resolve(entry[1:], stack + (name,))
+            elif valid(entry):
+                codes.add(entry.upper())
+            else:
+                raise RiskRulesError(f"{section}.{name}: invalid code '{entry}'")
+        resolved[name] = frozenset(codes)
+        return resolved[name]
+
+    for name in lists:
+        resolve(name, ())
+    return resolved
+
+
+def compile_rules(path: Optional[str | Path] = None) -> CompiledRules:
+    """Load and compile a rules file without activating it."""
+    path = Path(path or settings.RISK_RULES_PATH or _DEFAULT_RULES_PATH)
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise RiskRulesError(f"cannot read rules file {path}: {e}") from e
+    if not isinstance(raw, dict):
+        raise RiskRulesError(f"rules file {path} must contain a JSON object")
+    return CompiledRules(raw, source=str(path))
+
+
+_reload_lock = threading.Lock()
+_active: CompiledRules = compile_rules()
+
+
+def get_rules() -> CompiledRules:
+    """Return the active compiled rules (a single reference read)."""
+    return _active
+
+
+def reload_rules(path: Optional[str | Path] = None) -> CompiledRules:
+    """
+    Compile ``path`` (default: the configured rules file) and swap it in.
+
+    Raises RiskRulesError on an invalid file; the previous rules stay active.
+    """
+    global _active
+    with _reload_lock:
+        compiled = compile_rules(path)
+        previous = _active
+        _active = compiled
+    logger.info(
+        f"[RISK-RULES] RELOADED | version={compiled.version} "
+        f"previous={previous.version} source={compiled.source}"
+    )
+    return compiled
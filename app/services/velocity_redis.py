@@ -0,0 +1,134 @@
+"""
+velocity_redis.py
+──────────────────
+Redis-backed velocity windows, shared by every uvicorn worker and pod.
+
+Selected with VELOCITY_BACKEND=redis (see velocity_tracker.create_velocity_tracker).
+
+Design:
+  - One sorted set per window key (``<VELOCITY_REDIS_PREFIX><key>``) scored by
+    unix timestamp. Members are "<amount>:<nonce>" so repeated identical
+    transactions stay distinct.
+  - record() sends ZADD + EXPIRE in one pipelined round trip. The key TTL
+    (24h plus slack) replaces the in-memory sweeper: idle users expire
+    server-side.
+  - get_signals() sends ZREMRANGEBYSCORE (evict entries older than 24h) +
+    ZRANGEBYSCORE (everything left, with scores) in one pipelined round
+    trip, then derives both windows' counts and sums client-side.
+  - record_many() / get_signals_many() put every key of a transaction
+    (user, device, user+location, ...) in the same pipeline: one round trip
+    regardless of how many dimensions are tracked.
+  - Windows are by timestamp rather than arrival order; for in-order
+    traffic the signals match the in-memory tracker exactly.
+  - Any client with redis-py's pipeline API works: redis.Redis against a
+    real or local redis-server, or the in-process stand-in in
+    tests/fake_redis.py, which tests/test_velocity_redis.py runs against the
+    in-memory VelocityTracker.
+  - Redis errors fail open — get_signals() returns empty signals and
+    record() drops the entry, both with a warning — so an outage degrades
+    velocity checks instead of failing every fraud-score request.
+"""
+
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.velocity_tracker import (
+    _WINDOW_1H_SECS,
+    _WINDOW_24H_SECS,
+    VelocityBackend,
+    _build_signals,
+    _to_unix,
+)
+
+try:  # optional dependency — only needed for VELOCITY_BACKEND=redis
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+logger = get_logger(__name__)
+
+# Keep keys a little past the 24h window so late reads still see the tail
+_KEY_TTL_SECS: int = _WINDOW_24H_SECS + 3_600
+
+
+class RedisVelocityTracker(VelocityBackend):
+    """Per-key sliding-window velocity stored in Redis sorted sets."""
+
+    name = "redis"
+
+    def __init__(self, client: Any, prefix: Optional[str] = None) -> None:
+        self._client = client
+        self._prefix = prefix if prefix is not None else settings.VELOCITY_REDIS_PREFIX
+
+    @classmethod
+    def from_url(cls, url: Optional[str], prefix: Optional[str] = None) -> "RedisVelocityTracker":
+        if redis is None:
+            raise RuntimeError("VELOCITY_BACKEND=redis requires the 'redis' package")
+        if not url:
+            raise ValueError("VELOCITY_BACKEND=redis requires REDIS_URL")
+        return cls(redis.Redis.from_url(url), prefix=prefix)
+
+    def _key(self, user_id: str) -> str:
+        return f"{self._prefix}{user_id}"
+
+    def record(self, user_id: str, amount: float, ts: datetime) -> None:
+        """
+        Record a completed transaction for velocity tracking.
+        Should only be called for APPROVE / REVIEW decisions.
+        """
+        self.record_many([user_id], amount, ts)
+
+    def record_many(self, keys: Sequence[str], amount: float, ts: datetime) -> None:
+        """Record one transaction under several keys in one round trip."""
+        unix_ts = _to_unix(ts)
+        member = f"{float(amount)!r}:{uuid4().hex}"
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key in keys:
+                redis_key = self._key(key)
+                pipe.zadd(redis_key, {member: unix_ts})
+                pipe.expire(redis_key, _KEY_TTL_SECS)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[VELOCITY] REDIS RECORD FAILED | keys={list(keys)} error={e}")
+
+    def get_signals(self, user_id: str, as_of: datetime) -> dict:
+        """Return velocity signals for user_id as of the given timestamp."""
+        return self.get_signals_many([user_id], as_of)[0]
+
+    def get_signals_many(self, keys: Sequence[str], as_of: datetime) -> list[dict]:
+        """Signals for several keys, in the order given, in one round trip."""
+        now = _to_unix(as_of)
+        cutoff_1h = now - _WINDOW_1H_SECS
+        cutoff_24h = now - _WINDOW_24H_SECS
+
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key in keys:
+                redis_key = self._key(key)
+                pipe.zremrangebyscore(redis_key, "-inf", f"({cutoff_24h!r}")
+                pipe.zrangebyscore(redis_key, cutoff_24h, "+inf", withscores=True)
+            replies = pipe.execute()
+        except Exception as e:
+            logger.warning(f"[VELOCITY] REDIS READ FAILED | keys={list(keys)} error={e}")
+            return [_build_signals(0, 0, 0.0, 0.0) for _ in keys]
+
+        # Replies alternate (removed_count, entries) per key.
+        return [_window_signals(entries, cutoff_1h) for entries in replies[1::2]]
+
+
+def _window_signals(entries: list, cutoff_1h: float) -> dict:
+    count_1h = 0
+    amount_1h = amount_24h = 0.0
+    for member, score in entries:
+        if isinstance(member, bytes):
+            member = member.decode()
+        amount = float(member.split(":", 1)[0])
+        amount_24h += amount
+        if score >= cutoff_1h:
+            count_1h += 1
+            amount_1h += amount
+    return _build_signals(count_1h, len(entries), amount_1h, amount_24h)
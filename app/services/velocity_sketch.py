@@ -0,0 +1,400 @@
+"""
+velocity_sketch.py
+───────────────────
+Approximate, fixed-memory velocity counters for high-cardinality keys.
+
+Exact windows (velocity_tracker.py) cost memory per key and per
+transaction. Device-level windows see far more keys than users, so this
+module trades a bounded error for memory that does not grow with traffic.
+
+Design:
+  - CountMinVelocity: a count-min sketch of counts and amounts per time
+    bucket. The 1h window is built from 5-minute buckets, the 24h window
+    from hourly buckets; each bucket is a (depth × width) plane that is
+    zeroed when its slot is reused, so expired traffic rotates out without
+    per-entry eviction. Width = ⌈e / VELOCITY_SKETCH_EPSILON⌉ and
+    depth = ⌈ln(1 / VELOCITY_SKETCH_DELTA)⌉: an estimate never undercounts
+    and overcounts by at most ε × (transactions in the window) with
+    probability 1 − δ. A window also includes the partially expired oldest
+    bucket, so it may reach up to one bucket further back.
+    Dimensions listed in VELOCITY_SKETCH_DIMENSIONS are routed here instead
+    of the exact backend.
+  - DistinctDeviceSketch: distinct devices per user over 24h. Small sets —
+    the range the 5-device rule and the ML feature care about — are counted
+    exactly: each user gets a row of _EXACT_DEVICE_SLOTS device fingerprints
+    (with the hour each was last seen) in a fixed table of
+    VELOCITY_DISTINCT_EXACT_USERS rows, found by open addressing on the
+    user hash; rows whose devices all expired are reused. Only a user who
+    overflows the row (more than _EXACT_DEVICE_SLOTS devices in 24h) or who
+    finds no free row falls back to a virtual HyperLogLog (vHLL): every
+    user maps to VELOCITY_HLL_REGISTERS registers drawn from one shared pool
+    of VELOCITY_HLL_POOL_SIZE registers per hourly bucket, with the
+    pool-wide estimate subtracted as noise. An overflowed user never reads
+    below _EXACT_DEVICE_SLOTS + 1, and the no-row fallback rounds down, so
+    the approximate path cannot push a small set over the threshold.
+  - Memory is allocated once from the settings and never grows; both
+    sketches report it via ``memory_bytes``.
+  - Keys are hashed with blake2b, so column choices are stable across
+    processes and restarts.
+  - State is per process and is not snapshotted. On startup
+    velocity_snapshot.py replays the last 24h of fraud_logs into both
+    sketches (split_velocity_keys() routes each key as live scoring does).
+"""
+
+import math
+import threading
+import time
+from datetime import datetime
+from hashlib import blake2b
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.velocity_tracker import (
+    _WINDOW_1H_SECS,
+    _WINDOW_24H_SECS,
+    VelocityBackend,
+    _build_signals,
+    _to_unix,
+)
+
+logger = get_logger(__name__)
+
+_FINE_BUCKET_SECS: int = 300
+_COARSE_BUCKET_SECS: int = 3_600
+# Pool-wide HLL estimate (the vHLL noise term) is recomputed at most this often
+_POOL_ESTIMATE_TTL_SECS: float = 10.0
+# Distinct devices per user counted exactly before falling back to the vHLL
+_EXACT_DEVICE_SLOTS: int = 8
+# Rows probed for a user in the exact table (open addressing)
+_EXACT_PROBES: int = 8
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+def _spread(value: str, n: int, modulo: int) -> np.ndarray:
+    """``n`` column indices in [0, modulo) for ``value`` (double hashing)."""
+    h = _hash64(value)
+    h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+    return np.array([(h1 + i * h2) % modulo for i in range(n)], dtype=np.int64)
+
+
+# ─── Time-Bucketed Count-Min Sketch ───────────────────────────────────────────
+
+class _BucketedCountMin:
+    """Ring of count-min planes, one per time bucket. Not thread-safe."""
+
+    __slots__ = ("bucket_secs", "counts", "amounts", "epochs", "_rows")
+
+    def __init__(self, width: int, depth: int, bucket_secs: int, n_buckets: int) -> None:
+        self.bucket_secs = bucket_secs
+        self.counts = np.zeros((n_buckets, depth, width), dtype=np.uint32)
+        self.amounts = np.zeros((n_buckets, depth, width), dtype=np.float64)
+        self.epochs = np.full(n_buckets, -1, dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def _slot(self, epoch: int) -> Optional[int]:
+        slot = epoch % len(self.epochs)
+        current = self.epochs[slot]
+        if current == epoch:
+            return slot
+        if current > epoch:
+            return None  # older than every bucket still held
+        self.counts[slot] = 0
+        self.amounts[slot] = 0.0
+        self.epochs[slot] = epoch
+        return slot
+
+    def add(self, cols: np.ndarray, amount: float, unix_ts: float) -> None:
+        """Add one transaction to every key in ``cols`` (shape keys × depth)."""
+        slot = self._slot(int(unix_ts // self.bucket_secs))
+        if slot is None:
+            return
+        rows = np.broadcast_to(self._rows, cols.shape)
+        # np.add.at: two keys may share a cell within a row.
+        np.add.at(self.counts[slot], (rows, cols), 1)
+        np.add.at(self.amounts[slot], (rows, cols), amount)
+
+    def window(self, cols: np.ndarray, unix_ts: float, span_secs: int) -> tuple[np.ndarray, np.ndarray]:
+        """Estimated (counts, amounts) per key over the ``span_secs`` ending at unix_ts."""
+        epoch = int(unix_ts // self.bucket_secs)
+        oldest = epoch - math.ceil(span_secs / self.bucket_secs) - 1
+        planes = np.flatnonzero((self.epochs > oldest) & (self.epochs <= epoch))
+        if len(planes) == 0:
+            return np.zeros(len(cols), dtype=np.int64), np.zeros(len(cols))
+        index = (planes[:, None, None], self._rows[None, None, :], cols[None, :, :])
+        # Sum each row over the window, then take the least-collided row.
+        counts = self.counts[index].sum(axis=0, dtype=np.int64).min(axis=1)
+        amounts = self.amounts[index].sum(axis=0).min(axis=1)
+        return counts, amounts
+
+
+class CountMinVelocity(VelocityBackend):
+    """Fixed-memory approximate velocity windows (see module docstring)."""
+
+    name = "sketch"
+
+    def __init__(self, epsilon: float, delta: float) -> None:
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("VELOCITY_SKETCH_EPSILON and VELOCITY_SKETCH_DELTA must be in (0, 1)")
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self._lock = threading.Lock()
+        self._fine = _BucketedCountMin(
+            self.width, self.depth, _FINE_BUCKET_SECS, _WINDOW_1H_SECS // _FINE_BUCKET_SECS + 1
+        )
+        self._coarse = _BucketedCountMin(
+            self.width, self.depth, _COARSE_BUCKET_SECS, _WINDOW_24H_SECS // _COARSE_BUCKET_SECS + 1
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(
+            sketch.counts.nbytes + sketch.amounts.nbytes for sketch in (self._fine, self._coarse)
+        )
+
+    def _cols(self, keys: Sequence[str]) -> np.ndarray:
+        return np.stack([_spread(key, self.depth, self.width) for key in keys])
+
+    def record(self, user_id: str, amount: float, ts: datetime) -> None:
+        self.record_many([user_id], amount, ts)
+
+    def get_signals(self, user_id: str, as_of: datetime) -> dict:
+        return self.get_signals_many([user_id], as_of)[0]
+
+    def record_many(self, keys: Sequence[str], amount: float, ts: datetime) -> None:
+        if not keys:
+            return
+        cols = self._cols(keys)
+        unix_ts = _to_unix(ts)
+        with self._lock:
+            self._fine.add(cols, amount, unix_ts)
+            self._coarse.add(cols, amount, unix_ts)
+
+    def get_signals_many(self, keys: Sequence[str], as_of: datetime) -> list[dict]:
+        if not keys:
+            return []
+        cols = self._cols(keys)
+        unix_ts = _to_unix(as_of)
+        with self._lock:
+            count_1h, amount_1h = self._fine.window(cols, unix_ts, _WINDOW_1H_SECS)
+            count_24h, amount_24h = self._coarse.window(cols, unix_ts, _WINDOW_24H_SECS)
+        return [
+            _build_signals(
+                int(count_1h[i]), int(count_24h[i]), float(amount_1h[i]), float(amount_24h[i])
+            )
+            for i in range(len(keys))
+        ]
+
+
+# ─── Distinct Devices per User (virtual HyperLogLog) ──────────────────────────
+
+def _hll_alpha(m: int) -> float:
+    if m <= 16:
+        return 0.673
+    if m <= 32:
+        return 0.697
+    if m <= 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
+
+
+def _hll_estimate(registers: np.ndarray) -> float:
+    """Raw HyperLogLog estimate with the small-range (linear counting) correction."""
+    m = len(registers)
+    estimate = _hll_alpha(m) * m * m / float(np.sum(np.ldexp(1.0, -registers.astype(np.int64))))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        return m * math.log(m / zeros)
+    return estimate
+
+
+class DistinctDeviceSketch:
+    """Distinct device ids per user over the last 24h, in fixed memory."""
+
+    def __init__(self, registers: int, pool_size: int, exact_users: int = 0) -> None:
+        if not 16 <= registers <= 65_536 or pool_size < 4 * registers:
+            raise ValueError(
+                "VELOCITY_HLL_REGISTERS must be in [16, 65536] and "
+                "VELOCITY_HLL_POOL_SIZE at least 4x that"
+            )
+        self.registers = registers
+        self.pool_size = pool_size
+        n_buckets = _WINDOW_24H_SECS // _COARSE_BUCKET_SECS + 1
+        self._planes = np.zeros((n_buckets, pool_size), dtype=np.uint8)
+        self._epochs = np.full(n_buckets, -1, dtype=np.int64)
+        # Exact small-set table: user hash (0 = never used), device fingerprints
+        # (0 = empty slot), hour each device was last seen, and the hour until
+        # which the user has overflowed into the vHLL.
+        self._exact_users = np.zeros(exact_users, dtype=np.uint64)
+        self._exact_devices = np.zeros((exact_users, _EXACT_DEVICE_SLOTS), dtype=np.uint32)
+        self._exact_seen = np.zeros((exact_users, _EXACT_DEVICE_SLOTS), dtype=np.int32)
+        self._exact_overflow = np.zeros(exact_users, dtype=np.int32)
+        self._lock = threading.Lock()
+        self._pool_estimate: tuple[float, int, float] = (0.0, -1, 0.0)  # (at, epoch, value)
+
+    @property
+    def memory_bytes(self) -> int:
+        return (
+            self._planes.nbytes + self._exact_users.nbytes + self._exact_devices.nbytes
+            + self._exact_seen.nbytes + self._exact_overflow.nbytes
+        )
+
+    def _slot(self, epoch: int) -> Optional[int]:
+        slot = epoch % len(self._epochs)
+        current = self._epochs[slot]
+        if current == epoch:
+            return slot
+        if current > epoch:
+            return None
+        self._planes[slot] = 0
+        self._epochs[slot] = epoch
+        return slot
+
+    def _window(self, epoch: int) -> np.ndarray:
+        oldest = epoch - len(self._epochs)
+        return np.flatnonzero((self._epochs > oldest) & (self._epochs <= epoch))
+
+    # ── Exact small sets ──────────────────────────────────────────────────────
+
+    def _row_expired(self, row: int, epoch: int) -> bool:
+        oldest = epoch - len(self._epochs)
+        return bool(
+            self._exact_overflow[row] <= epoch
+            and (self._exact_seen[row] <= oldest).all()
+        )
+
+    def _find_row(self, user_hash: int, epoch: int, create: bool) -> tuple[Optional[int], bool]:
+        """
+        (row, known) for a user. ``known`` is False only when every probed row
+        belongs to another live user, i.e. this user may have been unable to
+        get a row and only the vHLL has its devices.
+        """
+        n = len(self._exact_users)
+        if n == 0:
+            return None, False
+        free = None
+        for i in range(_EXACT_PROBES):
+            row = (user_hash + i) % n
+            owner = int(self._exact_users[row])
+            if owner == user_hash:
+                return row, True
+            if owner == 0 or self._row_expired(row, epoch):
+                if free is None:
+                    free = row
+                if owner == 0:
+                    break
+        if free is None:
+            return None, False
+        if create:
+            self._exact_users[free] = user_hash
+            self._exact_devices[free] = 0
+            self._exact_seen[free] = 0
+            self._exact_overflow[free] = 0
+            return free, True
+        return None, True
+
+    def _add_exact(self, user_hash: int, fingerprint: int, epoch: int) -> None:
+        row, _ = self._find_row(user_hash, epoch, create=True)
+        if row is None:
+            return
+        devices, seen = self._exact_devices[row], self._exact_seen[row]
+        live = seen > epoch - len(self._epochs)
+        match = np.flatnonzero((devices == fingerprint) & live)
+        if len(match):
+            seen[match[0]] = max(int(seen[match[0]]), epoch)
+            return
+        empty = np.flatnonzero(~live | (devices == 0))
+        if len(empty):
+            devices[empty[0]] = fingerprint
+            seen[empty[0]] = epoch
+        else:
+            self._exact_overflow[row] = epoch + len(self._epochs)
+
+    def add(self, user_id: str, device_id: str, ts: datetime) -> None:
+        h = _hash64(device_id)
+        virtual = h % self.registers
+        # Rank = leading zeros + 1 of the top 48 bits; the low 16 pick the register.
+        rank = 49 - (h >> 16).bit_length()
+        index = int(_spread(user_id, self.registers, self.pool_size)[virtual])
+        epoch = int(_to_unix(ts) // _COARSE_BUCKET_SECS)
+        with self._lock:
+            slot = self._slot(epoch)
+            if slot is not None and self._planes[slot, index] < rank:
+                self._planes[slot, index] = rank
+            self._add_exact(_hash64(user_id) | 1, (h >> 32) | 1, epoch)
+
+    def estimate(self, user_id: str, as_of: datetime) -> int:
+        """Distinct devices seen for ``user_id`` in the 24h before as_of (exact up to 8)."""
+        epoch = int(_to_unix(as_of) // _COARSE_BUCKET_SECS)
+        with self._lock:
+            row, known = self._find_row(_hash64(user_id) | 1, epoch, create=False)
+            if row is not None and self._exact_overflow[row] <= epoch:
+                seen = self._exact_seen[row]
+                return int(np.count_nonzero(
+                    (self._exact_devices[row] != 0)
+                    & (seen > epoch - len(self._epochs)) & (seen <= epoch)
+                ))
+            if row is None and known:
+                return 0
+            approx = self._approximate(user_id, epoch)
+        if row is not None:
+            # Overflowed the exact row: more than _EXACT_DEVICE_SLOTS devices
+            return max(_EXACT_DEVICE_SLOTS + 1, round(approx))
+        # No exact row (table full around this user): round down so HLL noise
+        # does not lift a small set over the 5-device rule.
+        return max(0, math.floor(approx))
+
+    def _approximate(self, user_id: str, epoch: int) -> float:
+        """vHLL estimate; caller holds the lock."""
+        planes = self._window(epoch)
+        if len(planes) == 0:
+            return 0.0
+        indices = _spread(user_id, self.registers, self.pool_size)
+        user_registers = self._planes[planes[:, None], indices[None, :]].max(axis=0)
+        pool = self._pool(planes, epoch)
+        s, m = self.registers, self.pool_size
+        return (s * m / (m - s)) * (_hll_estimate(user_registers) / s - pool / m)
+
+    def _pool(self, planes: np.ndarray, epoch: int) -> float:
+        at, cached_epoch, value = self._pool_estimate
+        now = time.monotonic()
+        if cached_epoch != epoch or now - at > _POOL_ESTIMATE_TTL_SECS:
+            value = _hll_estimate(self._planes[planes].max(axis=0))
+            self._pool_estimate = (now, epoch, value)
+        return value
+
+
+# ─── Module Singletons ────────────────────────────────────────────────────────
+
+def create_approx_velocity() -> Optional[CountMinVelocity]:
+    """The count-min backend, or None when VELOCITY_SKETCH_DIMENSIONS is empty."""
+    if not settings.VELOCITY_SKETCH_DIMENSIONS:
+        return None
+    sketch = CountMinVelocity(settings.VELOCITY_SKETCH_EPSILON, settings.VELOCITY_SKETCH_DELTA)
+    logger.info(
+        f"[VELOCITY] SKETCH | dimensions={settings.VELOCITY_SKETCH_DIMENSIONS} "
+        f"width={sketch.width} depth={sketch.depth} mb={sketch.memory_bytes / 2**20:.1f}"
+    )
+    return sketch
+
+
+approx_velocity: Optional[CountMinVelocity] = create_approx_velocity()
+distinct_devices = DistinctDeviceSketch(
+    settings.VELOCITY_HLL_REGISTERS,
+    settings.VELOCITY_HLL_POOL_SIZE,
+    settings.VELOCITY_DISTINCT_EXACT_USERS,
+)
+
+
+def split_velocity_keys(keys: dict[str, str]) -> tuple[dict[str, str], dict[str, str]]:
+    """Split velocity_keys() output into (exact, approximate) keys by dimension."""
+    if approx_velocity is None:
+        return keys, {}
+    approx = {dim: key for dim, key in keys.items() if dim in settings.VELOCITY_SKETCH_DIMENSIONS}
+    exact = {dim: key for dim, key in keys.items() if dim not in approx}
+    return exact, approx
@@ -0,0 +1,363 @@
+"""
+velocity_snapshot.py
+─────────────────────
+Persist the in-memory velocity tracker across restarts.
+
+Without this, every deploy starts with empty velocity windows and
+high-velocity users look clean for the next 24 hours.
+
+Design:
+  - A daemon thread writes VelocityTracker.export_history() every
+    VELOCITY_SNAPSHOT_INTERVAL_SECS as an uncompressed NumPy .npz (user ids,
+    offsets, timestamps, amounts), plus a final snapshot on shutdown.
+  - Each worker writes its own slot file next to VELOCITY_SNAPSHOT_PATH
+    (``velocity_snapshot.npz`` -> ``velocity_snapshot.<slot>.npz``). The
+    slot is claimed with a non-blocking flock held for the worker's
+    lifetime, so the workers on one node never overwrite each other. Writes go to a temp file and are published
+    with os.replace(); scoring threads only contend for one shard lock at a
+    time while it is copied.
+  - On startup restore_velocity() loads every slot file younger than 24h
+    and merges them into one history (per key in time order, entries
+    present in several files kept once). Every worker therefore starts
+    with the whole node's traffic, as with the fraud_logs rebuild. Without
+    a fresh file it rebuilds the windows from the last 24h of non-BLOCK
+    fraud_logs rows with a single streamed query
+    (VELOCITY_RESTORE_CHUNK_SIZE rows per chunk).
+  - The sketches (velocity_sketch.py: distinct devices per user, count-min
+    dimensions) are not in the snapshot. The same fraud_logs pass replays
+    every row into them, routed like live scoring; with a snapshot a
+    sketch-only pass runs instead. Sketch-routed dimensions never get exact
+    windows.
+  - Restore runs in the background after startup; merge_history() puts the
+    restored entries before anything scored meanwhile, so windows stay in
+    time order.
+  - Only the in-memory backend is snapshotted — the Redis backend already
+    survives restarts (its process still gets the sketch replay).
+"""
+
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+try:  # POSIX only — without fcntl every worker uses slot 0 (single-worker dev setups)
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.database import SessionLocal
+from app.models.logs import FraudLog
+from app.services.velocity_sketch import approx_velocity, distinct_devices, split_velocity_keys
+from app.services.velocity_tracker import (
+    _WINDOW_24H_SECS,
+    VelocityTracker,
+    _to_unix,
+    velocity_keys,
+)
+
+logger = get_logger(__name__)
+
+_SNAPSHOT_KEYS = ("user_ids", "offsets", "ts", "amounts")
+# Upper bound on per-worker snapshot slots on one node
+_MAX_SLOTS: int = 256
+
+
+# ─── Snapshot File ────────────────────────────────────────────────────────────
+
+def save_snapshot(tracker: VelocityTracker, path: str | Path) -> bool:
+    """Atomically write the tracker's live windows to ``path``."""
+    path = Path(path)
+    started = time.perf_counter()
+    history = tracker.export_history()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                np.savez(tmp_file, written_at=np.float64(time.time()), **history)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    except Exception as e:
+        logger.warning(f"[VELOCITY] SNAPSHOT FAILED | path={path} error={e}")
+        return False
+
+    logger.info(
+        f"[VELOCITY] SNAPSHOT SAVED | path={path} users={len(history['user_ids'])} "
+        f"entries={len(history['ts'])} ms={(time.perf_counter() - started) * 1_000:.1f}"
+    )
+    return True
+
+
+def load_snapshot(path: str | Path, max_age_secs: float = _WINDOW_24H_SECS) -> Optional[dict]:
+    """Read a snapshot written by save_snapshot(); None if missing, stale or unreadable."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if time.time() - float(data["written_at"]) > max_age_secs:
+                logger.info(f"[VELOCITY] SNAPSHOT STALE | path={path}")
+                return None
+            return {key: data[key] for key in _SNAPSHOT_KEYS}
+    except Exception as e:
+        logger.warning(f"[VELOCITY] SNAPSHOT UNREADABLE | path={path} error={e}")
+        return None
+
+
+def slot_path(path: str | Path, slot: int) -> Path:
+    """Snapshot file of worker ``slot``: data/velocity_snapshot.npz -> data/velocity_snapshot.3.npz."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.{slot}{path.suffix}")
+
+
+def claim_slot(path: str | Path) -> tuple[Path, Optional[object]]:
+    """
+    Claim the lowest free snapshot slot for this process.
+
+    Returns the slot's snapshot path and the open lock file, which must stay
+    open (holding the flock) while the process writes to that slot.
+    """
+    path = Path(path)
+    if fcntl is None:
+        return slot_path(path, 0), None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for slot in range(_MAX_SLOTS):
+        lock_file = open(slot_path(path, slot).with_suffix(".lock"), "a+b")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+        return slot_path(path, slot), lock_file
+    raise RuntimeError(f"no free velocity snapshot slot next to {path} ({_MAX_SLOTS} in use)")
+
+
+def snapshot_files(path: str | Path) -> list[Path]:
+    """Every slot file next to ``path``, plus ``path`` itself (single-file snapshots)."""
+    path = Path(path)
+    files = [
+        candidate
+        for candidate in sorted(path.parent.glob(f"{path.stem}.*{path.suffix}"))
+        if candidate.name[len(path.stem) + 1:-len(path.suffix) or None].isdigit()
+    ]
+    if path.exists():
+        files.append(path)
+    return files
+
+
+def combine_histories(histories: list[dict]) -> dict:
+    """
+    Merge several export_history() dicts into one: each key's entries in
+    time order, with entries found in more than one history (same key,
+    timestamp and amount) kept once.
+    """
+    if len(histories) == 1:
+        return histories[0]
+    keys = np.concatenate([
+        np.repeat(h["user_ids"], np.diff(h["offsets"])) for h in histories
+    ])
+    ts = np.concatenate([h["ts"] for h in histories])
+    amounts = np.concatenate([h["amounts"] for h in histories])
+    user_ids, codes = np.unique(keys, return_inverse=True)
+
+    order = np.lexsort((amounts, ts, codes))
+    codes, ts, amounts = codes[order], ts[order], amounts[order]
+    keep = np.ones(len(codes), dtype=bool)
+    keep[1:] = (codes[1:] != codes[:-1]) | (ts[1:] != ts[:-1]) | (amounts[1:] != amounts[:-1])
+    codes, ts, amounts = codes[keep], ts[keep], amounts[keep]
+
+    offsets = np.zeros(len(user_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(user_ids)), out=offsets[1:])
+    return {"user_ids": user_ids, "offsets": offsets, "ts": ts, "amounts": amounts}
+
+
+def load_snapshots(path: str | Path) -> Optional[dict]:
+    """Every fresh slot snapshot next to ``path`` merged into one history; None if none."""
+    histories = [h for h in map(load_snapshot, snapshot_files(path)) if h is not None]
+    return combine_histories(histories) if histories else None
+
+
+# ─── Rebuild From fraud_logs ──────────────────────────────────────────────────
+
+def _fraud_log_rows(chunk_size: Optional[int]) -> Iterator[tuple]:
+    """Last 24h of non-BLOCK fraud_logs in timestamp order, streamed in chunks."""
+    chunk_size = chunk_size or settings.VELOCITY_RESTORE_CHUNK_SIZE
+    since = datetime.now(timezone.utc) - timedelta(seconds=_WINDOW_24H_SECS)
+    stmt = (
+        select(
+            FraudLog.user_id,
+            FraudLog.amount,
+            FraudLog.timestamp,
+            FraudLog.device_id,
+            FraudLog.location,
+            FraudLog.currency,
+        )
+        .where(FraudLog.decision != "BLOCK", FraudLog.timestamp >= since)
+        .order_by(FraudLog.timestamp)
+        .execution_options(yield_per=chunk_size)
+    )
+    with SessionLocal() as session:
+        for rows in session.execute(stmt).partitions(chunk_size):
+            yield from rows
+
+
+def _replay_sketches(
+    user_id: str,
+    amount: float,
+    timestamp: datetime,
+    device_id: Optional[str],
+    approx: dict[str, str],
+) -> None:
+    """Record one fraud_logs row in the sketches, as _record_velocity() does."""
+    if approx:
+        approx_velocity.record_many(list(approx.values()), amount, timestamp)
+    if device_id is not None:
+        distinct_devices.add(user_id, device_id, timestamp)
+
+
+def history_from_fraud_logs(chunk_size: Optional[int] = None, replay_sketches: bool = True) -> dict:
+    """
+    Rebuild velocity history from the last 24h of non-BLOCK fraud_logs.
+
+    One query ordered by timestamp, streamed with a server-side cursor; each
+    row is expanded to its exact window keys (velocity_keys() minus
+    sketch-routed dimensions), then entries are grouped per key with a
+    stable sort so each key's entries stay in time order. With
+    ``replay_sketches`` the rows are also recorded in the sketches.
+    """
+    codes: dict[str, int] = {}
+    user_codes: list[int] = []
+    ts: list[float] = []
+    amounts: list[float] = []
+    for user_id, amount, timestamp, device_id, location, currency in _fraud_log_rows(chunk_size):
+        exact, approx = split_velocity_keys(velocity_keys(user_id, device_id, location, currency))
+        unix_ts = _to_unix(timestamp)
+        for key in exact.values():
+            user_codes.append(codes.setdefault(key, len(codes)))
+            ts.append(unix_ts)
+            amounts.append(amount)
+        if replay_sketches:
+            _replay_sketches(user_id, amount, timestamp, device_id, approx)
+
+    code_arr = np.asarray(user_codes, dtype=np.int64)
+    order = np.argsort(code_arr, kind="stable")
+    counts = np.bincount(code_arr, minlength=len(codes))
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return {
+        "user_ids": np.array(list(codes), dtype=str),
+        "offsets": offsets,
+        "ts": np.asarray(ts, dtype=np.float64)[order],
+        "amounts": np.asarray(amounts, dtype=np.float64)[order],
+    }
+
+
+def sketches_from_fraud_logs(chunk_size: Optional[int] = None) -> int:
+    """Replay the last 24h of non-BLOCK fraud_logs into the sketches only. Returns rows replayed."""
+    replayed = 0
+    for user_id, amount, timestamp, device_id, location, currency in _fraud_log_rows(chunk_size):
+        _, approx = split_velocity_keys(velocity_keys(user_id, device_id, location, currency))
+        _replay_sketches(user_id, amount, timestamp, device_id, approx)
+        replayed += 1
+    return replayed
+
+
+def restore_velocity(tracker: Optional[VelocityTracker], path: Optional[str]) -> int:
+    """
+    Warm ``tracker`` from the slot snapshots, falling back to fraud_logs, and the
+    sketches from fraud_logs. With no tracker (Redis backend) only the
+    sketches are rebuilt. Returns exact-window entries loaded.
+    """
+    started = time.perf_counter()
+    source = "snapshot"
+    history = load_snapshots(path) if path and tracker is not None else None
+    if tracker is not None and history is None and settings.VELOCITY_RESTORE_FROM_DB:
+        source = "fraud_logs"
+        try:
+            history = history_from_fraud_logs()
+        except Exception as e:
+            logger.warning(f"[VELOCITY] REBUILD FROM fraud_logs FAILED | error={e}")
+    elif settings.VELOCITY_RESTORE_FROM_DB:
+        # The snapshot covers exact windows only; Redis keeps its own windows
+        try:
+            replayed = sketches_from_fraud_logs()
+            logger.info(f"[VELOCITY] SKETCHES REBUILT | source=fraud_logs rows={replayed}")
+        except Exception as e:
+            logger.warning(f"[VELOCITY] SKETCH REBUILD FROM fraud_logs FAILED | error={e}")
+    if history is None:
+        return 0
+
+    loaded = tracker.merge_history(**history)
+    logger.info(
+        f"[VELOCITY] RESTORED | source={source} users={len(history['user_ids'])} "
+        f"entries={loaded} ms={(time.perf_counter() - started) * 1_000:.1f}"
+    )
+    return loaded
+
+
+# ─── Periodic Snapshotter ─────────────────────────────────────────────────────
+
+class VelocitySnapshotter:
+    """
+    Restores on start, snapshots periodically, and once more on stop.
+
+    With no ``path`` it only restores (from fraud_logs) and never writes;
+    with no ``tracker`` it only rebuilds the sketches.
+    """
+
+    def __init__(
+        self,
+        tracker: Optional[VelocityTracker],
+        path: Optional[str],
+        interval_secs: float,
+    ) -> None:
+        self._tracker = tracker
+        self._path = path
+        self._interval = interval_secs
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # This worker's slot file and the lock file holding its claim
+        self._slot_path: Optional[Path] = None
+        self._slot_lock = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self._path and self._tracker is not None and self._slot_path is None:
+            try:
+                self._slot_path, self._slot_lock = claim_slot(self._path)
+            except Exception as e:
+                logger.warning(f"[VELOCITY] SNAPSHOT SLOT UNAVAILABLE | path={self._path} error={e}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="velocity-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._slot_path is not None:
+            save_snapshot(self._tracker, self._slot_path)
+            if self._slot_lock is not None:
+                self._slot_lock.close()  # releases the slot
+            self._slot_path = self._slot_lock = None
+
+    def _run(self) -> None:
+        restore_velocity(self._tracker, self._path)
+        if self._slot_path is None:
+            return
+        while not self._stop.wait(self._interval):
+            save_snapshot(self._tracker, self._slot_path)
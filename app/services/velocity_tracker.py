@@ -3,17 +3,77 @@ velocity_tracker.py
 ────────────────────
 Thread-safe in-memory per-user sliding-window transaction velocity tracker.
 
-Used by core_ai (fraud scoring) and risk_ai for real-time velocity signals
-without a Redis dependency in the current phase.
+Used by core_ai (fraud scoring) and risk_ai for real-time velocity signals.
+
+Backends (VELOCITY_BACKEND):
+  - "memory" (default): VelocityTracker below — per-process, no dependencies.
+    Each uvicorn worker / pod sees only its own traffic.
+  - "redis": RedisVelocityTracker (velocity_redis.py) — one sorted set per
+    user in a shared Redis, so velocity stays correct when scaling out.
+Both implement VelocityBackend; callers only use the module-level
+``velocity_tracker`` returned by create_velocity_tracker().
+
+Keys:
+  Windows are kept per arbitrary string key. A plain user_id is the user
+  window; velocity_keys() derives the other dimensions for a transaction
+  (device, user+location, user+currency — VELOCITY_DIMENSIONS), so adding
+  one later (e.g. IP) is a new key prefix, not a new store. record_many()
+  and get_signals_many() touch all of a transaction's keys in one call,
+  taking each shard lock once (one pipeline round trip for Redis).
 
 Window sizes: 1 hour, 24 hours.
 Velocity records are only written for APPROVE and REVIEW decisions — blocked
 transactions are not counted so they cannot be used to inflate velocity.
+
+Concurrency:
+  - The store is split into VELOCITY_SHARDS partitions by hash(user_id),
+    each with its own lock, so threads scoring different users rarely
+    contend on the same mutex.
+
+Windows:
+  - Each user keeps a running count/sum for both windows. record() adds to
+    both sums; get_signals() evicts expired entries from the front of each
+    window, subtracting them as it goes. Every entry is added and evicted at
+    most once per window, so a velocity check is amortised O(1) however
+    active the user is.
+  - Each ring is kept sorted by timestamp. Timestamps are client-supplied,
+    so a late arrival is shifted back to its sorted position (a few slots
+    under normal jitter) instead of being appended; eviction from the front
+    then matches filtering every entry by timestamp. If a read's as_of
+    moves backwards, the 1h window is re-extended over entries still inside
+    the 24h window.
+  - Sums are recomputed exactly each time the ring wraps or is resized and
+    reset when a window empties, so floating-point drift cannot accumulate.
+
+Memory:
+  - Entries are stored in per-user ring buffers of timestamps and amounts
+    backed by array('d') (16 bytes per transaction, no per-entry objects),
+    held by __slots__ classes. Buffers grow by doubling and shrink when
+    mostly empty.
+  - Reads never create entries for unknown users.
+  - export_history() / merge_history() move the live windows in and out as
+    flat NumPy arrays; velocity_snapshot.py uses them to persist state
+    across restarts.
+  - Each shard keeps one LRU (OrderedDict in last-activity order) per
+    dimension. The optional sweeper thread drops keys idle for 24h, and
+    VELOCITY_MAX_USERS caps each dimension separately (users, devices,
+    user+location, user+currency), evicting its least recently active keys
+    first, so enabling dimensions never squeezes out user windows.
 """
 
 import threading
-from collections import defaultdict, deque
+import time
+from array import array
+from collections import OrderedDict
 from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
 
 # ─── Window sizes ─────────────────────────────────────────────────────────────
 _WINDOW_1H_SECS: int = 3_600
@@ -24,6 +84,11 @@ _HIGH_COUNT_1H: int = 5          # more than 5 transactions in 1 hour
 _HIGH_COUNT_24H: int = 20        # more than 20 transactions in 24 hours
 _HIGH_AMOUNT_1H: float = 50_000.0    # more than 50k in 1 hour
 _HIGH_AMOUNT_24H: float = 200_000.0  # more than 200k in 24 hours
+_HIGH_DEVICE_COUNT_24H: int = 30     # one device behind 30+ transactions in 24 hours
+_HIGH_DISTINCT_DEVICES_24H: int = 5  # one user on 5+ distinct devices in 24 hours
+
+# Per-user ring buffer capacity bounds (entries; always a power of two)
+_MIN_CAPACITY: int = 8
 
 
 def _to_unix(dt: datetime) -> float:
@@ -33,27 +98,321 @@ def _to_unix(dt: datetime) -> float:
     return dt.timestamp()
 
 
-class VelocityTracker:
+# Key prefix per non-user dimension (user windows are keyed by the bare user_id)
+_DIMENSION_PREFIXES: dict[str, str] = {
+    "device": "device:",
+    "user_location": "user_loc:",
+    "user_currency": "user_ccy:",
+}
+
+
+def _dimension(key: str) -> str:
+    """Dimension a window key belongs to (see velocity_keys())."""
+    for dimension, prefix in _DIMENSION_PREFIXES.items():
+        if key.startswith(prefix):
+            return dimension
+    return "user"
+
+
+def velocity_keys(
+    user_id: str,
+    device_id: Optional[str] = None,
+    location: Optional[str] = None,
+    currency: Optional[str] = None,
+) -> dict[str, str]:
     """
-    Per-user velocity tracker using a deque per user.
-    Stores (unix_timestamp, amount) entries for recent transactions.
+    Window keys for one transaction, by dimension, limited to VELOCITY_DIMENSIONS.
 
-    Thread-safe: all mutations are protected by a single lock.
-    Memory is bounded: entries older than 24 h are pruned on every read.
+    "user" is always present and is the bare user_id (the key used before
+    dimensions existed, so snapshots and Redis keys stay compatible).
     """
+    keys = {"user": user_id}
+    enabled = settings.VELOCITY_DIMENSIONS
+    if device_id is not None and "device" in enabled:
+        keys["device"] = f"{_DIMENSION_PREFIXES['device']}{device_id}"
+    if location is not None and "user_location" in enabled:
+        keys["user_location"] = f"{_DIMENSION_PREFIXES['user_location']}{user_id}|{location.upper()}"
+    if currency is not None and "user_currency" in enabled:
+        keys["user_currency"] = f"{_DIMENSION_PREFIXES['user_currency']}{user_id}|{currency.upper()}"
+    return keys
+
+
+def _build_signals(count_1h: int, count_24h: int, amount_1h: float, amount_24h: float) -> dict:
+    """Shape window counts/sums into the get_signals() result dict."""
+    return {
+        "count_1h": count_1h,
+        "count_24h": count_24h,
+        "amount_1h": round(amount_1h, 2),
+        "amount_24h": round(amount_24h, 2),
+        "high_count_1h": count_1h >= _HIGH_COUNT_1H,
+        "high_count_24h": count_24h >= _HIGH_COUNT_24H,
+        "high_amount_1h": amount_1h >= _HIGH_AMOUNT_1H,
+        "high_amount_24h": amount_24h >= _HIGH_AMOUNT_24H,
+    }
+
+
+class VelocityBackend:
+    """
+    Storage interface for per-user velocity windows.
+
+    Implementations must be thread-safe: scoring runs in worker threads.
+    """
+
+    name = "base"
+
+    def record(self, user_id: str, amount: float, ts: datetime) -> None:
+        """Record a completed (APPROVE / REVIEW) transaction."""
+        raise NotImplementedError
+
+    def get_signals(self, user_id: str, as_of: datetime) -> dict:
+        """Velocity signals for user_id as of the given timestamp (see _build_signals)."""
+        raise NotImplementedError
+
+    def record_many(self, keys: Sequence[str], amount: float, ts: datetime) -> None:
+        """Record one transaction under several window keys."""
+        for key in keys:
+            self.record(key, amount, ts)
+
+    def get_signals_many(self, keys: Sequence[str], as_of: datetime) -> list[dict]:
+        """Signals for several window keys, in the order given."""
+        return [self.get_signals(key, as_of) for key in keys]
+
+    def start_sweeper(self, interval_secs: float | None = None) -> None:
+        """Start background housekeeping, if the backend needs any."""
+
+    def stop_sweeper(self) -> None:
+        """Stop background housekeeping started by start_sweeper()."""
+
+
+class _UserWindow:
+    """
+    Ring buffer of (unix_ts, amount) entries for one user.
+
+    The live 24h window is the ``size`` entries starting at physical slot
+    ``start``; the 1h window is the last ``size_1h`` of them. sum_24h and
+    sum_1h are the amounts in each window.
+    """
+
+    __slots__ = ("ts", "amounts", "start", "size", "size_1h", "sum_24h", "sum_1h", "last_seen")
 
     def __init__(self) -> None:
-        self._lock = threading.Lock()
-        self._store: dict[str, deque] = defaultdict(deque)
+        self.ts = array("d", bytes(8 * _MIN_CAPACITY))
+        self.amounts = array("d", bytes(8 * _MIN_CAPACITY))
+        self.start = 0
+        self.size = 0
+        self.size_1h = 0
+        self.sum_24h = 0.0
+        self.sum_1h = 0.0
+        self.last_seen = 0.0
+
+    def append(self, unix_ts: float, amount: float) -> None:
+        """Insert an entry in timestamp order (O(1) when it is the newest)."""
+        capacity = len(self.ts)
+        if self.size == capacity:
+            self._resize(capacity * 2)
+            capacity *= 2
+        ts, amounts = self.ts, self.amounts
+        mask = capacity - 1
+        # Out-of-order timestamp: shift newer entries up one slot, newest first,
+        # until the gap reaches its sorted position (ties keep arrival order).
+        index = self.size
+        while index and ts[(self.start + index - 1) & mask] > unix_ts:
+            src = (self.start + index - 1) & mask
+            dst = (self.start + index) & mask
+            ts[dst] = ts[src]
+            amounts[dst] = amounts[src]
+            index -= 1
+        pos = (self.start + index) & mask
+        ts[pos] = unix_ts
+        amounts[pos] = amount
+        self.sum_24h += amount
+        # Landing before the 1h window start leaves it in the 24h window only;
+        # advance() re-extends the 1h window if it is recent enough.
+        if index >= self.size - self.size_1h:
+            self.size_1h += 1
+            self.sum_1h += amount
+        self.size += 1
+
+    def advance(self, cutoff_1h: float, cutoff_24h: float) -> None:
+        """Evict entries older than each cutoff, keeping the running sums in step."""
+        ts, amounts = self.ts, self.amounts
+        mask = len(ts) - 1
+        wrapped = False
+
+        while self.size and ts[self.start] < cutoff_24h:
+            amount = amounts[self.start]
+            self.sum_24h -= amount
+            if self.size_1h == self.size:
+                self.size_1h -= 1
+                self.sum_1h -= amount
+            self.start = (self.start + 1) & mask
+            self.size -= 1
+            wrapped |= self.start == 0
+
+        # First entry of the 1h window sits at logical index size - size_1h.
+        while self.size_1h:
+            pos = (self.start + self.size - self.size_1h) & mask
+            if ts[pos] >= cutoff_1h:
+                break
+            self.sum_1h -= amounts[pos]
+            self.size_1h -= 1
+        while self.size_1h < self.size:  # as_of moved back
+            pos = (self.start + self.size - self.size_1h - 1) & mask
+            if ts[pos] < cutoff_1h:
+                break
+            self.sum_1h += amounts[pos]
+            self.size_1h += 1
+
+        if self.size == 0:
+            self.sum_24h = self.sum_1h = 0.0
+            if len(ts) > _MIN_CAPACITY:
+                self._resize(_MIN_CAPACITY)
+        elif len(ts) > _MIN_CAPACITY and self.size * 4 <= len(ts):
+            self._resize(len(ts) // 2)
+        elif wrapped:
+            self._resum()
+
+    @classmethod
+    def from_history(cls, ts: array, amounts: array) -> "_UserWindow":
+        """Window pre-filled with ``ts``/``amounts`` (oldest first)."""
+        window = cls()
+        capacity = max(_MIN_CAPACITY, 1 << (len(ts) - 1).bit_length())
+        padding = array("d", bytes(8 * (capacity - len(ts))))
+        window.ts = ts + padding
+        window.amounts = amounts + padding
+        window.size = window.size_1h = len(ts)
+        window._resum()
+        return window
+
+    def live(self) -> tuple[array, array]:
+        """Live 24h entries (timestamps, amounts), oldest first."""
+        return self._ordered(self.ts), self._ordered(self.amounts)
+
+    def _ordered(self, values: array) -> array:
+        end = self.start + self.size
+        if end <= len(values):
+            return values[self.start:end]
+        return values[self.start:] + values[:end - len(values)]
+
+    def _resize(self, capacity: int) -> None:
+        padding = array("d", bytes(8 * (capacity - self.size)))
+        self.ts = self._ordered(self.ts) + padding
+        self.amounts = self._ordered(self.amounts) + padding
+        self.start = 0
+        self._resum()
+
+    def _resum(self) -> None:
+        live = self._ordered(self.amounts)
+        self.sum_24h = sum(live, 0.0)
+        self.sum_1h = sum(live[len(live) - self.size_1h:], 0.0)
+
+
+class _Shard:
+    __slots__ = ("lock", "tables", "max_keys")
+
+    def __init__(self, max_keys: int) -> None:
+        self.lock = threading.Lock()
+        # One LRU per dimension, least recently active first
+        self.tables: dict[str, OrderedDict[str, _UserWindow]] = {}
+        self.max_keys = max_keys
+
+    def table(self, key: str) -> OrderedDict[str, _UserWindow]:
+        dimension = _dimension(key)
+        table = self.tables.get(dimension)
+        if table is None:
+            table = self.tables[dimension] = OrderedDict()
+        return table
+
+    def get(self, key: str) -> Optional[_UserWindow]:
+        table = self.tables.get(_dimension(key))
+        return table.get(key) if table is not None else None
+
+    def put(self, key: str, window: _UserWindow) -> None:
+        """Store ``window`` under ``key``, evicting its dimension's LRU key past the cap."""
+        table = self.table(key)
+        table[key] = window
+        table.move_to_end(key)
+        if self.max_keys and len(table) > self.max_keys:
+            table.popitem(last=False)
+
+
+class VelocityTracker(VelocityBackend):
+    """
+    In-memory per-user velocity tracker over a lock-striped store.
+    Stores (unix_timestamp, amount) entries for recent transactions.
+
+    Thread-safe: each shard's mutations are protected by that shard's lock.
+    Memory is bounded: entries older than 24 h are pruned on every read,
+    idle users are swept, and the number of tracked users is capped.
+    """
+
+    name = "memory"
+
+    def __init__(self, n_shards: int | None = None, max_users: int | None = None) -> None:
+        n_shards = n_shards or settings.VELOCITY_SHARDS
+        # Per dimension: the user cap applies to devices, user+location, ... alike
+        max_users = settings.VELOCITY_MAX_USERS if max_users is None else max_users
+        per_shard = -(-max_users // n_shards) if max_users > 0 else 0
+        self._shards: tuple[_Shard, ...] = tuple(_Shard(per_shard) for _ in range(n_shards))
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+
+    def _shard(self, user_id: str) -> _Shard:
+        return self._shards[hash(user_id) % len(self._shards)]
+
+    def _by_shard(self, keys: Sequence[str]) -> dict[int, list[int]]:
+        """Positions of ``keys`` grouped by shard index."""
+        groups: dict[int, list[int]] = {}
+        n_shards = len(self._shards)
+        for i, key in enumerate(keys):
+            groups.setdefault(hash(key) % n_shards, []).append(i)
+        return groups
+
+    @staticmethod
+    def _append_locked(shard: _Shard, key: str, unix_ts: float, amount: float, now: float) -> None:
+        table = shard.table(key)
+        window = table.get(key)
+        if window is None:
+            window = table[key] = _UserWindow()
+            if shard.max_keys and len(table) > shard.max_keys:
+                table.popitem(last=False)  # evict least recently active
+        else:
+            table.move_to_end(key)
+        window.last_seen = now
+        window.append(unix_ts, amount)
+
+    @staticmethod
+    def _read_locked(
+        shard: _Shard, key: str, cutoff_1h: float, cutoff_24h: float, now: float
+    ) -> tuple[int, int, float, float]:
+        table = shard.tables.get(_dimension(key))
+        window = table.get(key) if table is not None else None
+        if window is None:
+            return 0, 0, 0.0, 0.0
+        table.move_to_end(key)
+        window.last_seen = now
+        # Evict expired entries (also bounds memory) — amortised O(1)
+        window.advance(cutoff_1h, cutoff_24h)
+        return window.size_1h, window.size, window.sum_1h, window.sum_24h
 
     def record(self, user_id: str, amount: float, ts: datetime) -> None:
         """
         Record a completed transaction for velocity tracking.
         Should only be called for APPROVE / REVIEW decisions.
         """
+        shard = self._shard(user_id)
+        with shard.lock:
+            self._append_locked(shard, user_id, _to_unix(ts), amount, time.monotonic())
+
+    def record_many(self, keys: Sequence[str], amount: float, ts: datetime) -> None:
+        """Record one transaction under several keys, locking each shard once."""
         unix_ts = _to_unix(ts)
-        with self._lock:
-            self._store[user_id].append((unix_ts, amount))
+        now = time.monotonic()
+        for shard_idx, positions in self._by_shard(keys).items():
+            shard = self._shards[shard_idx]
+            with shard.lock:
+                for i in positions:
+                    self._append_locked(shard, keys[i], unix_ts, amount, now)
 
     def get_signals(self, user_id: str, as_of: datetime) -> dict:
         """
@@ -66,34 +425,158 @@ class VelocityTracker:
             high_amount_1h / _24h     — bool flags when amounts exceed thresholds
         """
         now = _to_unix(as_of)
+        shard = self._shard(user_id)
+        with shard.lock:
+            window = self._read_locked(
+                shard, user_id, now - _WINDOW_1H_SECS, now - _WINDOW_24H_SECS, time.monotonic()
+            )
+        return _build_signals(*window)
+
+    def get_signals_many(self, keys: Sequence[str], as_of: datetime) -> list[dict]:
+        """Signals for several keys in the order given, locking each shard once."""
+        now = _to_unix(as_of)
         cutoff_1h = now - _WINDOW_1H_SECS
         cutoff_24h = now - _WINDOW_24H_SECS
+        mono = time.monotonic()
+        windows: list = [None] * len(keys)
+        for shard_idx, positions in self._by_shard(keys).items():
+            shard = self._shards[shard_idx]
+            with shard.lock:
+                for i in positions:
+                    windows[i] = self._read_locked(shard, keys[i], cutoff_1h, cutoff_24h, mono)
+        return [_build_signals(*window) for window in windows]
 
-        with self._lock:
-            dq = self._store[user_id]
-            # Prune entries older than 24h to bound memory
-            while dq and dq[0][0] < cutoff_24h:
-                dq.popleft()
-            entries_24h = list(dq)
+    # ─── Snapshot / Restore ───────────────────────────────────────────────────
 
-        entries_1h = [(t, a) for t, a in entries_24h if t >= cutoff_1h]
+    def export_history(self) -> dict[str, np.ndarray]:
+        """
+        Copy every user's live entries into flat arrays.
 
-        count_1h = len(entries_1h)
-        count_24h = len(entries_24h)
-        amount_1h = sum(a for _, a in entries_1h)
-        amount_24h = sum(a for _, a in entries_24h)
+        Returns user_ids (str), offsets (int64, len(user_ids) + 1) and ts /
+        amounts (float64) where user i owns entries offsets[i]:offsets[i+1].
+        Each shard is locked only while its own entries are copied.
+        """
+        user_ids: list[str] = []
+        lengths: list[int] = []
+        ts_parts: list[array] = []
+        amount_parts: list[array] = []
+        for shard in self._shards:
+            with shard.lock:
+                for user_id, window in (
+                    item for table in shard.tables.values() for item in table.items()
+                ):
+                    if not window.size:
+                        continue
+                    ts, amounts = window.live()
+                    user_ids.append(user_id)
+                    lengths.append(window.size)
+                    ts_parts.append(ts)
+                    amount_parts.append(amounts)
 
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
         return {
-            "count_1h": count_1h,
-            "count_24h": count_24h,
-            "amount_1h": round(amount_1h, 2),
-            "amount_24h": round(amount_24h, 2),
-            "high_count_1h": count_1h >= _HIGH_COUNT_1H,
-            "high_count_24h": count_24h >= _HIGH_COUNT_24H,
-            "high_amount_1h": amount_1h >= _HIGH_AMOUNT_1H,
-            "high_amount_24h": amount_24h >= _HIGH_AMOUNT_24H,
+            "user_ids": np.array(user_ids, dtype=str),
+            "offsets": offsets,
+            "ts": np.concatenate([np.frombuffer(p, dtype=np.float64) for p in ts_parts])
+            if ts_parts else np.empty(0),
+            "amounts": np.concatenate([np.frombuffer(p, dtype=np.float64) for p in amount_parts])
+            if amount_parts else np.empty(0),
         }
 
+    def merge_history(
+        self,
+        user_ids: np.ndarray,
+        offsets: np.ndarray,
+        ts: np.ndarray,
+        amounts: np.ndarray,
+    ) -> int:
+        """
+        Load historical entries (layout as export_history()) into the tracker.
+
+        History is placed before any entries already recorded for the same
+        user, so restoring while live traffic is being scored keeps every
+        window in time order. Returns the number of entries loaded.
+        """
+        ts = np.ascontiguousarray(ts, dtype=np.float64)
+        amounts = np.ascontiguousarray(amounts, dtype=np.float64)
+        now = time.monotonic()
+        for i, user_id in enumerate(user_ids.tolist()):
+            lo, hi = int(offsets[i]), int(offsets[i + 1])
+            if lo == hi:
+                continue
+            history = _UserWindow.from_history(
+                array("d", ts[lo:hi].tobytes()), array("d", amounts[lo:hi].tobytes())
+            )
+            history.last_seen = now
+            shard = self._shard(user_id)
+            with shard.lock:
+                live = shard.get(user_id)
+                if live is not None:
+                    for t, a in zip(*live.live()):
+                        history.append(t, a)
+                    history.last_seen = live.last_seen
+                shard.put(user_id, history)
+        return int(offsets[-1]) if len(offsets) else 0
+
+    # ─── Housekeeping ─────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        """Number of window keys currently tracked, across all dimensions."""
+        return sum(len(table) for shard in self._shards for table in shard.tables.values())
+
+    def sweep(self, max_idle_secs: float = _WINDOW_24H_SECS) -> int:
+        """
+        Drop keys with no record/read in the last ``max_idle_secs``.
+
+        Each dimension's LRU is in last-activity order, so each sweep stops at
+        the first recently active key. Returns the number of keys dropped.
+        """
+        cutoff = time.monotonic() - max_idle_secs
+        dropped = 0
+        for shard in self._shards:
+            with shard.lock:
+                for users in shard.tables.values():
+                    while users:
+                        user_id = next(iter(users))
+                        if users[user_id].last_seen >= cutoff:
+                            break
+                        del users[user_id]
+                        dropped += 1
+        return dropped
+
+    def start_sweeper(self, interval_secs: float | None = None) -> None:
+        """Run sweep() every ``interval_secs`` on a daemon thread (idempotent)."""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        interval = interval_secs or settings.VELOCITY_SWEEP_INTERVAL_SECS
+        self._sweeper_stop.clear()
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop, args=(interval,), name="velocity-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._sweeper_stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self, interval: float) -> None:
+        while not self._sweeper_stop.wait(interval):
+            dropped = self.sweep()
+            if dropped:
+                logger.info(f"[VELOCITY] SWEEP | dropped={dropped} tracked={len(self)}")
+
 
 # ─── Module-level singleton ───────────────────────────────────────────────────
-velocity_tracker = VelocityTracker()
+
+def create_velocity_tracker() -> VelocityBackend:
+    """Build the backend selected by settings.VELOCITY_BACKEND."""
+    if settings.VELOCITY_BACKEND == "redis":
+        from app.services.velocity_redis import RedisVelocityTracker
+        return RedisVelocityTracker.from_url(settings.REDIS_URL)
+    return VelocityTracker()
+
+
+velocity_tracker: VelocityBackend = create_velocity_tracker()
@@ -9,7 +9,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 
 import app.models.logs  # noqa: F401
-from app.api.v1 import fraud, health, portfolio
+from app.api.v1 import analytics, fraud, health, portfolio
 from app.api.v1.ai import risk as ai_risk
 from app.api.v1.ai import investment as ai_investment
 from app.api.v1.ai import credit as ai_credit
@@ -19,7 +19,12 @@ from app.api.v1.ai import vault as ai_vault
 from app.api.v1.ai import orchestration as ai_orchestration
 from app.core.config import settings
 from app.core.logging import get_logger, setup_logging
-from app.db.database import Base, engine
+from app.services.ai_modules.core_ai.batcher import fraud_score_batcher
+from app.services.log_writer import log_writer
+from app.services.velocity_snapshot import VelocitySnapshotter
+from app.services.velocity_tracker import VelocityTracker, velocity_tracker
+from app.db.database import Base, dispose_async_engine, engine
+from app.db.partitions import FraudLogPartitionMaintainer, maintain_fraud_log_partitions
 
 # Setup structured logging
 setup_logging()
@@ -29,10 +34,38 @@ logger = get_logger(__name__)
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     Base.metadata.create_all(bind=engine)
+    # fraud_logs partitions must exist before the first insert (no-op outside PostgreSQL)
+    await asyncio.to_thread(maintain_fraud_log_partitions)
+    partition_maintainer = FraudLogPartitionMaintainer(settings.FRAUD_LOG_PARTITION_CHECK_SECS)
+    partition_maintainer.start()
     # Pre-warm ML scorer so first request is not delayed by model training
-    from app.services.ai_modules.core_ai.ml_scorer import warmup
+    from app.services.ai_modules.core_ai.ml_scorer import model_registry, warmup
     await asyncio.to_thread(warmup)
+    # Follow retrains published by other workers through the model store
+    model_registry.start_watcher()
+    if settings.FRAUD_MICRO_BATCHING:
+        fraud_score_batcher.start()
+    if settings.LOG_WRITER_ENABLED:
+        log_writer.start()
+    velocity_tracker.start_sweeper()
+    # Warm velocity windows in the background (snapshot or fraud_logs) so startup is not delayed
+    # (Redis keeps its own windows; only the per-process sketches are rebuilt then)
+    in_memory = isinstance(velocity_tracker, VelocityTracker)
+    snapshotter = VelocitySnapshotter(
+        velocity_tracker if in_memory else None,
+        path=settings.VELOCITY_SNAPSHOT_PATH if in_memory else None,
+        interval_secs=settings.VELOCITY_SNAPSHOT_INTERVAL_SECS,
+    )
+    snapshotter.start()
     yield
+    await fraud_score_batcher.stop()
+    # After the batcher, so rows from the last scored requests are drained too
+    await log_writer.stop()
+    velocity_tracker.stop_sweeper()
+    await asyncio.to_thread(model_registry.stop_watcher)
+    await asyncio.to_thread(snapshotter.stop)
+    await asyncio.to_thread(partition_maintainer.stop)
+    await dispose_async_engine()
 
 app = FastAPI(
     title="Aurix AI Service",
@@ -140,6 +173,7 @@ app.add_middleware(
 app.include_router(health.router, prefix="/v1", tags=["Health"])
 app.include_router(fraud.router, prefix="/v1", tags=["Fraud Detection"])
 app.include_router(portfolio.router, prefix="/v1", tags=["Portfolio"])
+app.include_router(analytics.router, prefix="/v1", tags=["Fraud Analytics"])
 
 # ─── AI Module Routers (Phase 3) ──────────────────────────────────────────────
 app.include_router(ai_risk.router, prefix="/v1/ai", tags=["Risk AI"])
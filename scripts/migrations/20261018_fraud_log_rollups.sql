@@ -0,0 +1,82 @@
+-- Aurix AI Service MVP migration
+-- Adds the dashboard rollups (fraud_log_hourly, fraud_log_user_daily) and
+-- backfills them from fraud_logs; the log writer keeps them current from
+-- then on. Replaces the plain user_id index on fraud_logs with a covering
+-- (user_id, timestamp DESC) index for per-user history.
+-- Run with the service stopped so no rows are counted twice during the
+-- backfill. Requires 20261018_fraud_logs_monthly_partitions.sql.
+-- Safe to re-run (each rollup is only backfilled while it is empty).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS fraud_log_hourly (
+    bucket_start    TIMESTAMPTZ NOT NULL,
+    decision        VARCHAR(20) NOT NULL,
+    currency        VARCHAR(10) NOT NULL,
+    location        VARCHAR(10) NOT NULL,
+    risk_bucket     SMALLINT NOT NULL,
+    tx_count        BIGINT NOT NULL,
+    amount_sum      DOUBLE PRECISION NOT NULL,
+    risk_score_sum  DOUBLE PRECISION NOT NULL,
+    risk_score_max  DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (bucket_start, decision, currency, location, risk_bucket)
+);
+
+CREATE TABLE IF NOT EXISTS fraud_log_user_daily (
+    user_id         VARCHAR NOT NULL,
+    day             DATE NOT NULL,
+    tx_count        BIGINT NOT NULL,
+    approve_count   BIGINT NOT NULL,
+    review_count    BIGINT NOT NULL,
+    block_count     BIGINT NOT NULL,
+    amount_sum      DOUBLE PRECISION NOT NULL,
+    amount_max      DOUBLE PRECISION NOT NULL,
+    risk_score_sum  DOUBLE PRECISION NOT NULL,
+    risk_score_max  DOUBLE PRECISION NOT NULL,
+    last_seen       TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+
+INSERT INTO fraud_log_hourly
+SELECT
+    date_trunc('hour', timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    decision,
+    currency,
+    COALESCE(location, ''),
+    LEAST(GREATEST(floor(risk_score / 10), 0), 9)::smallint,
+    count(*),
+    sum(amount),
+    sum(risk_score),
+    max(risk_score)
+FROM fraud_logs
+WHERE NOT EXISTS (SELECT 1 FROM fraud_log_hourly)
+GROUP BY 1, 2, 3, 4, 5;
+
+INSERT INTO fraud_log_user_daily
+SELECT
+    user_id,
+    (timestamp AT TIME ZONE 'UTC')::date,
+    count(*),
+    count(*) FILTER (WHERE decision = 'APPROVE'),
+    count(*) FILTER (WHERE decision = 'REVIEW'),
+    count(*) FILTER (WHERE decision = 'BLOCK'),
+    sum(amount),
+    max(amount),
+    sum(risk_score),
+    max(risk_score),
+    max(timestamp)
+FROM fraud_logs
+WHERE NOT EXISTS (SELECT 1 FROM fraud_log_user_daily)
+GROUP BY 1, 2;
+
+-- Covering index: per-user history newest first, answered by index-only scans
+CREATE INDEX IF NOT EXISTS ix_fraud_logs_user_id_timestamp
+    ON fraud_logs (user_id, timestamp DESC)
+    INCLUDE (decision, risk_score, amount);
+
+DROP INDEX IF EXISTS ix_fraud_logs_user_id;
+
+ANALYZE fraud_log_hourly;
+ANALYZE fraud_log_user_daily;
+
+COMMIT;
@@ -0,0 +1,123 @@
+-- Aurix AI Service MVP migration
+-- Converts fraud_logs into a table range-partitioned by month on timestamp.
+-- Existing rows are copied into one partition per month that has data,
+-- including timestamp_raw (the original client value kept by
+-- 20260301_fraud_logs_request_id_and_timestamp.sql). Rows with a NULL
+-- timestamp are placed by logged_at (or now()); their timestamp_raw keeps the
+-- original value and the count is reported with a NOTICE. A DEFAULT
+-- partition catches timestamps outside every month range. Upcoming months and
+-- retention are maintained by the service afterwards (app/db/partitions.py).
+-- The old table is kept as fraud_logs_legacy: drop it explicitly once the
+-- copy has been verified (DROP TABLE fraud_logs_legacy;).
+-- The copy rewrites the whole table: run it in a maintenance window with the
+-- service stopped. Safe to re-run (no-op once fraud_logs is partitioned).
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION _aurix_create_fraud_log_partition(month date)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF fraud_logs FOR VALUES FROM (%L) TO (%L)',
+        'fraud_logs_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+        month::timestamp AT TIME ZONE 'UTC',
+        (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+    );
+END;
+$$;
+
+DO $$
+DECLARE
+    month date;
+    has_raw boolean;
+    null_timestamps bigint;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('fraud_logs')
+    ) THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE fraud_logs RENAME TO fraud_logs_legacy;
+    ALTER TABLE fraud_logs_legacy RENAME CONSTRAINT fraud_logs_pkey TO fraud_logs_legacy_pkey;
+    -- Free the index names for the new parent table
+    ALTER INDEX IF EXISTS ix_fraud_logs_id RENAME TO ix_fraud_logs_legacy_id;
+    ALTER INDEX IF EXISTS ix_fraud_logs_user_id RENAME TO ix_fraud_logs_legacy_user_id;
+    ALTER INDEX IF EXISTS ix_fraud_logs_request_id RENAME TO ix_fraud_logs_legacy_request_id;
+    ALTER INDEX IF EXISTS idx_fraud_logs_request_id RENAME TO idx_fraud_logs_legacy_request_id;
+
+    SELECT EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_name = 'fraud_logs_legacy'
+          AND column_name = 'timestamp_raw'
+    ) INTO has_raw;
+
+    -- The partition key must be part of the primary key; id keeps its sequence
+    -- (widened to BIGINT) so ids stay unique across partitions.
+    CREATE TABLE fraud_logs (
+        id          BIGINT NOT NULL DEFAULT nextval('fraud_logs_id_seq'),
+        request_id  VARCHAR(64),
+        user_id     VARCHAR NOT NULL,
+        amount      DOUBLE PRECISION NOT NULL,
+        currency    VARCHAR(10) NOT NULL,
+        device_id   VARCHAR,
+        location    VARCHAR(10),
+        risk_score  DOUBLE PRECISION NOT NULL,
+        decision    VARCHAR(20) NOT NULL,
+        reasons     JSON NOT NULL,
+        timestamp   TIMESTAMPTZ NOT NULL,
+        logged_at   TIMESTAMPTZ DEFAULT now(),
+        timestamp_raw TEXT,
+        PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp);
+
+    ALTER SEQUENCE fraud_logs_id_seq AS BIGINT OWNED BY fraud_logs.id;
+
+    CREATE TABLE fraud_logs_default PARTITION OF fraud_logs DEFAULT;
+
+    FOR month IN
+        SELECT DISTINCT date_trunc('month', COALESCE(timestamp, logged_at, now()) AT TIME ZONE 'UTC')::date
+        FROM fraud_logs_legacy
+        UNION
+        SELECT (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => n))::date
+        FROM generate_series(0, 2) AS n
+    LOOP
+        PERFORM _aurix_create_fraud_log_partition(month);
+    END LOOP;
+
+    -- timestamp_raw: the forensic copy if the earlier migration added one,
+    -- otherwise the legacy timestamp as text (NULL stays NULL)
+    EXECUTE format(
+        'INSERT INTO fraud_logs (
+            id, request_id, user_id, amount, currency, device_id, location,
+            risk_score, decision, reasons, timestamp, logged_at, timestamp_raw
+        )
+        SELECT
+            id, request_id, user_id, amount, currency, device_id, location,
+            risk_score, decision, reasons, COALESCE(timestamp, logged_at, now()), logged_at, %s
+        FROM fraud_logs_legacy',
+        CASE WHEN has_raw THEN 'COALESCE(timestamp_raw, timestamp::text)' ELSE 'timestamp::text' END
+    );
+
+    SELECT count(*) INTO null_timestamps FROM fraud_logs_legacy WHERE timestamp IS NULL;
+    IF null_timestamps > 0 THEN
+        RAISE NOTICE 'fraud_logs: % rows had a NULL timestamp and were placed by logged_at/now(); originals are in timestamp_raw and fraud_logs_legacy', null_timestamps;
+    END IF;
+    RAISE NOTICE 'fraud_logs_legacy kept for verification; drop it explicitly when no longer needed';
+END $$;
+
+-- Created on the parent, so every existing and future partition gets its own copy
+CREATE INDEX IF NOT EXISTS ix_fraud_logs_user_id
+    ON fraud_logs (user_id);
+
+CREATE INDEX IF NOT EXISTS ix_fraud_logs_request_id
+    ON fraud_logs (request_id);
+
+DROP FUNCTION IF EXISTS _aurix_create_fraud_log_partition(date);
+
+ANALYZE fraud_logs;
+
+COMMIT;
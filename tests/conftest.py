@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Settings require DATABASE_URL; unit tests never open a connection
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{ROOT / 'data' / 'test.db'}")
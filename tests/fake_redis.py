@@ -0,0 +1,93 @@
+"""
+fake_redis.py
+──────────────
+In-process stand-in for the redis-py client, covering the sorted-set
+commands RedisVelocityTracker uses: pipeline(), zadd, expire,
+zremrangebyscore and zrangebyscore(withscores=True).
+
+Set ``fail = True`` to make every pipeline raise ConnectionError on
+execute(), as a dropped Redis connection would.
+"""
+
+from typing import Any
+
+
+def _bound(value: Any) -> tuple[float, bool]:
+    """(score, exclusive) for a redis score bound: number, "-inf"/"+inf" or "(x"."""
+    if isinstance(value, str):
+        if value.startswith("("):
+            return float(value[1:]), True
+        return float(value), False
+    return float(value), False
+
+
+def _in_range(score: float, lo: tuple[float, bool], hi: tuple[float, bool]) -> bool:
+    above = score > lo[0] if lo[1] else score >= lo[0]
+    below = score < hi[0] if hi[1] else score <= hi[0]
+    return above and below
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.zsets: dict[str, dict[bytes, float]] = {}
+        self.ttls: dict[str, int] = {}
+        self.fail = False
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def zadd(self, key: str, mapping: dict) -> int:
+        zset = self.zsets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            member = member.encode() if isinstance(member, str) else member
+            added += member not in zset
+            zset[member] = float(score)
+        return added
+
+    def expire(self, key: str, seconds: int) -> bool:
+        if key not in self.zsets:
+            return False
+        self.ttls[key] = int(seconds)
+        return True
+
+    def zremrangebyscore(self, key: str, lo: Any, hi: Any) -> int:
+        zset = self.zsets.get(key, {})
+        lo, hi = _bound(lo), _bound(hi)
+        doomed = [member for member, score in zset.items() if _in_range(score, lo, hi)]
+        for member in doomed:
+            del zset[member]
+        if key in self.zsets and not zset:
+            del self.zsets[key]
+            self.ttls.pop(key, None)
+        return len(doomed)
+
+    def zrangebyscore(self, key: str, lo: Any, hi: Any, withscores: bool = False) -> list:
+        lo, hi = _bound(lo), _bound(hi)
+        entries = sorted(
+            ((member, score) for member, score in self.zsets.get(key, {}).items()
+             if _in_range(score, lo, hi)),
+            key=lambda item: (item[1], item[0]),
+        )
+        return entries if withscores else [member for member, _ in entries]
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis) -> None:
+        self._client = client
+        self._commands: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if name not in ("zadd", "expire", "zremrangebyscore", "zrangebyscore"):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs) -> "FakePipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        if self._client.fail:
+            raise ConnectionError("Connection refused (fake)")
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in commands]
@@ -0,0 +1,58 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from app.services.velocity_redis import RedisVelocityTracker
+from app.services.velocity_tracker import VelocityTracker, velocity_keys
+from tests.fake_redis import FakeRedis
+
+_START = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+
+def _traffic(seed: int, n: int, jitter_secs: float = 0.0):
+    """(keys, amount, ts) transactions over ~2 days for a handful of users."""
+    rng = random.Random(seed)
+    clock = _START
+    for _ in range(n):
+        clock += timedelta(seconds=rng.expovariate(1 / 300))
+        ts = clock - timedelta(seconds=rng.uniform(0, jitter_secs)) if jitter_secs else clock
+        user = f"u{rng.randrange(5)}"
+        keys = velocity_keys(user, f"d{rng.randrange(3)}", rng.choice(["DE", "FR"]), "EUR")
+        yield list(keys.values()), round(rng.uniform(1, 900), 2), ts, clock
+
+
+def _assert_same_signals(jitter_secs: float) -> None:
+    memory = VelocityTracker(n_shards=4, max_users=0)
+    shared = RedisVelocityTracker(FakeRedis(), prefix="test:")
+    for keys, amount, ts, clock in _traffic(seed=7, n=1_500, jitter_secs=jitter_secs):
+        assert shared.get_signals_many(keys, clock) == memory.get_signals_many(keys, clock)
+        memory.record_many(keys, amount, ts)
+        shared.record_many(keys, amount, ts)
+
+
+def test_redis_backend_matches_memory_tracker():
+    _assert_same_signals(jitter_secs=0.0)
+
+
+def test_redis_backend_matches_memory_tracker_with_out_of_order_timestamps():
+    _assert_same_signals(jitter_secs=900.0)
+
+
+def test_redis_backend_sets_key_ttl():
+    client = FakeRedis()
+    RedisVelocityTracker(client, prefix="test:").record("u1", 10.0, _START)
+    assert client.ttls["test:u1"] > 86_400
+
+
+def test_redis_backend_fails_open():
+    client = FakeRedis()
+    tracker = RedisVelocityTracker(client, prefix="test:")
+    tracker.record("u1", 50.0, _START)
+
+    client.fail = True
+    tracker.record("u1", 70.0, _START)  # dropped with a warning, not raised
+    signals = tracker.get_signals("u1", _START)
+    assert signals["count_24h"] == 0 and signals["amount_24h"] == 0.0
+
+    client.fail = False
+    signals = tracker.get_signals("u1", _START)
+    assert signals["count_1h"] == 1 and signals["amount_1h"] == 50.0